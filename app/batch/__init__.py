@@ -1,2 +1,3 @@
+from .artifacts import *
 from .processor import *
 from .schema import *
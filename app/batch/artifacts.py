@@ -0,0 +1,166 @@
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+import numpy as np
+
+from ..core.logger import get_logger
+from ..core.config import BATCH_MEMORY_BUDGET_MB, BATCH_SPILL_DIR
+
+# =========================
+# LOGGER
+# =========================
+logger = get_logger("batch.artifacts")
+
+class BatchArtifactStore:
+    """
+    Keyed store for batch images and overlays with a memory budget.
+
+    Artifacts (NumPy arrays or encoded bytes) stay in memory until the budget
+    is used up; later artifacts are written to a private temp directory and
+    read back lazily (arrays as read-only memory maps). The directory is
+    removed on ``close()``, when the store is garbage collected (session
+    ended) or at interpreter exit.
+
+    Args:
+        budget_mb (float, optional): In-memory budget in megabytes.
+            Defaults to BATCH_MEMORY_BUDGET_MB.
+        spill_dir (str, optional): Parent directory for spilled files.
+            Defaults to BATCH_SPILL_DIR (system temp dir when None).
+    """
+
+    def __init__(self, budget_mb=BATCH_MEMORY_BUDGET_MB, spill_dir=BATCH_SPILL_DIR):
+        self._budget = int(budget_mb * 1024 * 1024)
+        self._spill_parent = spill_dir
+        self._memory = {}
+        self._spilled = {}
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+        self._dir = None
+        self._finalizer = None
+        self._lock = threading.Lock()
+
+    # -------------------------
+    # Internal helpers
+    # -------------------------
+    def _spill_dir(self):
+        if self._dir is None:
+            self._dir = tempfile.mkdtemp(prefix="batch_artifacts_", dir=self._spill_parent)
+            self._finalizer = weakref.finalize(
+                self, shutil.rmtree, self._dir, ignore_errors=True
+            )
+            logger.info(f"Spill directory created | path={self._dir}")
+        return self._dir
+
+    @staticmethod
+    def _nbytes(value):
+        return value.nbytes if isinstance(value, np.ndarray) else len(value)
+
+    # -------------------------
+    # Public API
+    # -------------------------
+    def put(self, key, value):
+        """
+        Store an artifact, spilling it to disk if the memory budget is exhausted.
+
+        Args:
+            key (str): Artifact key (e.g., "3/image").
+            value (np.ndarray | bytes): Array or encoded bytes to store.
+        """
+        size = self._nbytes(value)
+
+        with self._lock:
+            self.discard(key)
+
+            if self._memory_bytes + size <= self._budget:
+                self._memory[key] = value
+                self._memory_bytes += size
+                return
+
+            safe_key = key.replace("/", "_")
+
+            if isinstance(value, np.ndarray):
+                path = os.path.join(self._spill_dir(), f"{safe_key}.npy")
+                np.save(path, value, allow_pickle=False)
+            else:
+                path = os.path.join(self._spill_dir(), f"{safe_key}.bin")
+                with open(path, "wb") as f:
+                    f.write(value)
+
+            self._spilled[key] = path
+            self._disk_bytes += size
+
+    def get(self, key):
+        """
+        Load an artifact.
+
+        Args:
+            key (str): Artifact key.
+
+        Returns:
+            np.ndarray | bytes | None: The artifact (spilled arrays are
+            read-only memory maps), or None if the key is unknown.
+        """
+        with self._lock:
+            if key in self._memory:
+                return self._memory[key]
+            path = self._spilled.get(key)
+
+        if path is None:
+            return None
+
+        if path.endswith(".npy"):
+            return np.load(path, mmap_mode="r", allow_pickle=False)
+
+        with open(path, "rb") as f:
+            return f.read()
+
+    def loader(self, key):
+        """Return a zero-argument callable that loads ``key`` on demand."""
+        return lambda: self.get(key)
+
+    def discard(self, key):
+        """Remove an artifact if present."""
+        value = self._memory.pop(key, None)
+        if value is not None:
+            self._memory_bytes -= self._nbytes(value)
+
+        path = self._spilled.pop(key, None)
+        if path is not None:
+            self._disk_bytes -= os.path.getsize(path) if os.path.exists(path) else 0
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def __contains__(self, key):
+        return key in self._memory or key in self._spilled
+
+    def __len__(self):
+        return len(self._memory) + len(self._spilled)
+
+    @property
+    def memory_bytes(self):
+        """Bytes currently held in process memory."""
+        return self._memory_bytes
+
+    @property
+    def disk_bytes(self):
+        """Approximate bytes spilled to disk."""
+        return self._disk_bytes
+
+    def close(self):
+        """Drop all artifacts and delete the spill directory."""
+        with self._lock:
+            self._memory.clear()
+            self._spilled.clear()
+            self._memory_bytes = 0
+            self._disk_bytes = 0
+
+            if self._finalizer is not None:
+                self._finalizer()
+                logger.info(f"Spill directory removed | path={self._dir}")
+
+            self._dir = None
+            self._finalizer = None
@@ -0,0 +1,226 @@
+import os
+import io
+import json
+import queue
+import tempfile
+import threading
+import weakref
+import zipfile
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from ..core.logger import get_logger
+from ..core.config import BATCH_SPILL_DIR, DB_CLASS_MAP
+
+# =========================
+# LOGGER
+# =========================
+logger = get_logger("batch.export")
+
+# Formats that are already compressed and gain nothing from DEFLATE
+_PRECOMPRESSED_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".zip", ".parquet")
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+class BackgroundZipExporter:
+    """
+    Build a ZIP archive on disk from a background thread as entries arrive.
+
+    Entries are queued with ``add`` (bytes or a zero-argument loader, so
+    data can be fetched lazily from a BatchArtifactStore) and written
+    incrementally to a temp file. Already-compressed formats are STORED,
+    everything else is DEFLATED. The file is deleted on ``close()``, when
+    the exporter is garbage collected or at interpreter exit.
+
+    Args:
+        prefix (str, optional): Temp file name prefix.
+        spill_dir (str, optional): Directory for the archive.
+            Defaults to BATCH_SPILL_DIR (system temp dir when None).
+    """
+
+    def __init__(self, prefix="batch_export_", spill_dir=BATCH_SPILL_DIR):
+        fd, self.path = tempfile.mkstemp(prefix=prefix, suffix=".zip", dir=spill_dir)
+        os.close(fd)
+
+        self.count = 0
+        self.error = None
+        self._queue = queue.Queue()
+        self._finished = False
+        self._done = threading.Event()
+        self._finalizer = weakref.finalize(self, _remove_file, self.path)
+
+        self._thread = threading.Thread(
+            target=self._run,
+            name="batch-zip-export",
+            daemon=True
+        )
+        self._thread.start()
+
+    def _run(self):
+        try:
+            with zipfile.ZipFile(self.path, "w", zipfile.ZIP_STORED) as zip_file:
+                while True:
+                    entry = self._queue.get()
+                    if entry is None:
+                        break
+
+                    name, data = entry
+                    if callable(data):
+                        data = data()
+                    if data is None:
+                        continue
+
+                    compress_type = (
+                        zipfile.ZIP_STORED
+                        if name.lower().endswith(_PRECOMPRESSED_EXTENSIONS)
+                        else zipfile.ZIP_DEFLATED
+                    )
+                    zip_file.writestr(name, data, compress_type=compress_type)
+                    self.count += 1
+
+            logger.info(f"ZIP export ready | entries={self.count} | path={self.path}")
+
+        except Exception as e:
+            self.error = str(e)
+            logger.error(f"ZIP export failed | error={str(e)}", exc_info=True)
+
+        finally:
+            self._done.set()
+
+    def add(self, name, data):
+        """
+        Queue an entry for the archive.
+
+        Args:
+            name (str): File name inside the archive.
+            data (bytes | Callable[[], bytes]): Entry content or a loader.
+        """
+        if self._finished:
+            raise RuntimeError("Exporter already finished")
+        self._queue.put((name, data))
+
+    def finish(self):
+        """Signal that no more entries will be added (idempotent)."""
+        if not self._finished:
+            self._finished = True
+            self._queue.put(None)
+
+    @property
+    def finished(self):
+        """Whether ``finish`` has been called."""
+        return self._finished
+
+    @property
+    def ready(self):
+        """Whether the archive is complete and can be served."""
+        return self._done.is_set() and self.error is None
+
+    def wait(self, timeout=None):
+        """Block until the archive is written; returns ``ready``."""
+        self._done.wait(timeout)
+        return self.ready
+
+    def close(self):
+        """Stop the writer and delete the archive."""
+        self.finish()
+        self._done.wait()
+        self._finalizer()
+
+# =========================
+# TABULAR EXPORTS
+# =========================
+# One row per image, one column per class (DB_CLASS_MAP keys)
+EXPORT_SCHEMA = pa.schema(
+    [
+        ("image", pa.string()),
+        ("image_hash", pa.string()),
+        ("model_version", pa.string()),
+        ("confidence_threshold", pa.float64()),
+        ("dominant_class", pa.string()),
+    ]
+    + [(f"{col}_percent", pa.float64()) for col in DB_CLASS_MAP]
+    + [("error", pa.string())]
+)
+
+def batch_record(item, conf_thres, model_version):
+    """
+    Flatten a batch result into one export row.
+
+    Args:
+        item (BatchItemResult): Processed (or failed) batch item.
+        conf_thres (float): Confidence threshold used for the batch.
+        model_version (str): Model version identifier.
+
+    Returns:
+        dict: Row keyed by the EXPORT_SCHEMA column names.
+    """
+    percentages = item.percentages or {}
+
+    record = {
+        "image": item.image,
+        "image_hash": item.image_hash,
+        "model_version": model_version,
+        "confidence_threshold": conf_thres,
+        "dominant_class": item.dominant,
+    }
+
+    for col, display_name in DB_CLASS_MAP.items():
+        record[f"{col}_percent"] = percentages.get(display_name)
+
+    record["error"] = item.error
+    return record
+
+def records_to_parquet(records):
+    """
+    Serialize export rows to Parquet.
+
+    Args:
+        records (list[dict]): Rows from ``batch_record``.
+
+    Returns:
+        bytes: Parquet file content.
+    """
+    table = pa.Table.from_pylist(records, schema=EXPORT_SCHEMA)
+
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer, compression="zstd")
+    return buffer.getvalue()
+
+class JsonLinesWriter:
+    """
+    Append export rows to a JSON Lines temp file as results arrive.
+
+    Each ``write`` is flushed, so the file can be served at any time and
+    never has to be assembled in memory. The file is deleted on ``close()``,
+    when the writer is garbage collected or at interpreter exit.
+
+    Args:
+        prefix (str, optional): Temp file name prefix.
+        spill_dir (str, optional): Directory for the file.
+            Defaults to BATCH_SPILL_DIR (system temp dir when None).
+    """
+
+    def __init__(self, prefix="batch_results_", spill_dir=BATCH_SPILL_DIR):
+        fd, self.path = tempfile.mkstemp(prefix=prefix, suffix=".jsonl", dir=spill_dir)
+        self._file = os.fdopen(fd, "w", encoding="utf-8")
+        self._lock = threading.Lock()
+        self._finalizer = weakref.finalize(self, _remove_file, self.path)
+        self.count = 0
+
+    def write(self, record):
+        """Append one row and flush it to disk."""
+        with self._lock:
+            self._file.write(json.dumps(record) + "\n")
+            self._file.flush()
+            self.count += 1
+
+    def close(self):
+        """Close and delete the file."""
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+        self._finalizer()
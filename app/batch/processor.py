@@ -1,135 +1,328 @@
-import cv2
-from typing import List
+import time
+import warnings
+from typing import Callable, Iterator, List, Optional, Tuple
 
 from ..core.logger import get_logger
 from ..core.preprocess import prepare_image_from_upload
 from ..core.inference import run_inference
-from ..core.postprocess import calculate_pixel_area, calculate_percentage
+from ..core.postprocess import (
+    calculate_pixel_area,
+    calculate_percentage,
+    extract_detections,
+    simplify_mask_polygons
+)
 from ..visualization.overlays import create_mask_overlay
-from .schema import BatchResult, BatchItemResult
+from .schema import BatchResult, BatchItemResult, BatchProgress
 
 # =========================
 # LOGGER
 # =========================
 logger = get_logger("batch.processor")
 
-def run_batch(
-    files: List,
+def _process_file(
+    idx,
+    file,
     model,
     conf_thres: float,
     visible_classes: list,
     max_width: int,
     max_height: int,
-):
+    lookup: Optional[Callable[[str], Optional[dict]]] = None,
+    vector_overlay: bool = False,
+) -> BatchItemResult:
     """
-    Process a batch of images: prepare, run inference, post-process, and create overlays.
+    Prepare, infer, post-process and overlay a single batch file.
+
+    If ``lookup`` returns stored percentages for the file's hash, inference
+    is skipped and the stored result is reused (no masks, so the overlay is
+    the original image).
 
     Args:
-        files (List): List of image files to process.
+        idx (int): 1-based position of the file in the batch (for logging).
+        file: Uploaded image file.
         model: Trained model for inference.
         conf_thres (float): Confidence threshold for detection.
         visible_classes (list): Classes to include in overlay visualization.
         max_width (int): Maximum image width for resizing.
         max_height (int): Maximum image height for resizing.
+        lookup (Callable[[str], dict | None], optional): Returns stored
+            percentages for an image hash, or None if not analysed yet.
+        vector_overlay (bool, optional): The overlay is drawn in the browser
+            from the polygons, so the raster overlay is skipped. Defaults to False.
 
     Returns:
-        BatchResult: Summary of batch processing with per-image results.
+        BatchItemResult: Successful result, or a result carrying the error message.
     """
-    total_files = len(files)
-    logger.info(f"Start batch processing | total_files={total_files} | conf={conf_thres}")
+    filename = getattr(file, "name", "unknown")
+    timings = {}
 
-    results = []
+    try:
+        # -------------------------
+        # Prepare image
+        # -------------------------
+        t0 = time.perf_counter()
+        image_bgr, _, safe_filename, image_hash = prepare_image_from_upload(
+            file, max_width, max_height
+        )
 
-    for idx, file in enumerate(files, start=1):
-        filename = getattr(file, "name", "unknown")
-        logger.info(f"[{idx}/{total_files}] Processing image | name={filename}")
+        if image_bgr is None:
+            logger.warning(f"[{idx}] Invalid image")
+            raise ValueError("Invalid image")
 
-        try:
-            # -------------------------
-            # Prepare image
-            # -------------------------
-            image_bgr, _, safe_filename, _ = prepare_image_from_upload(
-                file, max_width, max_height
-            )
+        # RGB view for display and overlays; the model gets the BGR frame
+        image_rgb = image_bgr[..., ::-1]
+        timings["prepare"] = time.perf_counter() - t0
 
-            if image_bgr is None:
-                logger.warning(f"[{idx}] Invalid image")
-                raise ValueError("Invalid image")
-
-            image_rgb = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB)
-
-            # -------------------------
-            # Run inference
-            # -------------------------
-            inference = run_inference(model, image_rgb, conf_thres)
-
-            if (
-                inference is None
-                or inference.masks is None
-                or len(inference.masks.data) == 0
-            ):
-                logger.warning(f"[{idx}] No detection")
-                raise ValueError("No detection")
-
-            masks = inference.masks.data.cpu().numpy()
-            classes = inference.boxes.cls.cpu().numpy()
-
-            # -------------------------
-            # Post-process
-            # -------------------------
-            percentages = calculate_percentage(
-                calculate_pixel_area(masks, classes)
-            )
-            dominant = max(percentages, key=percentages.get)
+        # -------------------------
+        # Reuse stored result
+        # -------------------------
+        stored = lookup(image_hash) if lookup is not None else None
+
+        if stored is not None:
+            logger.info(f"[{idx}] Already analysed | hash={image_hash}")
 
-            logger.info(
-                f"[{idx}] Detection success | dominant={dominant} | percentages={percentages}"
+            return BatchItemResult(
+                image=safe_filename,
+                image_rgb=image_rgb,
+                overlay=image_rgb,
+                percentages=stored,
+                dominant=max(stored, key=stored.get),
+                error=None,
+                saved=True,
+                image_hash=image_hash,
+                image_size=(image_rgb.shape[1], image_rgb.shape[0]),
+                stage_timings=timings,
+                from_history=True
             )
 
-            # -------------------------
-            # Create overlay
-            # -------------------------
+        # -------------------------
+        # Run inference
+        # -------------------------
+        t0 = time.perf_counter()
+        inference = run_inference(model, image_bgr, conf_thres)
+        timings["inference"] = time.perf_counter() - t0
+
+        if (
+            inference is None
+            or inference.masks is None
+            or len(inference.masks.data) == 0
+        ):
+            logger.warning(f"[{idx}] No detection")
+            raise ValueError("No detection")
+
+        # -------------------------
+        # Post-process
+        # -------------------------
+        t0 = time.perf_counter()
+        masks = inference.masks.data.cpu().numpy()
+        classes = inference.boxes.cls.cpu().numpy()
+
+        percentages = calculate_percentage(
+            calculate_pixel_area(masks, classes)
+        )
+        dominant = max(percentages, key=percentages.get)
+        polygons = simplify_mask_polygons(
+            getattr(inference.masks, "xy", None), classes
+        )
+
+        # Per-instance record for analytics (confidence/boxes when available)
+        confidences = getattr(inference.boxes, "conf", None)
+        boxes_xyxy = getattr(inference.boxes, "xyxy", None)
+        detections = extract_detections(
+            masks,
+            classes,
+            confidences=confidences.cpu().numpy() if confidences is not None else None,
+            boxes_xyxy=boxes_xyxy.cpu().numpy() if boxes_xyxy is not None else None
+        )
+        timings["postprocess"] = time.perf_counter() - t0
+
+        logger.info(
+            f"[{idx}] Detection success | dominant={dominant} | percentages={percentages}"
+        )
+
+        # -------------------------
+        # Create overlay
+        # -------------------------
+        overlay = None
+        if not vector_overlay:
+            t0 = time.perf_counter()
             overlay = create_mask_overlay(
                 image_rgb, masks, classes, visible_classes
             )
+            timings["overlay"] = time.perf_counter() - t0
 
-            results.append(
-                BatchItemResult(
-                    image=safe_filename,
-                    image_rgb=image_rgb,
-                    overlay=overlay,
-                    percentages=percentages,
-                    dominant=dominant,
-                    error=None
-                )
-            )
+        return BatchItemResult(
+            image=safe_filename,
+            image_rgb=image_rgb,
+            overlay=overlay,
+            percentages=percentages,
+            dominant=dominant,
+            error=None,
+            polygons=polygons,
+            detections=detections,
+            image_hash=image_hash,
+            image_size=(image_rgb.shape[1], image_rgb.shape[0]),
+            stage_timings=timings
+        )
+
+    except Exception as e:
+        logger.exception(
+            f"[{idx}] Processing failed | image={filename} | error={str(e)}"
+        )
+
+        return BatchItemResult(
+            image=filename,
+            image_rgb=None,
+            overlay=None,
+            percentages=None,
+            dominant=None,
+            error=str(e),
+            stage_timings=timings
+        )
 
-        except Exception as e:
-            logger.exception(
-                f"[{idx}] Processing failed | image={filename} | error={str(e)}"
+def iter_batch(
+    files: List,
+    model,
+    conf_thres: float,
+    visible_classes: list,
+    max_width: int,
+    max_height: int,
+    should_cancel: Optional[Callable[[], bool]] = None,
+    start_index: int = 1,
+    total: Optional[int] = None,
+    lookup: Optional[Callable[[str], Optional[dict]]] = None,
+    vector_overlay: bool = False,
+) -> Iterator[Tuple[BatchItemResult, BatchProgress]]:
+    """
+    Process a batch lazily, yielding each result as soon as it is finished.
+
+    The generator keeps no reference to earlier results, so callers that
+    release image arrays after rendering keep peak memory flat.
+
+    Args:
+        files (List): List of image files to process.
+        model: Trained model for inference.
+        conf_thres (float): Confidence threshold for detection.
+        visible_classes (list): Classes to include in overlay visualization.
+        max_width (int): Maximum image width for resizing.
+        max_height (int): Maximum image height for resizing.
+        should_cancel (Callable[[], bool], optional): Polled before each file;
+            returning True stops the batch cleanly. In Streamlit a widget
+            click reruns the script, which interrupts the loop before the
+            flag can be polled; the check then stops the resumed run.
+        start_index (int, optional): Index of the first file, used when
+            resuming a partially processed batch. Defaults to 1.
+        total (int, optional): Size of the whole batch when resuming.
+            Defaults to ``start_index - 1 + len(files)``.
+        lookup (Callable[[str], dict | None], optional): Pre-inference check
+            returning stored percentages for an image hash.
+        vector_overlay (bool, optional): Skip the raster overlay.
+            Defaults to False.
+
+    Yields:
+        tuple: (BatchItemResult, BatchProgress) for each processed file.
+    """
+    total = total if total is not None else start_index - 1 + len(files)
+    logger.info(
+        f"Start batch processing | total_files={total} | start={start_index} | conf={conf_thres}"
+    )
+
+    started = time.perf_counter()
+    completed = start_index - 1
+    processed = success = failed = 0
+    stage_totals = {}
+
+    try:
+        for idx, file in enumerate(files, start=start_index):
+            if should_cancel is not None and should_cancel():
+                logger.info(f"Batch cancelled | completed={completed}/{total}")
+                return
+
+            filename = getattr(file, "name", "unknown")
+            logger.info(f"[{idx}/{total}] Processing image | name={filename}")
+
+            item = _process_file(
+                idx, file, model, conf_thres, visible_classes, max_width, max_height,
+                lookup=lookup, vector_overlay=vector_overlay
             )
 
-            results.append(
-                BatchItemResult(
-                    image=filename,
-                    image_rgb=None,
-                    overlay=None,
-                    percentages=None,
-                    dominant=None,
-                    error=str(e)
-                )
+            completed += 1
+            processed += 1
+            if item.error is None:
+                success += 1
+            else:
+                failed += 1
+
+            for stage, seconds in item.stage_timings.items():
+                stage_totals[stage] = stage_totals.get(stage, 0.0) + seconds
+
+            yield item, BatchProgress(
+                completed=completed,
+                total=total,
+                success=success,
+                failed=failed,
+                processed=processed,
+                elapsed=time.perf_counter() - started,
+                stage_timings={
+                    stage: seconds / processed
+                    for stage, seconds in stage_totals.items()
+                }
             )
 
-    success = sum(1 for r in results if r.error is None)
-    failed = total_files - success
+    finally:
+        logger.info(
+            f"Batch finished | processed={processed} | success={success} | failed={failed} "
+            f"| elapsed={time.perf_counter() - started:.2f}s"
+        )
 
-    logger.info(
-        f"Batch finished | total={total_files} | success={success} | failed={failed}"
+def run_batch(
+    files: List,
+    model,
+    conf_thres: float,
+    visible_classes: list,
+    max_width: int,
+    max_height: int,
+    lookup: Optional[Callable[[str], Optional[dict]]] = None,
+):
+    """
+    Process a batch of images: prepare, run inference, post-process, and create overlays.
+
+    .. deprecated::
+        Holds every result, with its image arrays, until the batch ends.
+        Use ``iter_batch``, which streams results with progress and
+        cancellation; the app no longer calls this.
+
+    Args:
+        files (List): List of image files to process.
+        model: Trained model for inference.
+        conf_thres (float): Confidence threshold for detection.
+        visible_classes (list): Classes to include in overlay visualization.
+        max_width (int): Maximum image width for resizing.
+        max_height (int): Maximum image height for resizing.
+        lookup (Callable[[str], dict | None], optional): Pre-inference check
+            returning stored percentages for an image hash.
+
+    Returns:
+        BatchResult: Summary of batch processing with per-image results.
+    """
+    warnings.warn(
+        "run_batch is deprecated; use iter_batch to stream results",
+        DeprecationWarning,
+        stacklevel=2
     )
 
+    results = [
+        item for item, _ in iter_batch(
+            files, model, conf_thres, visible_classes, max_width, max_height,
+            lookup=lookup
+        )
+    ]
+
+    success = sum(1 for r in results if r.error is None)
+
     return BatchResult(
-        total_images=total_files,
+        total_images=len(files),
         success=success,
-        failed=failed,
+        failed=len(files) - success,
         results=results
     )
@@ -1,5 +1,5 @@
-from dataclasses import dataclass
-from typing import Optional, Dict
+from dataclasses import dataclass, field
+from typing import Optional, Dict, List, Tuple
 import numpy as np
 
 @dataclass
@@ -9,12 +9,26 @@ class BatchItemResult:
 
     Attributes:
         image (str): Original or saved image filename.
-        image_rgb (Optional[np.ndarray]): RGB image array.
-        overlay (Optional[np.ndarray]): Image overlay with detected masks.
+        image_rgb (Optional[np.ndarray]): RGB image array (a channel-reversed
+            view of the decoded BGR frame).
+        overlay (Optional[np.ndarray]): Image overlay with detected masks; None
+            when the vector overlay replaced it.
         percentages (Optional[Dict[str, float]]): Class-wise pixel percentage.
         dominant (Optional[str]): Dominant class in the image.
         error (Optional[str]): Error message if processing failed.
         saved (bool): Whether the result image was saved. Default is False.
+        polygons (Optional[List[dict]]): Simplified mask polygons for vector overlays.
+        detections (Optional[List[dict]]): Per-instance class, confidence,
+            pixel area and box (see ``extract_detections``).
+        image_hash (Optional[str]): SHA256 hash of the uploaded file content.
+        image_size (Optional[Tuple[int, int]]): (width, height) of the processed image.
+        stage_timings (Dict[str, float]): Seconds spent in each processing stage.
+        display (Optional[Dict[str, bytes]]): Display-encoded "image"/"overlay"
+            kept after the arrays are released.
+        artifacts (Optional[Dict[str, str]]): Keys of the full-resolution
+            "image" array and "overlay_png" bytes in a BatchArtifactStore.
+        from_history (bool): Whether the percentages were reused from a stored
+            analysis instead of running the model. Default is False.
     """
     image: str
     image_rgb: Optional[np.ndarray]
@@ -23,20 +37,69 @@ class BatchItemResult:
     dominant: Optional[str]
     error: Optional[str]
     saved: bool = False
+    polygons: Optional[List[dict]] = None
+    detections: Optional[List[dict]] = None
+    image_hash: Optional[str] = None
+    image_size: Optional[Tuple[int, int]] = None
+    stage_timings: Dict[str, float] = field(default_factory=dict)
+    display: Optional[Dict[str, bytes]] = None
+    artifacts: Optional[Dict[str, str]] = None
+    from_history: bool = False
+
+    def release_images(self):
+        """Drop the full-resolution image arrays once they are no longer needed."""
+        self.image_rgb = None
+        self.overlay = None
+
+@dataclass
+class BatchProgress:
+    """
+    Running progress of a streaming batch.
+
+    Attributes:
+        completed (int): Number of files processed so far.
+        total (int): Total number of files in the batch.
+        success (int): Number of successful results so far.
+        failed (int): Number of failed results so far.
+        processed (int): Files processed in this run; differs from
+            ``completed`` when a batch is resumed.
+        elapsed (float): Wall-clock seconds since this run started.
+        stage_timings (Dict[str, float]): Mean seconds per image for each stage.
+    """
+    completed: int
+    total: int
+    success: int
+    failed: int
+    processed: int
+    elapsed: float
+    stage_timings: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def fraction(self) -> float:
+        """Completed share of the batch (0.0-1.0)."""
+        return self.completed / self.total if self.total else 1.0
+
+    @property
+    def throughput(self) -> float:
+        """Images processed per second in this run."""
+        return self.processed / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> float:
+        """Estimated seconds remaining, from mean per-image stage timings."""
+        per_image = sum(self.stage_timings.values())
+        return max(self.total - self.completed, 0) * per_image
 
 @dataclass
 class BatchResult:
     """
-    Stores results for a single processed image.
+    Stores the summary and per-image results of a batch.
 
     Attributes:
-        image (str): Original or saved image filename.
-        image_rgb (Optional[np.ndarray]): RGB image array.
-        overlay (Optional[np.ndarray]): Image overlay with detected masks.
-        percentages (Optional[Dict[str, float]]): Class-wise pixel percentage.
-        dominant (Optional[str]): Dominant class in the image.
-        error (Optional[str]): Error message if processing failed.
-        saved (bool): Whether the result image was saved. Default is False.
+        total_images (int): Number of files submitted.
+        success (int): Number of successfully processed images.
+        failed (int): Number of failed images.
+        results (list[BatchItemResult]): Per-image results in input order.
     """
     total_images: int
     success: int
@@ -1,5 +1,6 @@
 from .config import *
 from .inference import *
+from .ingest import *
 from .model import *
 from .postprocess import *
 from .preprocess import *
@@ -11,13 +11,62 @@ RESULT_DIR.mkdir(exist_ok=True)
 CSV_PATH = RESULT_DIR / "analysis_history.csv"
 DB_PATH = RESULT_DIR / "analysis_history.db"
 
+# SQLite connection tuning
+DB_BUSY_TIMEOUT_MS = 5000  # wait this long for a competing writer before failing
+DB_CACHE_SIZE_MB = 16
+DB_MMAP_SIZE_MB = 128
+
+# History de-duplication
+HISTORY_DEDUP = False  # one row per (image_hash, model_version, confidence); re-saves update it
+REUSE_HISTORY_RESULTS = True  # skip inference for images already in history
+
+# Analytics engine for large history scans: "sqlite" or "duckdb" (optional dependency)
+ANALYTICS_ENGINE = "sqlite"
+ANALYTICS_DUCKDB_PATH = RESULT_DIR / "analysis_history.duckdb"  # columnar mirror of analysis_history
+
+# Cold storage: history older than this many days moves to month-partitioned Parquet
+ARCHIVE_AFTER_DAYS = None  # None keeps every record in SQLite
+ARCHIVE_DIR = RESULT_DIR / "archive"
+
+# Write-behind saves: one background thread commits UI saves in grouped transactions
+WRITE_BEHIND = True
+WRITE_BATCH_MAX = 256  # saves per transaction at most
+WRITE_BATCH_WAIT_MS = 20  # after the first queued save, wait this long for more
+WRITE_SYNCHRONOUS = "FULL"  # writer's PRAGMA synchronous; saves are acknowledged after commit
+WRITE_ACK_TIMEOUT_S = 2.0  # the UI reports a save as queued if not committed by then
+
+# Shared history read cache (app.db.cache), invalidated by PRAGMA data_version
+HISTORY_CACHE_ENTRIES = 128
+
+# Trends view: trailing rolling-average windows offered, in days
+TREND_ROLLING_DAYS = (7, 30)
+TREND_MAX_POINTS = 1500  # raw view: points per class sent to the chart (~its pixel width)
+
+# Batch artifact storage
+BATCH_MEMORY_BUDGET_MB = 256
+BATCH_SPILL_DIR = None  # None -> system temp directory
+
 # File upload limits
 MAX_FILE_SIZE_MB = 20
 MAX_IMAGE_WIDTH = 1280
 MAX_IMAGE_HEIGHT = 1280
+MAX_IMAGE_PIXELS = 64_000_000  # header-declared width * height (decompression bomb guard)
+INGEST_CHUNK_SIZE = 256 * 1024
+
+# Display image delivery
+DISPLAY_IMAGE_WIDTH = 720
+DISPLAY_IMAGE_FORMAT = "JPEG"  # JPEG or WEBP
+DISPLAY_IMAGE_QUALITY = 85
+DISPLAY_CACHE_MAX_MB = 64
+
+# Overlay rendering
+OVERLAY_MODES = ["Raster", "Vector"]
+VECTOR_SIMPLIFY_TOLERANCE = 1.5  # Douglas-Peucker epsilon in pixels
 
 # Model settings
 IMG_SIZE = 640
+MODEL_STRIDE = 32  # letterboxed input sides are padded to a multiple of this
+LETTERBOX_PAD_VALUE = 114
 MODEL_VERSION = "yolov8-finetuned-v1"
 IMAGE_SOURCE = "upload"
 
@@ -1,16 +1,59 @@
 import streamlit as st
+from ultralytics.engine.results import Results
 from .config import *
 from ..core.logger import get_logger
+from .preprocess import prepare_model_input
+from .postprocess import unletterbox_masks, unletterbox_boxes
 
 logger = get_logger("core.inference")
 
-def run_inference(model, image_rgb, conf_thres):
+def restore_source_frame(results, image, info):
+    """
+    Rebuild an ultralytics result in the coordinates of the source image.
+
+    Predictions made on a letterboxed tensor refer to the padded model
+    frame; masks and boxes are cropped and rescaled back so they line up
+    with ``image`` (and ``masks.xy`` is in source pixels).
+
+    Args:
+        results: ultralytics Results for the letterboxed input.
+        image (np.ndarray): Source BGR image the letterbox was built from.
+        info (LetterboxInfo): Geometry returned by ``letterbox``.
+
+    Returns:
+        Results: Result whose ``orig_img`` is ``image``.
+    """
+    boxes = masks = None
+
+    if results.boxes is not None:
+        boxes = unletterbox_boxes(results.boxes.data, info)
+    if results.masks is not None:
+        masks = unletterbox_masks(results.masks.data, info)
+
+    return Results(
+        orig_img=image,
+        path=results.path,
+        names=results.names,
+        boxes=boxes,
+        masks=masks,
+        speed=results.speed
+    )
+
+def run_inference(model, image_bgr, conf_thres):
     """
     Run YOLO segmentation inference on a single image.
 
+    The image is letterboxed to IMG_SIZE once and handed to the model as a
+    tensor, so ultralytics does not resize or copy it again. Masks and boxes
+    are returned in the coordinates of ``image_bgr``.
+
+    ``image_bgr`` is the prepared (display-sized) frame, not the decoded
+    upload: overlays and percentages need that frame anyway, and shrinking
+    it to IMG_SIZE costs less than a second resize of the full decode.
+
     Args:
         model: Trained YOLO model.
-        image_rgb: RGB image as a NumPy array.
+        image_bgr: BGR image as a NumPy array (as decoded by OpenCV).
         conf_thres: Confidence threshold for detections.
 
     Returns:
@@ -26,13 +69,18 @@ def run_inference(model, image_rgb, conf_thres):
                 logger.warning(f"class_id={k} -> {v}")
             run_inference._printed = True
 
+        tensor, info = prepare_model_input(image_bgr, IMG_SIZE)
+
+        # Transfer as uint8, normalize on the model device
+        tensor = tensor.to(model.device).float().div_(255)
+
         results = model.predict(
-            image_rgb,
+            tensor,
             conf=conf_thres,
-            imgsz=IMG_SIZE,
+            imgsz=info.input_shape,
             save=False
         )[0]
-        return results
+        return restore_source_frame(results, image_bgr, info)
 
     except Exception as e:
         st.error(f"Inference error: {e}")
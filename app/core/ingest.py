@@ -0,0 +1,206 @@
+import hashlib
+from dataclasses import dataclass
+from typing import Optional
+
+from .config import MAX_FILE_SIZE_MB, MAX_IMAGE_PIXELS, INGEST_CHUNK_SIZE
+
+# File signatures (magic bytes)
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_JPEG_SOI = b"\xff\xd8"
+
+# JPEG start-of-frame markers carrying the frame dimensions
+_JPEG_SOF_MARKERS = {
+    0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+    0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF
+}
+
+# JPEG markers without a length field
+_JPEG_STANDALONE_MARKERS = {0x01, 0xD0, 0xD1, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7, 0xD8}
+
+def read_image_header(data):
+    """
+    Read image format and dimensions from the file header without decoding.
+
+    Args:
+        data (bytes | memoryview): Leading bytes of the file (the whole file
+            is fine; only the header is inspected).
+
+    Returns:
+        tuple | None: (format, width, height) with format "JPEG" or "PNG",
+            or None if the header is unknown or incomplete.
+    """
+    data = memoryview(data)
+
+    # PNG: signature + IHDR chunk
+    if bytes(data[:8]) == _PNG_SIGNATURE:
+        if len(data) < 24 or bytes(data[12:16]) != b"IHDR":
+            return None
+        width = int.from_bytes(data[16:20], "big")
+        height = int.from_bytes(data[20:24], "big")
+        return "PNG", width, height
+
+    # JPEG: walk marker segments up to the first SOF
+    if bytes(data[:2]) == _JPEG_SOI:
+        i = 2
+        while i + 4 <= len(data):
+            if data[i] != 0xFF:
+                return None
+
+            marker = data[i + 1]
+
+            if marker == 0xFF:
+                # Fill byte
+                i += 1
+                continue
+
+            if marker in _JPEG_STANDALONE_MARKERS:
+                i += 2
+                continue
+
+            if marker in _JPEG_SOF_MARKERS:
+                if i + 9 > len(data):
+                    return None
+                height = int.from_bytes(data[i + 5:i + 7], "big")
+                width = int.from_bytes(data[i + 7:i + 9], "big")
+                return "JPEG", width, height
+
+            segment_length = int.from_bytes(data[i + 2:i + 4], "big")
+            i += 2 + segment_length
+
+    return None
+
+class IngestError(ValueError):
+    """Raised when an upload is rejected before decoding."""
+
+@dataclass
+class IngestedUpload:
+    """
+    An upload that passed ingest checks and is ready for decoding.
+
+    Attributes:
+        name (str): Original filename.
+        buffer (bytes | bytearray): Complete file content.
+        image_hash (str): SHA256 hash of the file content.
+        format (str): Sniffed image format ("JPEG" or "PNG").
+        width (int): Width from the image header.
+        height (int): Height from the image header.
+    """
+    name: str
+    buffer: bytes
+    image_hash: str
+    format: str
+    width: int
+    height: int
+
+    @property
+    def header(self):
+        """(format, width, height) tuple as returned by ``read_image_header``."""
+        return self.format, self.width, self.height
+
+def _iter_chunks(uploaded_file, chunk_size):
+    """
+    Yield the upload content in chunks, plus the buffer that holds it.
+
+    In-memory uploads (``getvalue``) are sliced without copying; streams
+    (``read``) are accumulated into one bytearray as they are read.
+    """
+    if hasattr(uploaded_file, "getvalue"):
+        data = uploaded_file.getvalue()
+        view = memoryview(data)
+        for start in range(0, len(view), chunk_size):
+            yield view[start:start + chunk_size], data
+        return
+
+    if hasattr(uploaded_file, "seek"):
+        uploaded_file.seek(0)
+
+    buffer = bytearray()
+    while True:
+        chunk = uploaded_file.read(chunk_size)
+        if not chunk:
+            return
+        buffer += chunk
+        yield memoryview(chunk), buffer
+
+def ingest_upload(
+    uploaded_file,
+    max_bytes=MAX_FILE_SIZE_MB * 1024 * 1024,
+    max_pixels=MAX_IMAGE_PIXELS,
+    chunk_size=INGEST_CHUNK_SIZE,
+):
+    """
+    Read an upload once: enforce size, sniff format and dimensions, and hash.
+
+    Non-images, oversized files and decompression bombs (small files that
+    declare huge pixel counts) are rejected from the first bytes, before
+    any decoding.
+
+    Args:
+        uploaded_file: File-like object from upload (``getvalue`` or ``read``).
+        max_bytes (int, optional): Maximum file size in bytes.
+        max_pixels (int, optional): Maximum width * height declared in the header.
+        chunk_size (int, optional): Read size in bytes.
+
+    Returns:
+        IngestedUpload: Buffer, hash and header information.
+
+    Raises:
+        IngestError: If the upload is rejected.
+    """
+    name = getattr(uploaded_file, "name", "unknown")
+
+    declared_size = getattr(uploaded_file, "size", None)
+    if isinstance(declared_size, int) and declared_size > max_bytes:
+        raise IngestError(
+            f"File '{name}' exceeds {max_bytes / (1024 * 1024):.0f} MB limit"
+        )
+
+    hasher = hashlib.sha256()
+    header: Optional[tuple] = None
+    head = bytearray()
+    total = 0
+    buffer = b""
+
+    for chunk, buffer in _iter_chunks(uploaded_file, chunk_size):
+        total += len(chunk)
+        if total > max_bytes:
+            raise IngestError(
+                f"File '{name}' exceeds {max_bytes / (1024 * 1024):.0f} MB limit"
+            )
+
+        hasher.update(chunk)
+
+        if header is not None:
+            continue
+
+        head += chunk
+
+        # Magic-byte sniffing: reject non-images from the first bytes
+        is_jpeg = bytes(head[:2]) == _JPEG_SOI
+        is_png = bytes(head[:8]) == _PNG_SIGNATURE
+        if len(head) >= 8 and not (is_jpeg or is_png):
+            raise IngestError(f"File '{name}' is not a JPEG or PNG image")
+
+        header = read_image_header(head)
+
+        if header is not None:
+            _, width, height = header
+            if width <= 0 or height <= 0:
+                raise IngestError(f"File '{name}' has invalid image dimensions")
+            if width * height > max_pixels:
+                raise IngestError(
+                    f"File '{name}' is too large to decode ({width}x{height} px)"
+                )
+            head = None
+
+    if header is None:
+        raise IngestError(f"File '{name}' is not a valid JPEG or PNG image")
+
+    return IngestedUpload(
+        name=name,
+        buffer=buffer,
+        image_hash=hasher.hexdigest(),
+        format=header[0],
+        width=header[1],
+        height=header[2],
+    )
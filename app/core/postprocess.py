@@ -1,4 +1,7 @@
-from .config import CLASS_NAMES
+import cv2
+import numpy as np
+import torch.nn.functional as F
+from .config import CLASS_NAMES, VECTOR_SIMPLIFY_TOLERANCE
 
 def threshold_label(conf):
     """
@@ -50,6 +53,45 @@ def calculate_pixel_area(masks, classes):
 
     return area_by_class
 
+def extract_detections(masks, classes, confidences=None, boxes_xyxy=None):
+    """
+    Describe each detected instance for storage alongside the aggregated result.
+
+    Args:
+        masks (np.ndarray): Segmentation masks of shape (N, H, W).
+        classes (np.ndarray): Class indices for each mask.
+        confidences (np.ndarray, optional): Detection confidence per instance.
+        boxes_xyxy (np.ndarray, optional): Boxes of shape (N, 4) in pixel
+            coordinates of the source frame.
+
+    Returns:
+        list[dict]: One entry per instance with keys "class" (display name),
+            "confidence" (float or None), "pixel_area" (int) and "bbox"
+            ([x1, y1, x2, y2] or None).
+    """
+    if masks.ndim != 3:
+        raise ValueError("Masks must have shape (N, H, W)")
+
+    if len(masks) != len(classes):
+        raise ValueError("Masks and classes length mismatch")
+
+    pixel_per_instance = masks.astype(bool).sum(axis=(1, 2))
+
+    detections = []
+
+    for i, (cls_id, pixel_count) in enumerate(zip(classes.astype(int), pixel_per_instance)):
+        detections.append({
+            "class": CLASS_NAMES[int(cls_id)],
+            "confidence": float(confidences[i]) if confidences is not None else None,
+            "pixel_area": int(pixel_count),
+            "bbox": (
+                [float(v) for v in boxes_xyxy[i][:4]]
+                if boxes_xyxy is not None else None
+            ),
+        })
+
+    return detections
+
 def calculate_percentage(pixel_count):
     """
     Convert pixel counts to class-wise percentages.
@@ -65,3 +107,96 @@ def calculate_percentage(pixel_count):
         k: (v / total * 100 if total > 0 else 0)
         for k, v in pixel_count.items()
     }
+
+def simplify_mask_polygons(polygons_xy, classes, tolerance=VECTOR_SIMPLIFY_TOLERANCE):
+    """
+    Simplify mask contours with Douglas-Peucker for client-side rendering.
+
+    Args:
+        polygons_xy (list[np.ndarray]): Contour per mask in pixel coordinates,
+            each of shape (K, 2) (e.g., ``results.masks.xy``).
+        classes (np.ndarray): Class indices for each mask.
+        tolerance (float, optional): Maximum distance in pixels between the
+            original and the simplified contour.
+
+    Returns:
+        list[dict]: One entry per drawable mask with keys
+            "class" (display name) and "points" (list of [x, y] ints).
+    """
+    if polygons_xy is None:
+        return []
+
+    if len(polygons_xy) != len(classes):
+        raise ValueError("Polygons and classes length mismatch")
+
+    simplified = []
+
+    for polygon, cls_id in zip(polygons_xy, classes.astype(int)):
+        contour = np.asarray(polygon, dtype=np.float32).reshape(-1, 1, 2)
+
+        if len(contour) < 3:
+            continue
+
+        approx = cv2.approxPolyDP(contour, tolerance, True).reshape(-1, 2)
+
+        if len(approx) < 3:
+            continue
+
+        simplified.append({
+            "class": CLASS_NAMES[int(cls_id)],
+            "points": np.rint(approx).astype(int).tolist()
+        })
+
+    return simplified
+
+def unletterbox_masks(masks, info):
+    """
+    Map instance masks from the letterboxed model frame back to the source frame.
+
+    Args:
+        masks (torch.Tensor): Masks in model-input resolution, shape (N, H', W').
+        info (LetterboxInfo): Geometry returned by ``letterbox``.
+
+    Returns:
+        torch.Tensor: Masks of shape (N, H, W) in the source frame, same dtype
+            and device as the input.
+    """
+    h, w = info.source_shape
+
+    if masks.shape[0] == 0:
+        return masks.new_zeros((0, h, w))
+
+    left, top = info.pad
+    content_h, content_w = info.content_shape
+    cropped = masks[:, top:top + content_h, left:left + content_w]
+
+    if cropped.shape[1:] == (h, w):
+        return cropped.contiguous()
+
+    resized = F.interpolate(
+        cropped[None].float(),
+        size=(h, w),
+        mode="bilinear",
+        align_corners=False
+    )[0]
+    return (resized > 0.5).to(masks.dtype)
+
+def unletterbox_boxes(boxes, info):
+    """
+    Map box rows (xyxy first) from the letterboxed model frame back to the source frame.
+
+    Args:
+        boxes (torch.Tensor): Box data of shape (N, 4 + K); extra columns
+            (confidence, class, ...) are kept unchanged.
+        info (LetterboxInfo): Geometry returned by ``letterbox``.
+
+    Returns:
+        torch.Tensor: Copy of ``boxes`` with xyxy in source pixel coordinates.
+    """
+    left, top = info.pad
+    h, w = info.source_shape
+
+    boxes = boxes.clone()
+    boxes[:, [0, 2]] = ((boxes[:, [0, 2]] - left) / info.scale).clamp(0, w)
+    boxes[:, [1, 3]] = ((boxes[:, [1, 3]] - top) / info.scale).clamp(0, h)
+    return boxes
@@ -1,8 +1,11 @@
 import re
 import cv2
+import torch
 import hashlib
 import numpy as np
+from dataclasses import dataclass
 from .config import *
+from .ingest import ingest_upload
 
 def hex_to_rgb(hex_color: str):
     """
@@ -64,9 +67,50 @@ def compute_image_hash(image_bytes):
     """
     return hashlib.sha256(image_bytes).hexdigest()
 
+# DCT-domain downscale factors available to cv2.imdecode, largest first
+_REDUCED_DECODE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+def select_decode_flag(header, max_w, max_h):
+    """
+    Choose the cheapest cv2.imdecode mode that still covers the target size.
+
+    For JPEG, picks the largest IMREAD_REDUCED_COLOR_* factor whose output
+    stays at or above the size ``resize_image_keep_ratio`` would produce, so
+    the final resize only ever shrinks. Other formats decode at full size.
+
+    Args:
+        header (tuple | None): Result of ``read_image_header``.
+        max_w (int): Maximum width after resizing.
+        max_h (int): Maximum height after resizing.
+
+    Returns:
+        int: cv2.IMREAD_* flag.
+    """
+    if header is None or header[0] != "JPEG":
+        return cv2.IMREAD_COLOR
+
+    _, w, h = header
+    if w <= 0 or h <= 0:
+        return cv2.IMREAD_COLOR
+
+    scale = min(max_w / w, max_h / h, 1.0)
+
+    for factor, flag in _REDUCED_DECODE_FLAGS:
+        if factor * scale <= 1.0:
+            return flag
+
+    return cv2.IMREAD_COLOR
+
 def prepare_image_from_upload(uploaded_file, max_width, max_height):
     """
-    Read an uploaded file, resize, and return image and metadata.
+    Ingest an uploaded file, decode and resize it, and return image and metadata.
+
+    The upload is read once by ``ingest_upload`` (size check, format and
+    dimension sniffing, hashing); rejected files raise before decoding.
 
     Args:
         uploaded_file: File-like object from upload.
@@ -79,22 +123,150 @@ def prepare_image_from_upload(uploaded_file, max_width, max_height):
             file_bytes (bytes | None): Raw file bytes.
             safe_filename (str | None): Sanitized filename.
             image_hash (str | None): SHA256 hash of file content.
+
+    Raises:
+        IngestError: If the upload is not an acceptable image.
     """   
-    file_bytes = uploaded_file.getvalue()
+    upload = ingest_upload(uploaded_file)
+
+    # Large JPEGs are downscaled during decode (DCT domain), not after
+    decode_flag = select_decode_flag(upload.header, max_width, max_height)
 
     image_bgr = cv2.imdecode(
-        np.frombuffer(file_bytes, np.uint8),
-        cv2.IMREAD_COLOR
+        np.frombuffer(upload.buffer, np.uint8),
+        decode_flag
     )
 
     if image_bgr is None:
         return None, None, None, None
 
-    # Sanitize filename and compute hash
-    safe_filename = sanitize_filename(uploaded_file.name)
-    image_hash = compute_image_hash(file_bytes)
+    file_bytes = upload.buffer
+    safe_filename = sanitize_filename(upload.name)
+    image_hash = upload.image_hash
 
     # Resize keeping aspect ratio
     image_bgr = resize_image_keep_ratio(image_bgr, max_width, max_height)
 
     return image_bgr, file_bytes, safe_filename, image_hash
+
+# =========================
+# MODEL INPUT
+# =========================
+@dataclass(frozen=True)
+class LetterboxInfo:
+    """
+    Geometry of a letterboxed model input relative to its source frame.
+
+    Attributes:
+        scale (float): Resize factor applied to the source frame.
+        pad (tuple[int, int]): (left, top) padding in pixels.
+        source_shape (tuple[int, int]): (height, width) of the source frame.
+        input_shape (tuple[int, int]): (height, width) of the padded model input.
+    """
+    scale: float
+    pad: tuple
+    source_shape: tuple
+    input_shape: tuple
+
+    @property
+    def content_shape(self):
+        """(height, width) of the resized frame inside the padding."""
+        h, w = self.source_shape
+        return int(round(h * self.scale)), int(round(w * self.scale))
+
+def letterbox(image, new_size=IMG_SIZE, stride=MODEL_STRIDE, pad_value=LETTERBOX_PAD_VALUE):
+    """
+    Resize an image so its longest side is ``new_size`` and pad it to a stride multiple.
+
+    Uses minimal (rectangular) padding, matching what ultralytics does for
+    NumPy inputs, so the model sees the same geometry in a single resize.
+
+    Args:
+        image (np.ndarray): Image array, shape (H, W, 3).
+        new_size (int, optional): Target length of the longest side. Defaults to IMG_SIZE.
+        stride (int, optional): Padded sides are rounded up to a multiple of this.
+            Defaults to MODEL_STRIDE.
+        pad_value (int, optional): Gray level of the padding. Defaults to LETTERBOX_PAD_VALUE.
+
+    Returns:
+        tuple:
+            padded (np.ndarray): Letterboxed image, shape (H', W', 3).
+            info (LetterboxInfo): Geometry needed to map results back.
+    """
+    h, w = image.shape[:2]
+
+    scale = min(new_size / h, new_size / w)
+    new_w = int(round(w * scale))
+    new_h = int(round(h * scale))
+
+    input_w = int(np.ceil(new_w / stride) * stride)
+    input_h = int(np.ceil(new_h / stride) * stride)
+    left = (input_w - new_w) // 2
+    top = (input_h - new_h) // 2
+
+    if (new_w, new_h) != (w, h):
+        interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+        image = cv2.resize(image, (new_w, new_h), interpolation=interpolation)
+
+    padded = cv2.copyMakeBorder(
+        image,
+        top, input_h - new_h - top,
+        left, input_w - new_w - left,
+        cv2.BORDER_CONSTANT,
+        value=(pad_value, pad_value, pad_value)
+    )
+
+    info = LetterboxInfo(
+        scale=scale,
+        pad=(left, top),
+        source_shape=(h, w),
+        input_shape=(input_h, input_w)
+    )
+    return padded, info
+
+def to_model_tensor(images_bgr):
+    """
+    Stack letterboxed BGR frames into one contiguous uint8 RGB tensor.
+
+    The BGR -> RGB flip and HWC -> CHW transpose are strided views written
+    straight into the batch buffer (one copy per image) and ``torch.from_numpy`` shares that buffer, so no
+    further host copies are made. Normalization to 0-1 is left to the
+    device, after the (4x smaller) uint8 transfer.
+
+    Args:
+        images_bgr (list[np.ndarray]): Letterboxed BGR images of equal shape (H, W, 3).
+
+    Returns:
+        torch.Tensor: uint8 RGB tensor of shape (N, 3, H, W).
+    """
+    if len(images_bgr) == 0:
+        raise ValueError("No images to convert")
+
+    shape = images_bgr[0].shape
+    if any(image.shape != shape for image in images_bgr):
+        raise ValueError("Images in a batch must share one shape")
+
+    batch = np.empty((len(images_bgr), 3, shape[0], shape[1]), dtype=np.uint8)
+    for i, image in enumerate(images_bgr):
+        batch[i] = image[..., ::-1].transpose(2, 0, 1)
+
+    return torch.from_numpy(batch)
+
+def prepare_model_input(image_bgr, img_size=IMG_SIZE):
+    """
+    Build the model input for one image in a single resize.
+
+    Called with the prepared frame from ``prepare_image_from_upload``, so
+    the model input is resized from that frame rather than the decode.
+
+    Args:
+        image_bgr (np.ndarray): Image in BGR format, shape (H, W, 3).
+        img_size (int, optional): Model input size. Defaults to IMG_SIZE.
+
+    Returns:
+        tuple:
+            tensor (torch.Tensor): uint8 tensor of shape (1, 3, H', W').
+            info (LetterboxInfo): Geometry needed to map results back.
+    """
+    padded, info = letterbox(image_bgr, img_size)
+    return to_model_tensor([padded]), info
@@ -1,2 +1,9 @@
+from .archive import *
+from .cache import *
+from .connection import *
 from .database import *
+from .detections import *
+from .migrations import *
+from .rollup import *
 from .schema import *
+from .writer import *
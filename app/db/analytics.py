@@ -0,0 +1,281 @@
+"""
+Analytics query layer for large history scans.
+
+history_frame, history_bucket_sums and history_totals return the same
+results whichever engine serves them:
+
+- "sqlite": SQL against analysis_history through the shared connection;
+  totals come from the rollups (app.db.rollup).
+- "duckdb": vectorized columnar queries on a DuckDB mirror of the table
+  (app.db.duckdb_mirror), for histories in the millions of rows; buckets
+  are a GROUP BY time_bucket(...) over the mirror.
+
+The engine comes from ANALYTICS_ENGINE; "duckdb" falls back to "sqlite"
+with a warning when the optional duckdb package is not installed.
+
+Every query includes the Parquet archive (app.db.archive): DuckDB scans
+the archived files in the same query, the sqlite engine aggregates them
+with pyarrow and pandas.
+"""
+import importlib.util
+import uuid
+from datetime import timedelta
+
+import pandas as pd
+
+from ..core.config import DB_PATH, ANALYTICS_ENGINE, ANALYTICS_DUCKDB_PATH
+from ..core.logger import get_logger
+from .archive import archived_paths, read_archived
+from .connection import get_connection
+from .database import HISTORY_COLUMNS
+from .rollup import load_history_summary
+from .queries import (
+    ANALYTICS_BUCKETS,
+    ROLLUP_CLASS_COLUMNS,
+    SELECT_HISTORY_RANGE,
+    SELECT_HISTORY_BUCKETS,
+    CHANGE_LOG_SCHEMA,
+    DROP_CHANGE_LOG,
+    INSERT_CHANGE_LOG_TOKEN,
+)
+
+logger = get_logger("db.analytics")
+
+ANALYTICS_ENGINES = ("sqlite", "duckdb")
+
+# Bucket frequencies of history_bucket_sums (DuckDB interval units)
+ANALYTICS_FREQS = tuple(ANALYTICS_BUCKETS)
+
+PERCENT_COLUMNS = [f"{col}_percent" for col in ROLLUP_CLASS_COLUMNS]
+
+# history_bucket_sums columns after "bucket"
+BUCKET_SUM_COLUMNS = ["samples"] + [
+    f"{col}_{stat}" for col in PERCENT_COLUMNS for stat in ("sum", "count")
+]
+_SUMS = [c for c in BUCKET_SUM_COLUMNS if c.endswith("_sum")]
+_COUNTS = [c for c in BUCKET_SUM_COLUMNS if not c.endswith("_sum")]
+
+# Text bounds covering every stored datetime, valid for both engines
+_MIN_BOUND = "0001-01-01"
+_MAX_BOUND = "9999-12-31"
+
+_fallback_logged = False
+
+def get_engine():
+    """
+    Resolve the configured analytics engine.
+
+    Returns:
+        str: "sqlite" or "duckdb".
+
+    Raises:
+        ValueError: If ANALYTICS_ENGINE is not a known engine.
+    """
+    global _fallback_logged
+
+    if ANALYTICS_ENGINE not in ANALYTICS_ENGINES:
+        raise ValueError(f"Unknown analytics engine: {ANALYTICS_ENGINE!r}")
+
+    if ANALYTICS_ENGINE == "duckdb" and importlib.util.find_spec("duckdb") is None:
+        if not _fallback_logged:
+            logger.warning("duckdb is not installed | analytics engine falls back to sqlite")
+            _fallback_logged = True
+        return "sqlite"
+
+    return ANALYTICS_ENGINE
+
+def apply_analytics_policy():
+    """
+    Install (or remove) the change log that keeps the DuckDB mirror current.
+
+    The log and its triggers exist only while the duckdb engine is active,
+    so the sqlite engine pays nothing on writes.
+    """
+    with get_connection(DB_PATH) as conn:
+        if get_engine() == "duckdb":
+            for statement in CHANGE_LOG_SCHEMA:
+                conn.execute(statement)
+            conn.execute(INSERT_CHANGE_LOG_TOKEN, (uuid.uuid4().hex,))
+        else:
+            for statement in DROP_CHANGE_LOG:
+                conn.execute(statement)
+
+def _mirror():
+    from .duckdb_mirror import get_mirror
+    return get_mirror(DB_PATH, ANALYTICS_DUCKDB_PATH)
+
+def _bounds(start_date, end_date):
+    """Half-open text bounds for inclusive dates; None leaves that side open."""
+    return (
+        start_date.isoformat() if start_date else _MIN_BOUND,
+        (end_date + timedelta(days=1)).isoformat() if end_date else _MAX_BOUND,
+    )
+
+def _columns(columns):
+    columns = list(columns or HISTORY_COLUMNS)
+
+    unknown = set(columns) - set(HISTORY_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown history columns: {sorted(unknown)}")
+
+    if "datetime" not in columns:
+        columns.insert(0, "datetime")
+
+    return columns
+
+def _normalize(df):
+    """Give numeric columns float dtype so all-NULL columns match across engines."""
+    numeric = [c for c in df.columns if c.endswith("_percent") or c == "confidence"]
+    df[numeric] = df[numeric].astype("float64")
+    return df
+
+def history_frame(start_date=None, end_date=None, columns=None):
+    """
+    Load records between two dates (inclusive) in (datetime, id) order,
+    including archived records whose partitions overlap the range.
+
+    Args:
+        start_date (date, optional): First day; open if None.
+        end_date (date, optional): Last day; open if None.
+        columns (list[str], optional): Columns from HISTORY_COLUMNS
+            ("datetime" is always included). Defaults to all.
+
+    Returns:
+        pd.DataFrame: Matching records, with "datetime" as datetime64.
+    """
+    params = _bounds(start_date, end_date)
+    columns = _columns(columns)
+
+    if get_engine() == "duckdb":
+        from .duckdb_mirror import SELECT_RANGE
+        df = _mirror().query(SELECT_RANGE.format(columns=", ".join(columns)), params)
+    else:
+        df = pd.read_sql_query(
+            SELECT_HISTORY_RANGE.format(columns=", ".join(columns)),
+            get_connection(DB_PATH),
+            params=params
+        )
+
+    df["datetime"] = pd.to_datetime(df["datetime"])
+
+    archived = read_archived(get_connection(DB_PATH), *params, columns)
+    if not archived.empty:
+        archived["datetime"] = pd.to_datetime(archived["datetime"])
+        # Archived ids are lower than every hot id, so a stable sort on
+        # datetime keeps (datetime, id) order
+        df = pd.concat([archived, df], ignore_index=True) if not df.empty else archived
+        df = df.sort_values("datetime", kind="stable", ignore_index=True)
+
+    return _normalize(df)
+
+def _floor(ts, freq):
+    """Start of the bucket of each datetime, as the SQL bucket expressions."""
+    if freq == "week":
+        return ts.dt.floor("D") - pd.to_timedelta(ts.dt.dayofweek, unit="D")
+    if freq == "month":
+        return ts.dt.floor("D") - pd.to_timedelta(ts.dt.day - 1, unit="D")
+    return ts.dt.floor("h" if freq == "hour" else "D")
+
+def _typed_sums(df):
+    """Shared dtypes, so all-NULL sums and empty results match across engines."""
+    df["bucket"] = pd.to_datetime(df["bucket"])
+    df[_SUMS] = df[_SUMS].astype("float64")
+    df[_COUNTS] = df[_COUNTS].astype("int64")
+    return df
+
+def _archived_bucket_sums(conn, freq, params):
+    """Bucket sums of the archived records in range, for the sqlite engine."""
+    archived = read_archived(conn, *params, ["datetime", *PERCENT_COLUMNS])
+    if archived.empty:
+        return archived
+
+    values = archived[PERCENT_COLUMNS].astype("float64")
+    grouped = values.groupby(_floor(pd.to_datetime(archived["datetime"]), freq).rename("bucket"))
+
+    sums = pd.concat(
+        [grouped.sum(min_count=1).add_suffix("_sum"), grouped.count().add_suffix("_count")],
+        axis=1,
+    )
+    sums["samples"] = grouped.size()
+    return sums.reset_index()[["bucket", *BUCKET_SUM_COLUMNS]]
+
+def history_bucket_sums(freq, start_date=None, end_date=None):
+    """
+    Per-bucket record counts, class percentage sums and non-missing counts
+    between two dates (inclusive), archived records included.
+
+    The engine does the GROUP BY, so only one row per bucket leaves it.
+    Buckets start on the hour, day, Monday or first of the month; means
+    are ``<class>_percent_sum / <class>_percent_count``, which skips
+    missing percentages (see visualization.timeseries.bucket_means).
+
+    Args:
+        freq (str): One of ANALYTICS_FREQS.
+        start_date (date, optional): First day; open if None.
+        end_date (date, optional): Last day; open if None.
+
+    Returns:
+        pd.DataFrame: Columns bucket (datetime64), samples and, per class,
+            <class>_percent_sum and <class>_percent_count; one row per
+            non-empty bucket in time order.
+
+    Raises:
+        ValueError: If freq is not a known frequency.
+    """
+    if freq not in ANALYTICS_FREQS:
+        raise ValueError(f"Unknown bucket frequency: {freq!r}")
+
+    params = _bounds(start_date, end_date)
+    conn = get_connection(DB_PATH)
+
+    if get_engine() == "duckdb":
+        from .duckdb_mirror import SELECT_BUCKETS, history_relation
+        source = history_relation(archived_paths(conn, *params))
+        df = _mirror().query(SELECT_BUCKETS.format(freq=freq, source=source), params)
+    else:
+        df = pd.read_sql_query(
+            SELECT_HISTORY_BUCKETS.format(bucket=ANALYTICS_BUCKETS[freq].format(ts="datetime")),
+            conn,
+            params=params
+        )
+        df = _typed_sums(df)
+
+        archived = _archived_bucket_sums(conn, freq, params)
+        if not archived.empty:
+            archived = _typed_sums(archived)
+            if not df.empty:
+                # Buckets straddling the archive cutoff hold hot and archived records
+                archived = pd.concat([df, archived], ignore_index=True)
+                archived = archived.groupby("bucket", as_index=False).sum(min_count=1)
+            df = archived
+
+    return _typed_sums(df)[["bucket", *BUCKET_SUM_COLUMNS]].reset_index(drop=True)
+
+def history_totals():
+    """
+    Headline history metrics, archived records included.
+
+    The sqlite engine reads the daily rollup (app.db.rollup); the duckdb
+    engine aggregates the mirror and the archived files in one query.
+
+    Returns:
+        dict: ``total_images`` (int), ``latest`` (str or None, datetime of
+            the newest record) and ``class_sums`` (class key -> summed
+            percentage, keys as in DB_CLASS_MAP).
+    """
+    if get_engine() != "duckdb":
+        return load_history_summary()
+
+    from .duckdb_mirror import SELECT_TOTALS, history_relation
+    source = history_relation(
+        archived_paths(get_connection(DB_PATH), _MIN_BOUND, _MAX_BOUND)
+    )
+    row = _mirror().query(SELECT_TOTALS.format(source=source)).iloc[0]
+
+    return {
+        "total_images": int(row["total_images"]),
+        "latest": None if pd.isna(row["latest"]) else row["latest"],
+        "class_sums": {
+            col: 0.0 if pd.isna(row[col]) else float(row[col]) for col in ROLLUP_CLASS_COLUMNS
+        },
+    }
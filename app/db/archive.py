@@ -0,0 +1,518 @@
+"""
+Cold storage for old history in month-partitioned Parquet files.
+
+Records older than ARCHIVE_AFTER_DAYS move out of analysis_history into
+``ARCHIVE_DIR/<kind>/month=YYYY-MM/part-*.parquet`` (kind is "history" or
+"detections"), keeping the hot table small for writes and page loads.
+
+Each month is archived in one transaction: the Parquet files are written
+first, then their catalog rows (history_archive) are inserted and the hot
+rows deleted. Readers only trust the catalog, so a file left behind by a
+failed run is never read. Archived records stay in the daily and weekly
+rollups, and the history readers in app.db.database and app.db.analytics
+merge in the catalogued files that overlap the requested range.
+clear_history and undo_last_save remove archived records as well.
+
+Usage:
+    python -m app.db.archive --older-than 365
+"""
+import argparse
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from ..core.config import DB_PATH, ARCHIVE_AFTER_DAYS, ARCHIVE_DIR
+from ..core.logger import get_logger
+from .connection import get_connection
+from .queries import (
+    ROLLUP_PERIODS,
+    ROLLUP_CLASS_COLUMNS,
+    CREATE_ARCHIVE_CATALOG,
+    INSERT_ARCHIVE_FILE,
+    SELECT_ARCHIVE_FILES,
+    SELECT_ARCHIVE_BOUNDS,
+    SELECT_ARCHIVE_MONTHS,
+    SELECT_ARCHIVE_ROWS,
+    SELECT_ARCHIVE_DETECTIONS,
+    SELECT_ALL_ARCHIVE_FILES,
+    DELETE_ARCHIVE_FILE,
+    DELETE_ARCHIVE_CATALOG,
+    DELETE_ARCHIVED_ROWS,
+    rollup_merge,
+    rollup_subtract,
+)
+
+logger = get_logger("db.archive")
+
+# Parquet schemas; history columns match HISTORY_COLUMNS
+HISTORY_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("datetime", pa.string()),
+    ("image", pa.string()),
+    ("image_hash", pa.string()),
+    ("source", pa.string()),
+    ("model_version", pa.string()),
+    ("confidence", pa.float64()),
+    *[(f"{col}_percent", pa.float64()) for col in ROLLUP_CLASS_COLUMNS],
+    ("batch_id", pa.string()),
+])
+
+DETECTION_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("analysis_id", pa.int64()),
+    ("class", pa.string()),
+    ("confidence", pa.float64()),
+    ("pixel_area", pa.int64()),
+    ("x1", pa.float64()),
+    ("y1", pa.float64()),
+    ("x2", pa.float64()),
+    ("y2", pa.float64()),
+    ("analysis_datetime", pa.string()),
+])
+
+ARCHIVE_SCHEMAS = {"history": HISTORY_SCHEMA, "detections": DETECTION_SCHEMA}
+
+# Text bounds covering every stored datetime
+_MIN_BOUND = "0001-01-01"
+_MAX_BOUND = "9999-12-31"
+
+def install_archive(conn):
+    """
+    Create the archive catalog on ``conn`` if missing.
+
+    Args:
+        conn (sqlite3.Connection): Open connection to the history database.
+    """
+    conn.execute(CREATE_ARCHIVE_CATALOG)
+
+def _has_catalog(conn):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'history_archive'"
+    ).fetchone() is not None
+
+def _catalog_files(conn, kind, start, end):
+    """Catalog rows (path, rows, min, max) of ``kind`` overlapping [start, end)."""
+    if not _has_catalog(conn):
+        return []
+    return conn.execute(SELECT_ARCHIVE_FILES, (kind, start, end)).fetchall()
+
+def _dataset(kind, files):
+    return ds.dataset(
+        [os.fspath(ARCHIVE_DIR / path) for path, *_ in files],
+        format="parquet",
+        schema=ARCHIVE_SCHEMAS[kind],
+    )
+
+def _range_filter(column, start, end):
+    return (ds.field(column) >= start) & (ds.field(column) < end)
+
+# =========================
+# Archiving
+# =========================
+def _month_end(month):
+    """First day of the month after ``month`` ("YYYY-MM"), as text."""
+    year, number = map(int, month.split("-"))
+    return f"{year + number // 12:04d}-{number % 12 + 1:02d}-01"
+
+def _write_part(kind, month, frame, stamp):
+    """Write one Parquet file atomically; returns its path relative to ARCHIVE_DIR."""
+    relative = f"{kind}/month={month}/part-{stamp}-{uuid.uuid4().hex[:8]}.parquet"
+    target = ARCHIVE_DIR / relative
+    target.parent.mkdir(parents=True, exist_ok=True)
+
+    table = pa.Table.from_pandas(frame, schema=ARCHIVE_SCHEMAS[kind], preserve_index=False)
+    tmp = target.with_name(target.name + ".tmp")
+    pq.write_table(table, tmp)
+    os.replace(tmp, target)
+
+    return relative
+
+def _archive_month(conn, month, start, end, stamp, created_at):
+    """Move the hot records in [start, end) to Parquet; returns (rows, detections)."""
+    written = []
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        rows = pd.read_sql_query(
+            SELECT_ARCHIVE_ROWS.format(columns=", ".join(HISTORY_SCHEMA.names)),
+            conn,
+            params=(start, end),
+        )
+        detections = pd.read_sql_query(
+            SELECT_ARCHIVE_DETECTIONS.format(
+                columns=", ".join(f"d.{name}" for name in DETECTION_SCHEMA.names[:-1])
+            ),
+            conn,
+            params=(start, end),
+        )
+
+        for kind, frame, column in (
+            ("history", rows, "datetime"),
+            ("detections", detections, "analysis_datetime"),
+        ):
+            if frame.empty:
+                continue
+            path = _write_part(kind, month, frame, stamp)
+            written.append(path)
+            conn.execute(INSERT_ARCHIVE_FILE, (
+                path, kind, month, len(frame),
+                frame[column].min(), frame[column].max(), created_at,
+            ))
+
+        # Add the rows to the rollups once more, so the delete triggers
+        # leave them counted
+        for period in ROLLUP_PERIODS:
+            conn.execute(rollup_merge(period), (start, end))
+
+        # Detections go with their analyses (ON DELETE CASCADE)
+        conn.execute(DELETE_ARCHIVED_ROWS, (start, end))
+        conn.commit()
+
+    except Exception:
+        conn.rollback()
+        for path in written:
+            (ARCHIVE_DIR / path).unlink(missing_ok=True)
+        raise
+
+    return len(rows), len(detections)
+
+def archive_history(older_than_days, now=None):
+    """
+    Move records older than ``older_than_days`` to month-partitioned Parquet.
+
+    Each month is moved in its own transaction, so writers are blocked for
+    at most one month's worth of rows at a time.
+
+    Args:
+        older_than_days (int): Age in days after which a record is archived.
+        now (datetime, optional): Reference time. Defaults to the current time.
+
+    Returns:
+        dict: ``rows`` and ``detections`` archived, and the ``months``
+            ("YYYY-MM") that received files.
+    """
+    now = now or datetime.now()
+    cutoff = (now - timedelta(days=older_than_days)).strftime("%Y-%m-%d %H:%M:%S")
+    stamp = now.strftime("%Y%m%dT%H%M%S")
+    created_at = now.strftime("%Y-%m-%d %H:%M:%S")
+
+    conn = get_connection(DB_PATH)
+    months = [row[0] for row in conn.execute(SELECT_ARCHIVE_MONTHS, (cutoff,))]
+    result = {"rows": 0, "detections": 0, "months": months}
+
+    for month in months:
+        start = f"{month}-01"
+        end = min(_month_end(month), cutoff)
+
+        rows, detections = _archive_month(conn, month, start, end, stamp, created_at)
+        result["rows"] += rows
+        result["detections"] += detections
+
+        logger.info(f"History archived | month={month} | rows={rows} | detections={detections}")
+
+    logger.info(f"Archive complete | cutoff={cutoff} | rows={result['rows']}")
+    return result
+
+def apply_retention_policy():
+    """
+    Archive records older than ARCHIVE_AFTER_DAYS, if it is set.
+
+    Returns:
+        dict | None: archive_history() result, or None when archiving is off.
+    """
+    if ARCHIVE_AFTER_DAYS is None:
+        return None
+    return archive_history(ARCHIVE_AFTER_DAYS)
+
+# History columns the rollups are computed from
+_ROLLUP_INPUT = ["datetime", "model_version", "source"] + [
+    f"{col}_percent" for col in ROLLUP_CLASS_COLUMNS
+]
+
+def _apply_to_rollups(conn, batches, statements):
+    """Run rollup ``statements`` over archived rows loaded into temp.archived_history."""
+    conn.execute(
+        f"CREATE TEMP TABLE archived_history AS "
+        f"SELECT {', '.join(_ROLLUP_INPUT)} FROM analysis_history WHERE 0"
+    )
+    try:
+        insert = (
+            f"INSERT INTO temp.archived_history ({', '.join(_ROLLUP_INPUT)}) "
+            f"VALUES ({', '.join('?' * len(_ROLLUP_INPUT))})"
+        )
+        for batch in batches:
+            conn.executemany(insert, zip(*(batch.column(c).to_pylist() for c in _ROLLUP_INPUT)))
+
+        for sql, params in statements:
+            conn.execute(sql, params)
+    finally:
+        conn.execute("DROP TABLE temp.archived_history")
+
+def merge_archived_rollups(conn):
+    """
+    Add every archived record to the rollup tables.
+
+    Called after a rollup rebuild, which only sees the hot table. Runs
+    inside the caller's transaction.
+
+    Args:
+        conn (sqlite3.Connection): Open connection to the history database.
+    """
+    files = _catalog_files(conn, "history", _MIN_BOUND, _MAX_BOUND)
+    if not files:
+        return
+
+    _apply_to_rollups(
+        conn,
+        _dataset("history", files).to_batches(columns=_ROLLUP_INPUT),
+        [
+            (rollup_merge(period, source="temp.archived_history"), (_MIN_BOUND, _MAX_BOUND))
+            for period in ROLLUP_PERIODS
+        ],
+    )
+
+# =========================
+# Deleting
+# =========================
+def clear_archive(conn):
+    """
+    Drop every archived record from the catalog.
+
+    Runs inside the caller's transaction, which must also clear the
+    rollups. The files stay in place until the caller commits and passes
+    the returned paths to ``remove_archive_files``, so a rollback loses
+    nothing.
+
+    Args:
+        conn (sqlite3.Connection): Open connection to the history database.
+
+    Returns:
+        list[str]: Catalogued paths, relative to ARCHIVE_DIR.
+    """
+    if not _has_catalog(conn):
+        return []
+
+    paths = [row[0] for row in conn.execute(SELECT_ALL_ARCHIVE_FILES)]
+    conn.execute(DELETE_ARCHIVE_CATALOG)
+    return paths
+
+def delete_archived_record(conn, record_id, record_datetime):
+    """
+    Remove one archived record and its detections.
+
+    The files holding it are rewritten without it and swapped in the
+    catalog, and the record is subtracted from the rollups, inside the
+    caller's transaction. Once it commits, pass the returned paths to
+    ``remove_archive_files``.
+
+    Args:
+        conn (sqlite3.Connection): Open connection to the history database.
+        record_id (int): analysis_history id of the record.
+        record_datetime (str): Its stored datetime.
+
+    Returns:
+        list[str]: Replaced paths, relative to ARCHIVE_DIR; empty if the
+            record is not archived.
+    """
+    month = record_datetime[:7]
+    now = datetime.now()
+    stamp = now.strftime("%Y%m%dT%H%M%S")
+    created_at = now.strftime("%Y-%m-%d %H:%M:%S")
+    replaced = []
+
+    for kind, id_column, datetime_column in (
+        ("history", "id", "datetime"),
+        ("detections", "analysis_id", "analysis_datetime"),
+    ):
+        for path, *_ in _catalog_files(conn, kind, f"{month}-01", _month_end(month)):
+            table = pq.read_table(ARCHIVE_DIR / path, schema=ARCHIVE_SCHEMAS[kind])
+            match = pc.equal(table[id_column], record_id)
+            if not pc.any(match).as_py():
+                continue
+
+            if kind == "history":
+                _apply_to_rollups(
+                    conn,
+                    table.filter(match).select(_ROLLUP_INPUT).to_batches(),
+                    [
+                        (sql, ())
+                        for period in ROLLUP_PERIODS
+                        for sql in rollup_subtract(period, "temp.archived_history")
+                    ],
+                )
+
+            conn.execute(DELETE_ARCHIVE_FILE, (path,))
+            replaced.append(path)
+
+            kept = table.filter(pc.invert(match)).to_pandas()
+            if not kept.empty:
+                new_path = _write_part(kind, month, kept, stamp)
+                conn.execute(INSERT_ARCHIVE_FILE, (
+                    new_path, kind, month, len(kept),
+                    kept[datetime_column].min(), kept[datetime_column].max(), created_at,
+                ))
+
+    return replaced
+
+def remove_archive_files(paths):
+    """
+    Delete archived files dropped from the catalog.
+
+    Args:
+        paths (list[str]): Paths relative to ARCHIVE_DIR.
+    """
+    for path in paths:
+        (ARCHIVE_DIR / path).unlink(missing_ok=True)
+
+# =========================
+# Reading
+# =========================
+def archive_bounds(conn):
+    """
+    Oldest and newest archived record timestamps.
+
+    Args:
+        conn (sqlite3.Connection): Open connection to the history database.
+
+    Returns:
+        tuple: (min_datetime, max_datetime) as stored text, (None, None) if
+            nothing is archived.
+    """
+    if not _has_catalog(conn):
+        return None, None
+    return conn.execute(SELECT_ARCHIVE_BOUNDS).fetchone()
+
+def archived_paths(conn, start, end):
+    """
+    Absolute paths of the archived history files overlapping start <= datetime < end.
+
+    Args:
+        conn (sqlite3.Connection): Open connection to the history database.
+        start (str): Inclusive lower datetime bound.
+        end (str): Exclusive upper datetime bound.
+
+    Returns:
+        list[str]: Parquet file paths, oldest first.
+    """
+    return [
+        os.fspath(ARCHIVE_DIR / path)
+        for path, *_ in _catalog_files(conn, "history", start, end)
+    ]
+
+def count_archived(conn, start, end):
+    """
+    Count archived records with start <= datetime < end.
+
+    Files entirely inside the range are counted from the catalog; only
+    files straddling a bound are opened.
+
+    Args:
+        conn (sqlite3.Connection): Open connection to the history database.
+        start (str): Inclusive lower datetime bound.
+        end (str): Exclusive upper datetime bound.
+
+    Returns:
+        int: Number of matching archived records.
+    """
+    files = _catalog_files(conn, "history", start, end)
+    inside = [f for f in files if f[2] >= start and f[3] < end]
+    partial = [f for f in files if f not in inside]
+
+    total = sum(rows for _, rows, *_ in inside)
+    if partial:
+        total += _dataset("history", partial).count_rows(
+            filter=_range_filter("datetime", start, end)
+        )
+    return total
+
+def read_archived(conn, start, end, columns=None, after=None, limit=None):
+    """
+    Load archived records with start <= datetime < end in (datetime, id) order.
+
+    Only the partitions overlapping the range are opened, and Parquet
+    row-group statistics skip the rest of their rows.
+
+    Args:
+        conn (sqlite3.Connection): Open connection to the history database.
+        start (str): Inclusive lower datetime bound.
+        end (str): Exclusive upper datetime bound.
+        columns (list[str], optional): Columns to return. Defaults to all.
+        after (tuple, optional): (datetime, id) keyset cursor; only records
+            after it are returned.
+        limit (int, optional): Maximum number of records.
+
+    Returns:
+        pd.DataFrame: Matching records; empty if none are archived.
+    """
+    columns = list(columns or HISTORY_SCHEMA.names)
+    files = _catalog_files(conn, "history", start, end)
+    if not files:
+        return pd.DataFrame(columns=columns)
+
+    expr = _range_filter("datetime", start, end)
+    if after is not None:
+        after_datetime, after_id = after
+        expr &= (ds.field("datetime") > after_datetime) | (
+            (ds.field("datetime") == after_datetime) & (ds.field("id") > after_id)
+        )
+
+    read = list(dict.fromkeys(["datetime", "id", *columns]))
+    table = _dataset("history", files).to_table(columns=read, filter=expr)
+    table = table.sort_by([("datetime", "ascending"), ("id", "ascending")])
+    if limit is not None:
+        table = table.slice(0, limit)
+
+    return table.to_pandas()[columns]
+
+def read_archived_detections(conn, start, end):
+    """
+    Load the archived detections of analyses with start <= datetime < end.
+
+    Args:
+        conn (sqlite3.Connection): Open connection to the history database.
+        start (str): Inclusive lower datetime bound.
+        end (str): Exclusive upper datetime bound.
+
+    Returns:
+        pd.DataFrame: DETECTION_SCHEMA columns; empty if none are archived.
+    """
+    files = _catalog_files(conn, "detections", start, end)
+    if not files:
+        return pd.DataFrame(columns=DETECTION_SCHEMA.names)
+
+    table = _dataset("detections", files).to_table(
+        filter=_range_filter("analysis_datetime", start, end)
+    )
+    return table.sort_by([("analysis_id", "ascending"), ("id", "ascending")]).to_pandas()
+
+def main():
+    parser = argparse.ArgumentParser(description="Move old history to Parquet cold storage.")
+    parser.add_argument(
+        "--older-than", type=int, default=ARCHIVE_AFTER_DAYS, metavar="DAYS",
+        help="Archive records older than this many days (default: ARCHIVE_AFTER_DAYS)",
+    )
+    args = parser.parse_args()
+
+    if args.older_than is None:
+        parser.print_help()
+        return
+
+    from .migrations import init_db
+    init_db()
+
+    start = time.perf_counter()
+    result = archive_history(args.older_than)
+    elapsed = time.perf_counter() - start
+
+    print(f"Archived {result['rows']} records and {result['detections']} detections "
+          f"from {len(result['months'])} months in {elapsed:.2f} s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Process-wide cache of history reads, invalidated when the database changes.
+
+Every Streamlit rerun re-renders the summary, history and time-series
+sections; without new data their reads return what the previous rerun
+already loaded. ``cached_read`` keeps those results for all sessions of
+the process and re-runs the read only after the database has changed.
+
+Changes are detected with ``PRAGMA data_version`` on a dedicated monitor
+connection per database. The monitor never writes, so its data_version
+moves on every commit made by any other connection (app threads, the
+background writer, other processes), and checking it reads no table.
+"""
+import copy
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from ..core.config import HISTORY_CACHE_ENTRIES
+from ..core.logger import get_logger
+from .connection import _file_identity
+
+logger = get_logger("db.cache")
+
+class _VersionMonitor:
+    """Read-only connection whose data_version tracks commits to one database."""
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = None
+        self._identity = None
+
+    def version(self):
+        """Return a token that changes whenever the database content changes."""
+        identity = _file_identity(self.path)
+        if identity is None:
+            return None
+
+        # Reopen if the file was created, deleted or replaced
+        if self._conn is None or identity != self._identity:
+            self.close()
+            self._conn = sqlite3.connect(
+                f"{Path(self.path).resolve().as_uri()}?mode=ro",
+                uri=True,
+                check_same_thread=False,
+            )
+            self._identity = identity
+
+        return identity, self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+_lock = threading.Lock()
+_monitors = {}
+_entries = OrderedDict()  # (path, function, args) -> (version, value)
+_hits = 0
+_misses = 0
+
+def history_version(path):
+    """
+    Current change token of the database at ``path``.
+
+    Args:
+        path (str | Path): Database file.
+
+    Returns:
+        tuple | None: Opaque token; equal tokens mean no commit in between.
+            None if the file does not exist.
+    """
+    path = os.fspath(path)
+
+    with _lock:
+        monitor = _monitors.get(path)
+        if monitor is None:
+            monitor = _monitors[path] = _VersionMonitor(path)
+        return monitor.version()
+
+def _freeze(value):
+    """Hashable form of a call argument (lists become tuples)."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+def _copy(value):
+    """Callers get their own copy, so mutating a result cannot poison the cache."""
+    return value.copy() if hasattr(value, "to_numpy") else copy.deepcopy(value)
+
+def cached_read(fn, *args, **kwargs):
+    """
+    Call a history read function, or return its cached result.
+
+    The database is ``fn``'s module-level DB_PATH, read at call time. The
+    result is reused while that database has no new commits; otherwise
+    ``fn`` runs again and replaces it. At most HISTORY_CACHE_ENTRIES results
+    are kept (least recently used first out).
+
+    Args:
+        fn (Callable): Read-only function of app.db (e.g. load_rollup).
+        *args: Positional arguments for ``fn``.
+        **kwargs: Keyword arguments for ``fn``.
+
+    Returns:
+        Any: ``fn(*args, **kwargs)``, or a copy of the cached result.
+    """
+    global _hits, _misses
+
+    path = os.fspath(fn.__globals__["DB_PATH"])
+    key = (path, fn.__module__, fn.__qualname__, _freeze(args), _freeze(kwargs))
+    version = history_version(path)
+
+    with _lock:
+        cached = _entries.get(key)
+        if cached is not None and version is not None and cached[0] == version:
+            _entries.move_to_end(key)
+            _hits += 1
+            return _copy(cached[1])
+        _misses += 1
+
+    logger.info(f"History cache miss | fn={fn.__qualname__}")
+
+    # Stored under the version read before the call: a commit racing the
+    # read only makes the next call re-run it
+    value = fn(*args, **kwargs)
+
+    with _lock:
+        _entries[key] = (version, value)
+        _entries.move_to_end(key)
+        while len(_entries) > HISTORY_CACHE_ENTRIES:
+            _entries.popitem(last=False)
+
+    return _copy(value)
+
+def clear_history_cache():
+    """Drop every cached result and close the version monitors."""
+    global _hits, _misses
+
+    with _lock:
+        _entries.clear()
+        for monitor in _monitors.values():
+            monitor.close()
+        _monitors.clear()
+        _hits = _misses = 0
+
+def history_cache_stats():
+    """
+    Cache counters.
+
+    Returns:
+        dict: ``entries``, ``hits`` and ``misses``.
+    """
+    with _lock:
+        return {"entries": len(_entries), "hits": _hits, "misses": _misses}
@@ -0,0 +1,111 @@
+import os
+import sqlite3
+import threading
+import weakref
+
+from ..core.config import (
+    DB_PATH,
+    DB_BUSY_TIMEOUT_MS,
+    DB_CACHE_SIZE_MB,
+    DB_MMAP_SIZE_MB,
+)
+from ..core.logger import get_logger
+
+logger = get_logger("db.connection")
+
+# Per-thread cache: path -> (connection, file identity). Streamlit runs
+# each rerun on a new script thread, so reuse spans one rerun (and any
+# thread that outlives it, e.g. the history writer), not the session.
+_local = threading.local()
+
+def _close_thread_connections(connections, thread_id):
+    """Close a finished thread's connections (called as its cache is freed)."""
+    for conn, _ in connections.values():
+        try:
+            conn.close()
+        except sqlite3.ProgrammingError:
+            # Freed on another thread; the connection closes when collected
+            continue
+    if connections:
+        logger.info(
+            f"SQLite connections closed | count={len(connections)} | thread={thread_id}"
+        )
+    connections.clear()
+
+class _ThreadConnections:
+    """A thread's connection cache, closed when the thread exits."""
+
+    def __init__(self):
+        self.connections = {}
+        weakref.finalize(
+            self, _close_thread_connections, self.connections, threading.get_ident()
+        )
+
+def _file_identity(path):
+    """Return (device, inode) of the database file, or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_dev, stat.st_ino
+
+def _open_connection(path):
+    """Open a connection and apply the WAL and performance pragmas."""
+    conn = sqlite3.connect(path, timeout=DB_BUSY_TIMEOUT_MS / 1000)
+
+    # WAL lets readers run alongside a writer; NORMAL only fsyncs at checkpoints
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={int(DB_BUSY_TIMEOUT_MS)}")
+    conn.execute(f"PRAGMA cache_size={-int(DB_CACHE_SIZE_MB * 1024)}")
+    conn.execute(f"PRAGMA mmap_size={int(DB_MMAP_SIZE_MB * 1024 * 1024)}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA foreign_keys=ON")
+
+    logger.info(f"SQLite connection opened | path={path} | thread={threading.get_ident()}")
+    return conn
+
+def get_connection(path=DB_PATH):
+    """
+    Return this thread's persistent connection to ``path``, opening it on first use.
+
+    Connections are reused across calls on the same thread, reopened if the
+    database file was deleted or replaced, and closed when the thread exits.
+    Under Streamlit that means one connection per rerun, not per session. Use the connection as a
+    context manager (``with get_connection() as conn:``) to commit on success
+    and roll back on error; it stays open afterwards.
+
+    Args:
+        path (str | Path, optional): Database file. Defaults to DB_PATH.
+
+    Returns:
+        sqlite3.Connection: Connection configured for WAL and tuned pragmas.
+    """
+    path = os.fspath(path)
+    cache = getattr(_local, "cache", None)
+    if cache is None:
+        cache = _local.cache = _ThreadConnections()
+    connections = cache.connections
+
+    cached = connections.get(path)
+    if cached is not None:
+        conn, identity = cached
+        if identity is not None and identity == _file_identity(path):
+            return conn
+
+        conn.close()
+        logger.info(f"SQLite connection reset | path={path} | reason=file changed")
+
+    conn = _open_connection(path)
+    connections[path] = (conn, _file_identity(path))
+    return conn
+
+def close_connections():
+    """Close every connection held by the calling thread."""
+    cache = getattr(_local, "cache", None)
+    connections = cache.connections if cache is not None else {}
+
+    for conn, _ in connections.values():
+        conn.close()
+
+    connections.clear()
@@ -1,51 +1,145 @@
-import sqlite3
+import time
+import uuid
 import pandas as pd
-from datetime import datetime
+from dataclasses import dataclass
+from datetime import datetime, timedelta
 
-from ..core.config import DB_PATH, IMAGE_SOURCE, MODEL_VERSION
+from ..core.config import (
+    DB_PATH,
+    IMAGE_SOURCE,
+    MODEL_VERSION,
+    DB_CLASS_MAP,
+    HISTORY_DEDUP,
+)
 from ..core.logger import get_logger
+from .archive import (
+    archive_bounds,
+    clear_archive,
+    count_archived,
+    delete_archived_record,
+    read_archived,
+    remove_archive_files
+)
+from .connection import get_connection
+from .detections import write_detections
+from .schema import dedup_enforced
+from .queries import (
+    INSERT_HISTORY,
+    UPSERT_HISTORY,
+    SELECT_RESULT_BY_HASH,
+    SELECT_HISTORY,
+    SELECT_LAST_SAVED_ID,
+    DELETE_BY_ID,
+    COUNT_HISTORY,
+    DELETE_ALL_HISTORY,
+    SELECT_BATCH,
+    DELETE_BATCH,
+    SELECT_HISTORY_BOUNDS,
+    COUNT_HISTORY_RANGE,
+    SELECT_HISTORY_PAGE,
+    SELECT_HISTORY_RANGE,
+    rollup_clear,
+)
 
 logger = get_logger("db.database")
 
-def save_to_db(image, image_hash, conf, percentages):
+# Columns that may be projected by the history view (whitelist for SQL)
+HISTORY_COLUMNS = (
+    "id",
+    "datetime",
+    "image",
+    "image_hash",
+    "source",
+    "model_version",
+    "confidence",
+    *[f"{col}_percent" for col in DB_CLASS_MAP],
+    "batch_id",
+)
+
+# Text bounds covering every stored datetime
+_MIN_BOUND = "0001-01-01"
+_MAX_BOUND = "9999-12-31"
+
+def _insert_sql(conn):
+    """Plain insert, or upsert when the de-duplication policy is in force."""
+    return UPSERT_HISTORY if HISTORY_DEDUP and dedup_enforced(conn) else INSERT_HISTORY
+
+def _insert_returning_id(conn, row):
+    """Insert (or upsert) one history row and return its id, which upserts keep."""
+    return conn.execute(_insert_sql(conn) + " RETURNING id", row).fetchone()[0]
+
+def _write_row(conn, row, detections=None):
+    """Insert one history row and, when given, replace its detections."""
+    if detections is None:
+        conn.execute(_insert_sql(conn), row)
+    else:
+        write_detections(conn, _insert_returning_id(conn, row), detections)
+
+def _history_row(image, image_hash, conf, percentages, saved_at, batch_id=None):
+    """Build one analysis_history parameter tuple in INSERT_HISTORY column order."""
+    return (
+        saved_at,
+        image,
+        image_hash,
+        IMAGE_SOURCE,
+        MODEL_VERSION,
+        conf,
+        percentages["Metal"],
+        percentages["Mixed waste"],
+        percentages["Paper&Cardboard"],
+        percentages["Plastic"],
+        percentages["Wood"],
+        batch_id
+    )
+
+@dataclass
+class BatchSaveResult:
+    """
+    Outcome of a bulk batch save.
+
+    Attributes:
+        batch_id (str): Identifier stored on every row of the batch.
+        rows (int): Number of rows written.
+        seconds (float): Wall-clock time of the transaction.
+    """
+    batch_id: str
+    rows: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        """Write throughput of the save."""
+        return self.rows / self.seconds if self.seconds > 0 else float(self.rows)
+
+def save_to_db(image, image_hash, conf, percentages, detections=None):
     """
     Save a single analysis result to the database.
 
+    With HISTORY_DEDUP in force (see apply_dedup_policy), saving an image
+    already stored for the same model version and confidence updates that
+    record instead of adding one.
+
     Args:
         image (str): Image filename.
         image_hash (str): SHA256 hash of the image.
         conf (float): Model confidence score.
         percentages (dict): Class-wise percentage of detected pixels.
+        detections (list[dict], optional): Per-instance entries from
+            ``extract_detections``, stored in analysis_detections in the
+            same transaction.
     """
     logger.info(f"Saving analysis result | image={image}")
 
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            INSERT INTO analysis_history (
-                datetime, image, image_hash, source, model_version, confidence,
-                metal_percent, mixed_waste_percent,
-                paper_cardboard_percent, plastic_percent, wood_percent
+        with get_connection(DB_PATH) as conn:
+            row = _history_row(
+                image,
+                image_hash,
+                conf,
+                percentages,
+                datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            image,
-            image_hash,
-            IMAGE_SOURCE,
-            MODEL_VERSION,
-            conf,
-            percentages["Metal"],
-            percentages["Mixed waste"],
-            percentages["Paper&Cardboard"],
-            percentages["Plastic"],
-            percentages["Wood"]
-        ))
-
-        conn.commit()
-        conn.close()
+            _write_row(conn, row, detections)
 
         logger.info(f"Save success | image={image}")
 
@@ -56,6 +150,106 @@ def save_to_db(image, image_hash, conf, percentages):
         )
         raise
 
+def save_batch_to_db(entries, conf, batch_id=None):
+    """
+    Save many analysis results in one transaction, tagged with a batch id.
+
+    All rows are written with a single ``executemany`` and one commit, so
+    the whole batch is stored (or rolled back) atomically. Duplicates are
+    handled as in ``save_to_db``. When entries carry detections, rows are
+    inserted one by one (still in the same transaction) so each analysis id
+    is known for its analysis_detections rows.
+
+    Args:
+        entries (Iterable[tuple]): (image, image_hash, percentages) or
+            (image, image_hash, percentages, detections) per result.
+        conf (float): Model confidence threshold used for the batch.
+        batch_id (str, optional): Identifier to store. Defaults to a new UUID.
+
+    Returns:
+        BatchSaveResult: Batch id, row count and timing.
+    """
+    batch_id = batch_id or uuid.uuid4().hex
+    saved_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    entries = list(entries)
+    rows = [
+        _history_row(image, image_hash, conf, percentages, saved_at, batch_id)
+        for image, image_hash, percentages, *_ in entries
+    ]
+    detections = [entry[3] if len(entry) > 3 else None for entry in entries]
+
+    logger.info(f"Saving batch | batch_id={batch_id} | rows={len(rows)}")
+
+    try:
+        start = time.perf_counter()
+
+        with get_connection(DB_PATH) as conn:
+            if any(d is not None for d in detections):
+                for row, instances in zip(rows, detections):
+                    _write_row(conn, row, instances)
+            else:
+                conn.executemany(_insert_sql(conn), rows)
+
+        result = BatchSaveResult(
+            batch_id=batch_id,
+            rows=len(rows),
+            seconds=time.perf_counter() - start
+        )
+
+        logger.info(
+            f"Batch save success | batch_id={batch_id} | rows={result.rows} "
+            f"| rows_per_s={result.rows_per_second:.0f}"
+        )
+        return result
+
+    except Exception as e:
+        logger.error(
+            f"Batch save failed | batch_id={batch_id} | error={str(e)}",
+            exc_info=True
+        )
+        raise
+
+def find_result_by_hash(image_hash, conf, model_version=MODEL_VERSION):
+    """
+    Look up stored percentages for an image analysed with the same settings.
+
+    Args:
+        image_hash (str): SHA256 hash of the image content.
+        conf (float): Confidence threshold of the analysis.
+        model_version (str, optional): Model version. Defaults to MODEL_VERSION.
+
+    Returns:
+        dict | None: Class-wise percentages keyed by display name, or None
+            if the image has not been analysed with these settings.
+    """
+    if image_hash is None:
+        return None
+
+    try:
+        cursor = get_connection(DB_PATH).execute(
+            SELECT_RESULT_BY_HASH,
+            (image_hash, model_version, conf)
+        )
+        row = cursor.fetchone()
+
+    except Exception as e:
+        logger.error(
+            f"Hash lookup failed | hash={image_hash} | error={str(e)}",
+            exc_info=True
+        )
+        return None
+
+    if row is None:
+        return None
+
+    # "<class>_percent" columns -> display names
+    columns = [description[0] for description in cursor.description]
+    return {
+        DB_CLASS_MAP[column.removesuffix("_percent")]: value
+        for column, value in zip(columns, row)
+    }
+
 def load_history():
     """
     Load all historical analysis records from the database.
@@ -66,12 +260,10 @@ def load_history():
     logger.info("Loading analysis history")
 
     try:
-        conn = sqlite3.connect(DB_PATH)
         df = pd.read_sql_query(
-            "SELECT * FROM analysis_history ORDER BY datetime ASC",
-            conn
+            SELECT_HISTORY,
+            get_connection(DB_PATH)
         )
-        conn.close()
 
         logger.info(f"History loaded | records={len(df)}")
         return df
@@ -83,30 +275,151 @@ def load_history():
         )
         return pd.DataFrame()
 
+def _date_bounds(start_date, end_date):
+    """Half-open datetime text bounds [start, end + 1 day) for inclusive dates."""
+    return start_date.isoformat(), (end_date + timedelta(days=1)).isoformat()
+
+def _projection(columns):
+    """Validate columns against HISTORY_COLUMNS and always include the keyset columns."""
+    columns = list(columns or HISTORY_COLUMNS)
+
+    unknown = set(columns) - set(HISTORY_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown history columns: {sorted(unknown)}")
+
+    for key in ("datetime", "id"):
+        if key not in columns:
+            columns.insert(0, key)
+
+    return columns
+
+def _with_archived(df, archived, limit=None):
+    """Merge archived records into a hot-table result in (datetime, id) order."""
+    if archived.empty:
+        return df
+    if not df.empty:
+        archived = pd.concat([archived, df], ignore_index=True)
+
+    archived = archived.sort_values(["datetime", "id"], ignore_index=True)
+    return archived if limit is None else archived.head(limit)
+
+def get_history_bounds():
+    """
+    Get the oldest and newest record timestamps, archived records included.
+
+    Returns:
+        tuple: (min_datetime, max_datetime) as stored text, (None, None) if empty.
+    """
+    conn = get_connection(DB_PATH)
+    hot = conn.execute(SELECT_HISTORY_BOUNDS).fetchone()
+    cold = archive_bounds(conn)
+
+    oldest = [value for value in (hot[0], cold[0]) if value is not None]
+    newest = [value for value in (hot[1], cold[1]) if value is not None]
+    return (min(oldest, default=None), max(newest, default=None))
+
+def count_history(start_date, end_date):
+    """
+    Count records between two dates (inclusive) with an index-only COUNT,
+    plus the archived records in the range.
+
+    Args:
+        start_date (date): First day of the range.
+        end_date (date): Last day of the range.
+
+    Returns:
+        int: Number of matching records.
+    """
+    bounds = _date_bounds(start_date, end_date)
+    conn = get_connection(DB_PATH)
+    hot = conn.execute(COUNT_HISTORY_RANGE, bounds).fetchone()[0]
+    return hot + count_archived(conn, *bounds)
+
+def load_history_page(start_date, end_date, columns=None, after=None, limit=20):
+    """
+    Load one page of records in (datetime, id) order using keyset pagination.
+
+    The date range, projection, ordering and limit are applied in SQLite, and
+    the page starts from an index seek past ``after``, so fetching any page
+    costs the same regardless of how deep it is. Archived partitions are
+    only read when the range overlaps them.
+
+    Args:
+        start_date (date): First day of the range.
+        end_date (date): Last day of the range (inclusive).
+        columns (list[str], optional): Columns to return (from HISTORY_COLUMNS).
+            "datetime" and "id" are always included. Defaults to all.
+        after (tuple, optional): (datetime, id) of the last row of the previous
+            page. None for the first page.
+        limit (int, optional): Page size. Defaults to 20.
+
+    Returns:
+        pd.DataFrame: Records of the page (at most ``limit`` rows).
+    """
+    start, end = _date_bounds(start_date, end_date)
+    after_datetime, after_id = after if after is not None else (start, 0)
+    columns = _projection(columns)
+
+    conn = get_connection(DB_PATH)
+
+    page = pd.read_sql_query(
+        SELECT_HISTORY_PAGE.format(columns=", ".join(columns)),
+        conn,
+        params=(max(start, after_datetime), end, after_datetime, after_id, limit)
+    )
+    archived = read_archived(conn, start, end, columns, after=after, limit=limit)
+    return _with_archived(page, archived, limit)
+
+def load_history_range(start_date, end_date, columns=None):
+    """
+    Load every record between two dates (inclusive), e.g. for export,
+    archived records included.
+
+    Args:
+        start_date (date): First day of the range.
+        end_date (date): Last day of the range.
+        columns (list[str], optional): Columns to return (from HISTORY_COLUMNS).
+            Defaults to all.
+
+    Returns:
+        pd.DataFrame: Matching records in (datetime, id) order.
+    """
+    bounds = _date_bounds(start_date, end_date)
+    columns = _projection(columns)
+
+    conn = get_connection(DB_PATH)
+
+    df = pd.read_sql_query(
+        SELECT_HISTORY_RANGE.format(columns=", ".join(columns)),
+        conn,
+        params=bounds
+    )
+    return _with_archived(df, read_archived(conn, *bounds, columns))
+
 def undo_last_save():
     """"Remove the most recent analysis record from the database."""
     logger.info("Undo last save")
 
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT MAX(id) FROM analysis_history")
-        last_id = cursor.fetchone()[0]
-
-        if last_id is None:
-            logger.warning("Undo failed | no record found")
-            return
+        with get_connection(DB_PATH) as conn:
+            row = conn.execute(SELECT_LAST_SAVED_ID).fetchone()
+            archived_latest = archive_bounds(conn)[1]
+            replaced = []
 
-        cursor.execute("""
-            DELETE FROM analysis_history
-            WHERE id = ?
-        """, (last_id,))
+            if archived_latest is not None and (row is None or archived_latest > row[1]):
+                # The newest record was archived since it was saved
+                archived = read_archived(conn, archived_latest, _MAX_BOUND, ["id"])
+                last_id = int(archived["id"].iloc[-1])
+                replaced = delete_archived_record(conn, last_id, archived_latest)
+            elif row is not None:
+                last_id = row[0]
+                conn.execute(DELETE_BY_ID, (last_id,))
+            else:
+                logger.warning("Undo failed | no record found")
+                return
 
-        conn.commit()
-        conn.close()
-
-        logger.info(f"Undo success | deleted_id={last_id}")
+        remove_archive_files(replaced)
+        logger.info(f"Undo success | deleted_id={last_id} | archived={bool(replaced)}")
 
     except Exception as e:
         logger.error(
@@ -115,24 +428,69 @@ def undo_last_save():
         )
 
 def clear_history():
-    """Delete all analysis records from the database."""
+    """Delete all analysis records from the database, archived records included."""
     logger.info("Clearing analysis history")
 
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+        with get_connection(DB_PATH) as conn:
+            count = conn.execute(COUNT_HISTORY).fetchone()[0]
+            count += count_archived(conn, _MIN_BOUND, _MAX_BOUND)
 
-        cursor.execute("SELECT COUNT(*) FROM analysis_history")
-        count = cursor.fetchone()[0]
+            conn.execute(DELETE_ALL_HISTORY)
+            archived = clear_archive(conn)
 
-        cursor.execute("DELETE FROM analysis_history")
-        conn.commit()
-        conn.close()
+            # The delete triggers only subtract hot records; nothing is left
+            # to count, archived or not
+            for statement in rollup_clear():
+                conn.execute(statement)
 
-        logger.info(f"Clear history success | deleted_records={count}")
+        remove_archive_files(archived)
+        logger.info(f"Clear history success | deleted_records={count} | archive_files={len(archived)}")
 
     except Exception as e:
         logger.error(
             f"Clear history failed | error={str(e)}",
             exc_info=True
         )
+
+def load_batch(batch_id):
+    """
+    Load the records of one saved batch.
+
+    Args:
+        batch_id (str): Identifier returned by ``save_batch_to_db``.
+
+    Returns:
+        pd.DataFrame: Records of the batch, empty if none or if load fails.
+    """
+    try:
+        return pd.read_sql_query(
+            SELECT_BATCH,
+            get_connection(DB_PATH),
+            params=(batch_id,)
+        )
+
+    except Exception as e:
+        logger.error(
+            f"Load batch failed | batch_id={batch_id} | error={str(e)}",
+            exc_info=True
+        )
+        return pd.DataFrame()
+
+def delete_batch(batch_id):
+    """
+    Remove every record of one saved batch.
+
+    Args:
+        batch_id (str): Identifier returned by ``save_batch_to_db``.
+
+    Returns:
+        int: Number of deleted records.
+    """
+    logger.info(f"Deleting batch | batch_id={batch_id}")
+
+    with get_connection(DB_PATH) as conn:
+        deleted = conn.execute(DELETE_BATCH, (batch_id,)).rowcount
+
+    logger.info(f"Delete batch success | batch_id={batch_id} | deleted_records={deleted}")
+    return deleted
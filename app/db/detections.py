@@ -0,0 +1,148 @@
+"""
+Per-instance detections stored alongside each saved analysis.
+
+analysis_history keeps five aggregated percentages per image; the
+analysis_detections child table keeps every instance (class, confidence,
+pixel area, box) so new analytics run as SQL instead of re-inference.
+Rows are removed with their analysis through ON DELETE CASCADE.
+"""
+import pandas as pd
+
+from ..core.config import DB_PATH, DB_CLASS_MAP
+from ..core.logger import get_logger
+from .connection import get_connection
+from .queries import (
+    CREATE_DETECTIONS_TABLE,
+    DETECTION_INDEXES,
+    INSERT_DETECTION,
+    DELETE_DETECTIONS_FOR,
+    SELECT_DETECTIONS_FOR,
+    SELECT_DETECTION_CLASS_STATS,
+    SELECT_DETECTION_COUNTS,
+    SELECT_DETECTION_AREAS,
+)
+
+logger = get_logger("db.detections")
+
+# Display name -> stored class key (the analysis_history column prefix)
+CLASS_KEYS = {name: key for key, name in DB_CLASS_MAP.items()}
+
+def install_detections(conn):
+    """
+    Create analysis_detections and its indexes on ``conn`` if missing.
+
+    Args:
+        conn (sqlite3.Connection): Open connection to the history database.
+    """
+    conn.execute(CREATE_DETECTIONS_TABLE)
+
+    for name, columns in DETECTION_INDEXES.items():
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} ON analysis_detections ({columns})"
+        )
+
+def _detection_row(analysis_id, detection):
+    """Build one INSERT_DETECTION parameter tuple from an ``extract_detections`` entry."""
+    x1, y1, x2, y2 = detection.get("bbox") or (None, None, None, None)
+
+    return (
+        analysis_id,
+        CLASS_KEYS.get(detection["class"], detection["class"]),
+        detection.get("confidence"),
+        detection["pixel_area"],
+        x1, y1, x2, y2,
+    )
+
+def write_detections(conn, analysis_id, detections):
+    """
+    Replace the stored detections of one analysis, inside the caller's transaction.
+
+    Args:
+        conn (sqlite3.Connection): Connection with an open transaction.
+        analysis_id (int): analysis_history id the detections belong to.
+        detections (list[dict] | None): Entries from ``extract_detections``.
+            None leaves any stored detections untouched.
+
+    Returns:
+        int: Number of detection rows written.
+    """
+    if detections is None:
+        return 0
+
+    conn.execute(DELETE_DETECTIONS_FOR, (analysis_id,))
+    conn.executemany(
+        INSERT_DETECTION,
+        [_detection_row(analysis_id, detection) for detection in detections]
+    )
+    return len(detections)
+
+def load_detections(analysis_id):
+    """
+    Load the stored instances of one analysis.
+
+    Args:
+        analysis_id (int): analysis_history id.
+
+    Returns:
+        pd.DataFrame: Columns id, class, confidence, pixel_area, x1, y1, x2, y2.
+    """
+    return pd.read_sql_query(
+        SELECT_DETECTIONS_FOR,
+        get_connection(DB_PATH),
+        params=(analysis_id,)
+    )
+
+def detection_class_stats(start, end):
+    """
+    Per-class instance statistics for analyses saved in ``[start, end)``.
+
+    Args:
+        start (str): Inclusive lower datetime bound ("YYYY-MM-DD[ HH:MM:SS]").
+        end (str): Exclusive upper datetime bound.
+
+    Returns:
+        pd.DataFrame: One row per class with detections, images,
+            mean_confidence, mean_pixel_area, min_pixel_area, max_pixel_area.
+    """
+    return pd.read_sql_query(
+        SELECT_DETECTION_CLASS_STATS,
+        get_connection(DB_PATH),
+        params=(start, end)
+    )
+
+def detection_counts(start, end):
+    """
+    Number of objects per image and class for analyses saved in ``[start, end)``.
+
+    Args:
+        start (str): Inclusive lower datetime bound.
+        end (str): Exclusive upper datetime bound.
+
+    Returns:
+        pd.DataFrame: Columns analysis_id, datetime, image, class, objects.
+    """
+    return pd.read_sql_query(
+        SELECT_DETECTION_COUNTS,
+        get_connection(DB_PATH),
+        params=(start, end)
+    )
+
+def detection_areas(class_key, min_confidence=0.0):
+    """
+    Pixel areas of every stored instance of one class.
+
+    Instances stored without a confidence are excluded.
+
+    Args:
+        class_key (str): Stored class key (e.g. "plastic").
+        min_confidence (float, optional): Minimum detection confidence.
+
+    Returns:
+        pd.Series: Pixel area per instance, for size distributions.
+    """
+    df = pd.read_sql_query(
+        SELECT_DETECTION_AREAS,
+        get_connection(DB_PATH),
+        params=(class_key, min_confidence)
+    )
+    return df["pixel_area"]
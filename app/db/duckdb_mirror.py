@@ -0,0 +1,275 @@
+"""
+Columnar DuckDB mirror of analysis_history for large analytical scans.
+
+DuckDB cannot read the SQLite file without its sqlite extension (downloaded
+at runtime, unavailable offline), so the mirror keeps its own copy in a
+DuckDB database file. It is loaded in full once, then kept current from the
+history_changes log that SQLite triggers fill (see apply_analytics_policy):
+each sync deletes and re-reads only the changed ids, then prunes the log.
+
+Requires the optional ``duckdb`` package.
+"""
+import os
+import threading
+
+import duckdb
+import pandas as pd
+
+from ..core.logger import get_logger
+from .connection import get_connection
+from .queries import (
+    ROLLUP_CLASS_COLUMNS,
+    BUCKET_AGGREGATES,
+    SELECT_CHANGE_LOG_STATE,
+    SELECT_CHANGED_IDS,
+    SELECT_CHANGED_ROWS,
+    SELECT_ALL_ROWS,
+    PRUNE_CHANGE_LOG,
+)
+
+logger = get_logger("db.duckdb_mirror")
+
+# Mirrored analysis_history columns and their DuckDB types
+MIRROR_COLUMNS = {
+    "id": "BIGINT",
+    "datetime": "TIMESTAMP",
+    "image": "VARCHAR",
+    "image_hash": "VARCHAR",
+    "source": "VARCHAR",
+    "model_version": "VARCHAR",
+    "confidence": "DOUBLE",
+    **{f"{col}_percent": "DOUBLE" for col in ROLLUP_CLASS_COLUMNS},
+    "batch_id": "VARCHAR",
+}
+
+# Rows copied from SQLite per chunk during a full load
+LOAD_CHUNK_ROWS = 200_000
+
+CREATE_MIRROR_TABLE = "CREATE TABLE IF NOT EXISTS analysis_history ({columns})".format(
+    columns=", ".join(f"{name} {kind}" for name, kind in MIRROR_COLUMNS.items())
+)
+
+CREATE_MIRROR_STATE = "CREATE TABLE IF NOT EXISTS mirror_state (token VARCHAR, last_seq BIGINT)"
+
+# Casts text datetimes (and all-NULL object columns) to the mirror types
+INSERT_FROM_FRAME = "INSERT INTO analysis_history SELECT {casts} FROM incoming".format(
+    casts=", ".join(
+        f"TRY_CAST({name} AS {kind})" for name, kind in MIRROR_COLUMNS.items()
+    )
+)
+
+SELECT_RANGE = """
+    SELECT {columns} FROM analysis_history
+    WHERE datetime >= CAST(? AS TIMESTAMP) AND datetime < CAST(? AS TIMESTAMP)
+    ORDER BY datetime ASC, id ASC
+"""
+
+# time_bucket's default origins start weeks on Monday and months on the 1st
+SELECT_BUCKETS = """
+    SELECT time_bucket(INTERVAL '1 {freq}', datetime) AS bucket, COUNT(*) AS samples,
+           """ + BUCKET_AGGREGATES + """
+    FROM {source}
+    WHERE datetime >= CAST(? AS TIMESTAMP) AND datetime < CAST(? AS TIMESTAMP)
+    GROUP BY bucket
+    ORDER BY bucket ASC
+"""
+
+SELECT_TOTALS = """
+    SELECT COUNT(*) AS total_images,
+           strftime(MAX(datetime), '%Y-%m-%d %H:%M:%S') AS latest,
+           """ + ", ".join(f"SUM({col}_percent) AS {col}" for col in ROLLUP_CLASS_COLUMNS) + """
+    FROM {source}
+"""
+
+def history_relation(archive_paths=()):
+    """
+    FROM-clause relation for the aggregates: the mirrored table, plus the
+    given archived Parquet files so archived records are counted too.
+
+    Args:
+        archive_paths (list[str]): Parquet files (see archive.archived_paths).
+
+    Returns:
+        str: Table name or parenthesized subquery.
+    """
+    if not archive_paths:
+        return "analysis_history"
+
+    columns = ", ".join(f"{col}_percent" for col in ROLLUP_CLASS_COLUMNS)
+    files = ", ".join("'" + path.replace("'", "''") + "'" for path in archive_paths)
+    return (
+        f"(SELECT datetime, {columns} FROM analysis_history "
+        f"UNION ALL SELECT CAST(datetime AS TIMESTAMP) AS datetime, {columns} "
+        f"FROM read_parquet([{files}])) AS history"
+    )
+
+class DuckDBMirror:
+    """
+    A DuckDB copy of one SQLite history database, synced before every query.
+
+    Queries and syncs are serialized with a lock; DuckDB parallelizes each
+    query internally.
+
+    Args:
+        sqlite_path (str | Path): Source SQLite database.
+        duckdb_path (str | Path): Mirror database file (created if missing).
+    """
+
+    def __init__(self, sqlite_path, duckdb_path):
+        self.sqlite_path = os.fspath(sqlite_path)
+        self.duckdb_path = os.fspath(duckdb_path)
+        self._lock = threading.Lock()
+        self._conn = duckdb.connect(self.duckdb_path)
+        self._conn.execute(CREATE_MIRROR_TABLE)
+        self._conn.execute(CREATE_MIRROR_STATE)
+
+    def close(self):
+        """Close the DuckDB connection."""
+        with self._lock:
+            self._conn.close()
+
+    # -------------------------
+    # Sync
+    # -------------------------
+    def _state(self):
+        row = self._conn.execute("SELECT token, last_seq FROM mirror_state").fetchone()
+        return row if row is not None else (None, None)
+
+    def _set_state(self, token, last_seq):
+        self._conn.execute("DELETE FROM mirror_state")
+        self._conn.execute("INSERT INTO mirror_state VALUES (?, ?)", (token, last_seq))
+
+    def _insert_frame(self, frame):
+        if frame.empty:
+            return
+        self._conn.register("incoming", frame)
+        try:
+            self._conn.execute(INSERT_FROM_FRAME)
+        finally:
+            self._conn.unregister("incoming")
+
+    def _full_load(self, source, token, last_seq):
+        columns = ", ".join(MIRROR_COLUMNS)
+        rows = 0
+
+        self._conn.execute("BEGIN TRANSACTION")
+        try:
+            self._conn.execute("DELETE FROM analysis_history")
+            for chunk in pd.read_sql_query(
+                SELECT_ALL_ROWS.format(columns=columns), source, chunksize=LOAD_CHUNK_ROWS
+            ):
+                self._insert_frame(chunk)
+                rows += len(chunk)
+            self._set_state(token, last_seq)
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+        logger.info(f"DuckDB mirror loaded | path={self.duckdb_path} | rows={rows}")
+
+    def _apply_changes(self, source, token, from_seq, to_seq):
+        changed = [
+            row[0] for row in source.execute(SELECT_CHANGED_IDS, (from_seq, to_seq))
+        ]
+        frame = pd.read_sql_query(
+            SELECT_CHANGED_ROWS.format(columns=", ".join(MIRROR_COLUMNS)),
+            source,
+            params=(from_seq, to_seq),
+        )
+
+        self._conn.execute("BEGIN TRANSACTION")
+        try:
+            self._conn.register("changed_ids", pd.DataFrame({"id": changed}, dtype="int64"))
+            self._conn.execute(
+                "DELETE FROM analysis_history WHERE id IN (SELECT id FROM changed_ids)"
+            )
+            self._conn.unregister("changed_ids")
+            self._insert_frame(frame)
+            self._set_state(token, to_seq)
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+        logger.info(f"DuckDB mirror synced | changed_ids={len(changed)} | seq={to_seq}")
+
+    def sync(self):
+        """
+        Bring the mirror up to date with the SQLite database.
+
+        Reads the source in one snapshot, applies the logged changes (or a
+        full reload if the mirror is new or was built against a different
+        change log), then prunes the applied log entries.
+
+        Returns:
+            str: "current", "incremental" or "full".
+        """
+        source = get_connection(self.sqlite_path)
+        mirror_token, mirror_seq = self._state()
+
+        # One read snapshot for the state, the changed ids and their rows
+        source.execute("BEGIN")
+        try:
+            token, last_seq = source.execute(SELECT_CHANGE_LOG_STATE).fetchone()
+            if token is None:
+                raise RuntimeError(
+                    "history change log missing; run init_db() with ANALYTICS_ENGINE = 'duckdb'"
+                )
+            last_seq = last_seq or 0
+
+            if token != mirror_token or mirror_seq is None or last_seq < mirror_seq:
+                self._full_load(source, token, last_seq)
+                mode = "full"
+            elif last_seq > mirror_seq:
+                self._apply_changes(source, token, mirror_seq, last_seq)
+                mode = "incremental"
+            else:
+                mode = "current"
+        finally:
+            source.commit()
+
+        if mode != "current":
+            with source:
+                source.execute(PRUNE_CHANGE_LOG, (last_seq,))
+
+        return mode
+
+    # -------------------------
+    # Queries
+    # -------------------------
+    def query(self, sql, params=()):
+        """
+        Sync, then run ``sql`` on the mirror.
+
+        Args:
+            sql (str): DuckDB statement over the mirrored analysis_history.
+            params (tuple, optional): Positional parameters.
+
+        Returns:
+            pd.DataFrame: Query result.
+        """
+        with self._lock:
+            self.sync()
+            return self._conn.execute(sql, params).df()
+
+# Process-wide mirrors: (sqlite path, duckdb path) -> DuckDBMirror
+_mirrors = {}
+_mirrors_lock = threading.Lock()
+
+def get_mirror(sqlite_path, duckdb_path):
+    """Return the process-wide mirror of ``sqlite_path``, opening it on first use."""
+    key = (os.fspath(sqlite_path), os.fspath(duckdb_path))
+
+    with _mirrors_lock:
+        mirror = _mirrors.get(key)
+        if mirror is None:
+            mirror = _mirrors[key] = DuckDBMirror(*key)
+        return mirror
+
+def close_mirrors():
+    """Close every mirror opened by this process."""
+    with _mirrors_lock:
+        for mirror in _mirrors.values():
+            mirror.close()
+        _mirrors.clear()
@@ -0,0 +1,121 @@
+"""
+Versioned schema migrations for the history database.
+
+The schema version is stored in ``PRAGMA user_version``. Each migration
+runs once, in order, inside its own transaction that also bumps the
+version, so a failed step leaves the database at the previous version.
+Databases created before versioning (user_version 0) go through every
+step; the early steps are written to be no-ops on an up-to-date schema.
+"""
+import os
+import threading
+
+from ..core.config import DB_PATH, IMAGE_SOURCE, MODEL_VERSION
+from ..core.logger import get_logger
+from .analytics import apply_analytics_policy
+from .archive import install_archive, apply_retention_policy
+from .connection import get_connection
+from .detections import install_detections
+from .queries import CREATE_HISTORY_TABLE, BACKFILL_METADATA
+from .rollup import install_rollups
+from .schema import add_missing_columns, install_indexes, apply_dedup_policy
+
+logger = get_logger("db.migrations")
+
+def _create_history_table(conn):
+    conn.execute(CREATE_HISTORY_TABLE)
+    add_missing_columns(conn)
+
+def _backfill_metadata(conn):
+    conn.execute(BACKFILL_METADATA, (IMAGE_SOURCE, MODEL_VERSION))
+
+# (version, description, step); append only, never renumber
+MIGRATIONS = [
+    (1, "create analysis_history and add missing columns", _create_history_table),
+    (2, "create secondary indexes", install_indexes),
+    (3, "backfill source and model_version", _backfill_metadata),
+    (4, "create daily and weekly rollups", install_rollups),
+    (5, "create analysis_detections", install_detections),
+    (6, "create history_archive catalog", install_archive),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# Database paths already initialized by this process
+_initialized = set()
+_init_lock = threading.Lock()
+
+def get_schema_version(conn):
+    """Return the schema version recorded in the database header."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(conn):
+    """
+    Apply every migration newer than the database's schema version.
+
+    Each step runs in a BEGIN IMMEDIATE transaction, so concurrent
+    processes serialize and the version is re-read after the lock is held.
+
+    Args:
+        conn (sqlite3.Connection): Open connection to the history database.
+
+    Returns:
+        list[int]: Versions applied by this call, in order.
+    """
+    applied = []
+
+    for version, description, step in MIGRATIONS:
+        if get_schema_version(conn) >= version:
+            continue
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have applied it while we waited for the lock
+            if get_schema_version(conn) < version:
+                step(conn)
+                conn.execute(f"PRAGMA user_version = {int(version)}")
+                applied.append(version)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            logger.exception(f"Migration failed | version={version} | {description}")
+            raise
+
+        if applied and applied[-1] == version:
+            logger.info(f"Migration applied | version={version} | {description}")
+
+    return applied
+
+def init_db():
+    """
+    Bring DB_PATH up to date once per process.
+
+    Runs pending migrations, applies the HISTORY_DEDUP, ANALYTICS_ENGINE
+    and ARCHIVE_AFTER_DAYS policies and refreshes planner statistics. Later calls for the same path
+    return immediately, so Streamlit reruns do not touch the schema.
+
+    Returns:
+        bool: True if this call initialized the database, False if it
+            already was.
+    """
+    path = os.fspath(DB_PATH)
+
+    with _init_lock:
+        if path in _initialized:
+            return False
+
+        conn = get_connection(path)
+        applied = migrate(conn)
+        apply_dedup_policy()
+        apply_analytics_policy()
+        apply_retention_policy()
+
+        # Runs ANALYZE only where statistics are missing or stale
+        conn.execute("PRAGMA optimize")
+
+        _initialized.add(path)
+
+    logger.info(
+        f"Database initialized | path={path} | schema_version={SCHEMA_VERSION} | applied={applied}"
+    )
+    return True
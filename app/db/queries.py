@@ -0,0 +1,639 @@
+# =========================
+# SQL STATEMENTS
+# =========================
+# Every statement the app issues against analysis_history lives here, so
+# tests/db/test_query_plans.py can check each one with EXPLAIN QUERY PLAN.
+
+CREATE_HISTORY_TABLE = """
+    CREATE TABLE IF NOT EXISTS analysis_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        datetime TEXT,
+        image TEXT,
+        image_hash TEXT,
+        source TEXT,
+        model_version TEXT,
+        confidence REAL,
+        metal_percent REAL,
+        mixed_waste_percent REAL,
+        paper_cardboard_percent REAL,
+        plastic_percent REAL,
+        wood_percent REAL,
+        batch_id TEXT
+    )
+"""
+
+# Index name -> indexed columns
+HISTORY_INDEXES = {
+    "idx_history_datetime": "datetime",
+    "idx_history_image_hash": "image_hash",
+    "idx_history_model_version_datetime": "model_version, datetime",
+    "idx_history_source_datetime": "source, datetime",
+    "idx_history_batch_id": "batch_id",
+}
+
+# Unique per analysed image/model/threshold; legacy rows without a hash are exempt
+UNIQUE_RESULT_INDEX = "idx_history_unique_result"
+
+CREATE_UNIQUE_RESULT_INDEX = f"""
+    CREATE UNIQUE INDEX IF NOT EXISTS {UNIQUE_RESULT_INDEX}
+    ON analysis_history (image_hash, model_version, confidence)
+    WHERE image_hash IS NOT NULL
+"""
+
+DROP_UNIQUE_RESULT_INDEX = f"DROP INDEX IF EXISTS {UNIQUE_RESULT_INDEX}"
+
+# Rows that would violate UNIQUE_RESULT_INDEX (all but the newest per group)
+COUNT_DUPLICATE_RESULTS = """
+    SELECT COALESCE(SUM(n - 1), 0) FROM (
+        SELECT COUNT(*) AS n FROM analysis_history
+        WHERE image_hash IS NOT NULL
+        GROUP BY image_hash, model_version, confidence
+        HAVING n > 1
+    )
+"""
+
+# Keep the newest row of each (image_hash, model_version, confidence) group
+DELETE_DUPLICATE_RESULTS = """
+    DELETE FROM analysis_history
+    WHERE image_hash IS NOT NULL
+      AND id NOT IN (
+        SELECT MAX(id) FROM analysis_history
+        WHERE image_hash IS NOT NULL
+        GROUP BY image_hash, model_version, confidence
+      )
+"""
+
+INSERT_HISTORY = """
+    INSERT INTO analysis_history (
+        datetime, image, image_hash, source, model_version, confidence,
+        metal_percent, mixed_waste_percent,
+        paper_cardboard_percent, plastic_percent, wood_percent,
+        batch_id
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# INSERT_HISTORY that refreshes the existing row of a re-analysed image
+UPSERT_HISTORY = INSERT_HISTORY + """
+    ON CONFLICT (image_hash, model_version, confidence) WHERE image_hash IS NOT NULL
+    DO UPDATE SET
+        datetime = excluded.datetime,
+        image = excluded.image,
+        source = excluded.source,
+        metal_percent = excluded.metal_percent,
+        mixed_waste_percent = excluded.mixed_waste_percent,
+        paper_cardboard_percent = excluded.paper_cardboard_percent,
+        plastic_percent = excluded.plastic_percent,
+        wood_percent = excluded.wood_percent,
+        batch_id = excluded.batch_id
+"""
+
+SELECT_RESULT_BY_HASH = """
+    SELECT metal_percent, mixed_waste_percent, paper_cardboard_percent,
+           plastic_percent, wood_percent
+    FROM analysis_history
+    WHERE image_hash = ? AND model_version = ? AND confidence = ?
+    ORDER BY id DESC
+    LIMIT 1
+"""
+
+SELECT_HISTORY = "SELECT * FROM analysis_history ORDER BY datetime ASC"
+
+# Most recently saved row; upserts refresh datetime but keep their id
+SELECT_LAST_SAVED_ID = """
+    SELECT id, datetime FROM analysis_history
+    ORDER BY datetime DESC, id DESC
+    LIMIT 1
+"""
+
+DELETE_BY_ID = "DELETE FROM analysis_history WHERE id = ?"
+
+COUNT_HISTORY = "SELECT COUNT(*) FROM analysis_history"
+
+DELETE_ALL_HISTORY = "DELETE FROM analysis_history"
+
+SELECT_BATCH = "SELECT * FROM analysis_history WHERE batch_id = ? ORDER BY id ASC"
+
+DELETE_BATCH = "DELETE FROM analysis_history WHERE batch_id = ?"
+
+# Same result as "WHERE source IS NULL OR model_version IS NULL", written as
+# a UNION so each branch can use its index instead of scanning the table
+BACKFILL_METADATA = """
+    UPDATE analysis_history
+    SET source = ?, model_version = ?
+    WHERE id IN (
+        SELECT id FROM analysis_history WHERE source IS NULL
+        UNION
+        SELECT id FROM analysis_history WHERE model_version IS NULL
+    )
+"""
+
+# -------------------------
+# History view (push-down filters, keyset pagination)
+# -------------------------
+# MIN and MAX as separate subqueries so each is a single index seek
+SELECT_HISTORY_BOUNDS = """
+    SELECT
+        (SELECT MIN(datetime) FROM analysis_history),
+        (SELECT MAX(datetime) FROM analysis_history)
+"""
+
+COUNT_HISTORY_RANGE = """
+    SELECT COUNT(*) FROM analysis_history
+    WHERE datetime >= ? AND datetime < ?
+"""
+
+# {columns} is filled from a whitelist; the lower bound is
+# max(range start, cursor datetime) so the index seeks straight to the page
+SELECT_HISTORY_PAGE = """
+    SELECT {columns} FROM analysis_history
+    WHERE datetime >= ? AND datetime < ?
+      AND (datetime > ? OR id > ?)
+    ORDER BY datetime ASC, id ASC
+    LIMIT ?
+"""
+
+SELECT_HISTORY_RANGE = """
+    SELECT {columns} FROM analysis_history
+    WHERE datetime >= ? AND datetime < ?
+    ORDER BY datetime ASC, id ASC
+"""
+
+# -------------------------
+# Rollups (per day / ISO week), maintained by triggers
+# -------------------------
+ROLLUP_CLASS_COLUMNS = ("metal", "mixed_waste", "paper_cardboard", "plastic", "wood")
+
+# Period name -> (table, SQL expression mapping a datetime to its bucket)
+ROLLUP_PERIODS = {
+    "daily": ("history_rollup_daily", "date({ts})"),
+    # Monday of the ISO week containing {ts}
+    "weekly": ("history_rollup_weekly", "date({ts}, '-6 days', 'weekday 1')"),
+}
+
+ROLLUP_UPDATE_COLUMNS = ", ".join(
+    ["datetime", "model_version", "source"]
+    + [f"{col}_percent" for col in ROLLUP_CLASS_COLUMNS]
+)
+
+def _rollup_key(period, row):
+    """WHERE clause matching the rollup row of ``row`` (NEW or OLD)."""
+    _, bucket = ROLLUP_PERIODS[period]
+    return (
+        f"period = {bucket.format(ts=f'{row}.datetime')} "
+        f"AND model_version = COALESCE({row}.model_version, '') "
+        f"AND source = COALESCE({row}.source, '')"
+    )
+
+def _rollup_add(period):
+    """Trigger statement adding NEW to its rollup row."""
+    table, bucket = ROLLUP_PERIODS[period]
+    sums = ", ".join(f"{col}_sum" for col in ROLLUP_CLASS_COLUMNS)
+    values = ", ".join(f"COALESCE(NEW.{col}_percent, 0)" for col in ROLLUP_CLASS_COLUMNS)
+    updates = ", ".join(
+        f"{col}_sum = {col}_sum + excluded.{col}_sum" for col in ROLLUP_CLASS_COLUMNS
+    )
+    return f"""
+        INSERT INTO {table} (period, model_version, source, samples, {sums})
+        SELECT {bucket.format(ts='NEW.datetime')},
+               COALESCE(NEW.model_version, ''), COALESCE(NEW.source, ''), 1, {values}
+        WHERE NEW.datetime IS NOT NULL
+        ON CONFLICT (period, model_version, source)
+        DO UPDATE SET samples = samples + 1, {updates};
+    """
+
+def _rollup_remove(period):
+    """Trigger statements subtracting OLD from its rollup row."""
+    table, _ = ROLLUP_PERIODS[period]
+    updates = ", ".join(
+        f"{col}_sum = {col}_sum - COALESCE(OLD.{col}_percent, 0)"
+        for col in ROLLUP_CLASS_COLUMNS
+    )
+    key = _rollup_key(period, "OLD")
+    return f"""
+        UPDATE {table} SET samples = samples - 1, {updates} WHERE {key};
+        DELETE FROM {table} WHERE {key} AND samples <= 0;
+    """
+
+def rollup_schema(period):
+    """
+    DDL for one rollup period: its table and the triggers that keep it in sync.
+
+    Args:
+        period (str): Key of ROLLUP_PERIODS.
+
+    Returns:
+        list[str]: Statements to execute in order.
+    """
+    table, _ = ROLLUP_PERIODS[period]
+    sums = ",\n".join(f"            {col}_sum REAL NOT NULL" for col in ROLLUP_CLASS_COLUMNS)
+
+    return [
+        f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            period TEXT NOT NULL,
+            model_version TEXT NOT NULL,
+            source TEXT NOT NULL,
+            samples INTEGER NOT NULL,
+{sums},
+            PRIMARY KEY (period, model_version, source)
+        ) WITHOUT ROWID
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_after_insert
+        AFTER INSERT ON analysis_history
+        BEGIN {_rollup_add(period)} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_after_delete
+        AFTER DELETE ON analysis_history
+        BEGIN {_rollup_remove(period)} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_after_update
+        AFTER UPDATE OF {ROLLUP_UPDATE_COLUMNS} ON analysis_history
+        BEGIN {_rollup_remove(period)} {_rollup_add(period)} END
+        """,
+    ]
+
+def rollup_rebuild(period):
+    """
+    Statements that recompute one rollup table from analysis_history.
+
+    Args:
+        period (str): Key of ROLLUP_PERIODS.
+
+    Returns:
+        list[str]: Statements to execute in order (inside one transaction).
+    """
+    table, bucket = ROLLUP_PERIODS[period]
+    sums = ", ".join(f"{col}_sum" for col in ROLLUP_CLASS_COLUMNS)
+    totals = ", ".join(
+        f"SUM(COALESCE({col}_percent, 0))" for col in ROLLUP_CLASS_COLUMNS
+    )
+
+    return [
+        f"DELETE FROM {table}",
+        f"""
+        INSERT INTO {table} (period, model_version, source, samples, {sums})
+        SELECT {bucket.format(ts='datetime')},
+               COALESCE(model_version, ''), COALESCE(source, ''), COUNT(*), {totals}
+        FROM analysis_history
+        WHERE datetime IS NOT NULL
+        GROUP BY 1, 2, 3
+        """,
+    ]
+
+def rollup_merge(period, source="analysis_history"):
+    """
+    Statement adding the rows of ``source`` in [?, ?) to one rollup table.
+
+    Used to keep archived records in the rollups: merged in before they are
+    deleted from the hot table (so the delete triggers cancel out), and
+    after a rebuild from a temporary copy of the archive.
+
+    Args:
+        period (str): Key of ROLLUP_PERIODS.
+        source (str, optional): Table with the analysis_history columns.
+
+    Returns:
+        str: INSERT ... ON CONFLICT statement taking the datetime bounds.
+    """
+    table, bucket = ROLLUP_PERIODS[period]
+    sums = ", ".join(f"{col}_sum" for col in ROLLUP_CLASS_COLUMNS)
+    totals = ", ".join(
+        f"SUM(COALESCE({col}_percent, 0))" for col in ROLLUP_CLASS_COLUMNS
+    )
+    updates = ", ".join(
+        f"{col}_sum = {col}_sum + excluded.{col}_sum" for col in ROLLUP_CLASS_COLUMNS
+    )
+
+    return f"""
+        INSERT INTO {table} (period, model_version, source, samples, {sums})
+        SELECT {bucket.format(ts='datetime')},
+               COALESCE(model_version, ''), COALESCE(source, ''), COUNT(*), {totals}
+        FROM {source}
+        WHERE datetime >= ? AND datetime < ?
+        GROUP BY 1, 2, 3
+        ON CONFLICT (period, model_version, source)
+        DO UPDATE SET samples = samples + excluded.samples, {updates}
+    """
+
+def rollup_subtract(period, source):
+    """
+    Statements removing the rows of ``source`` from one rollup table.
+
+    Used when archived records are deleted: they have no hot row left for
+    the delete triggers to subtract.
+
+    Args:
+        period (str): Key of ROLLUP_PERIODS.
+        source (str): Table with the analysis_history columns.
+
+    Returns:
+        list[str]: Statements to execute in order.
+    """
+    table, bucket = ROLLUP_PERIODS[period]
+    totals = ", ".join(
+        f"SUM(COALESCE({col}_percent, 0)) AS {col}_sum" for col in ROLLUP_CLASS_COLUMNS
+    )
+    updates = ", ".join(
+        f"{col}_sum = {table}.{col}_sum - removed.{col}_sum" for col in ROLLUP_CLASS_COLUMNS
+    )
+
+    return [
+        f"""
+        UPDATE {table} SET samples = {table}.samples - removed.samples, {updates}
+        FROM (
+            SELECT {bucket.format(ts='datetime')} AS period,
+                   COALESCE(model_version, '') AS model_version,
+                   COALESCE(source, '') AS source, COUNT(*) AS samples, {totals}
+            FROM {source}
+            WHERE datetime IS NOT NULL
+            GROUP BY 1, 2, 3
+        ) AS removed
+        WHERE {table}.period = removed.period
+          AND {table}.model_version = removed.model_version
+          AND {table}.source = removed.source
+        """,
+        f"DELETE FROM {table} WHERE samples <= 0",
+    ]
+
+def rollup_clear():
+    """Statements emptying every rollup table."""
+    return [f"DELETE FROM {table}" for table, _ in ROLLUP_PERIODS.values()]
+
+def select_rollup(period):
+    """
+    Query returning per-period sample counts and mean class percentages.
+
+    Named parameters :model_version and :source filter the rollup; pass
+    None to include every value.
+
+    Args:
+        period (str): Key of ROLLUP_PERIODS.
+
+    Returns:
+        str: SELECT statement with columns period, samples, <class>_percent.
+    """
+    table, _ = ROLLUP_PERIODS[period]
+    means = ", ".join(
+        f"SUM({col}_sum) / SUM(samples) AS {col}_percent" for col in ROLLUP_CLASS_COLUMNS
+    )
+
+    return f"""
+        SELECT period, SUM(samples) AS samples, {means}
+        FROM {table}
+        WHERE (:model_version IS NULL OR model_version = :model_version)
+          AND (:source IS NULL OR source = :source)
+        GROUP BY period
+        ORDER BY period ASC
+    """
+
+# Totals over the daily rollup plus one index seek for the latest record
+SELECT_HISTORY_SUMMARY = """
+    SELECT
+        COALESCE(SUM(samples), 0),
+        (SELECT MAX(datetime) FROM analysis_history),
+        {sums}
+    FROM history_rollup_daily
+""".format(
+    sums=", ".join(f"SUM({col}_sum)" for col in ROLLUP_CLASS_COLUMNS)
+)
+
+# -------------------------
+# Analytics buckets (app.db.analytics)
+# -------------------------
+# Frequency -> SQL expression mapping a datetime to the start of its bucket
+ANALYTICS_BUCKETS = {
+    "hour": "strftime('%Y-%m-%d %H:00:00', {ts})",
+    "day": ROLLUP_PERIODS["daily"][1],
+    "week": ROLLUP_PERIODS["weekly"][1],
+    "month": "strftime('%Y-%m-01', {ts})",
+}
+
+# Per-class sums and non-NULL counts, so bucket means skip missing values;
+# the same SQL runs on SQLite and DuckDB
+BUCKET_AGGREGATES = ", ".join(
+    f"SUM({col}_percent) AS {col}_percent_sum, COUNT({col}_percent) AS {col}_percent_count"
+    for col in ROLLUP_CLASS_COLUMNS
+)
+
+SELECT_HISTORY_BUCKETS = """
+    SELECT {bucket} AS bucket, COUNT(*) AS samples, """ + BUCKET_AGGREGATES + """
+    FROM analysis_history
+    WHERE datetime >= ? AND datetime < ?
+    GROUP BY bucket
+    ORDER BY bucket ASC
+"""
+
+# -------------------------
+# Detections (one row per detected instance)
+# -------------------------
+CREATE_DETECTIONS_TABLE = """
+    CREATE TABLE IF NOT EXISTS analysis_detections (
+        id INTEGER PRIMARY KEY,
+        analysis_id INTEGER NOT NULL
+            REFERENCES analysis_history (id) ON DELETE CASCADE,
+        class TEXT NOT NULL,
+        confidence REAL,
+        pixel_area INTEGER NOT NULL,
+        x1 REAL,
+        y1 REAL,
+        x2 REAL,
+        y2 REAL
+    )
+"""
+
+# Index name -> indexed columns; analysis_id also serves the cascade delete
+DETECTION_INDEXES = {
+    "idx_detections_analysis_id": "analysis_id",
+    "idx_detections_class": "class, confidence",
+}
+
+INSERT_DETECTION = """
+    INSERT INTO analysis_detections (
+        analysis_id, class, confidence, pixel_area, x1, y1, x2, y2
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# An upserted analysis replaces its detections
+DELETE_DETECTIONS_FOR = "DELETE FROM analysis_detections WHERE analysis_id = ?"
+
+SELECT_DETECTIONS_FOR = """
+    SELECT id, class, confidence, pixel_area, x1, y1, x2, y2
+    FROM analysis_detections
+    WHERE analysis_id = ?
+    ORDER BY id ASC
+"""
+
+# Per-class instance statistics for analyses saved in [start, end)
+SELECT_DETECTION_CLASS_STATS = """
+    SELECT
+        d.class,
+        COUNT(*) AS detections,
+        COUNT(DISTINCT d.analysis_id) AS images,
+        AVG(d.confidence) AS mean_confidence,
+        AVG(d.pixel_area) AS mean_pixel_area,
+        MIN(d.pixel_area) AS min_pixel_area,
+        MAX(d.pixel_area) AS max_pixel_area
+    FROM analysis_history AS h
+    JOIN analysis_detections AS d ON d.analysis_id = h.id
+    WHERE h.datetime >= ? AND h.datetime < ?
+    GROUP BY d.class
+    ORDER BY d.class ASC
+"""
+
+# Objects per image and class for analyses saved in [start, end)
+SELECT_DETECTION_COUNTS = """
+    SELECT h.id AS analysis_id, h.datetime, h.image, d.class, COUNT(*) AS objects
+    FROM analysis_history AS h
+    JOIN analysis_detections AS d ON d.analysis_id = h.id
+    WHERE h.datetime >= ? AND h.datetime < ?
+    GROUP BY h.datetime, h.id, d.class
+    ORDER BY h.datetime ASC, h.id ASC, d.class ASC
+"""
+
+# Instance sizes of one class (for size distributions), at or above a confidence
+SELECT_DETECTION_AREAS = """
+    SELECT pixel_area FROM analysis_detections
+    WHERE class = ? AND confidence >= ?
+"""
+
+# -------------------------
+# Change log feeding the DuckDB analytics mirror
+# -------------------------
+# Ids of analysis_history rows written since the mirror last synced. The
+# token identifies one log instance so a mirror built against a dropped
+# and recreated log reloads instead of applying unrelated sequence numbers.
+CHANGE_LOG_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS history_changes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        row_id INTEGER NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS history_changes_state (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        token TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS history_changes_after_insert
+    AFTER INSERT ON analysis_history
+    BEGIN INSERT INTO history_changes (row_id) VALUES (NEW.id); END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS history_changes_after_update
+    AFTER UPDATE ON analysis_history
+    BEGIN INSERT INTO history_changes (row_id) VALUES (NEW.id); END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS history_changes_after_delete
+    AFTER DELETE ON analysis_history
+    BEGIN INSERT INTO history_changes (row_id) VALUES (OLD.id); END
+    """,
+]
+
+DROP_CHANGE_LOG = [
+    "DROP TRIGGER IF EXISTS history_changes_after_insert",
+    "DROP TRIGGER IF EXISTS history_changes_after_update",
+    "DROP TRIGGER IF EXISTS history_changes_after_delete",
+    "DROP TABLE IF EXISTS history_changes",
+    "DROP TABLE IF EXISTS history_changes_state",
+]
+
+INSERT_CHANGE_LOG_TOKEN = "INSERT OR IGNORE INTO history_changes_state (id, token) VALUES (1, ?)"
+
+# (token, highest sequence number ever assigned)
+SELECT_CHANGE_LOG_STATE = """
+    SELECT
+        (SELECT token FROM history_changes_state WHERE id = 1),
+        (SELECT seq FROM sqlite_sequence WHERE name = 'history_changes')
+"""
+
+SELECT_CHANGED_IDS = """
+    SELECT DISTINCT row_id FROM history_changes
+    WHERE seq > ? AND seq <= ?
+"""
+
+SELECT_CHANGED_ROWS = """
+    SELECT {columns} FROM analysis_history
+    WHERE id IN (
+        SELECT row_id FROM history_changes WHERE seq > ? AND seq <= ?
+    )
+"""
+
+# Full copy for the initial mirror load (a deliberate full scan)
+SELECT_ALL_ROWS = "SELECT {columns} FROM analysis_history"
+
+PRUNE_CHANGE_LOG = "DELETE FROM history_changes WHERE seq <= ?"
+
+# -------------------------
+# Cold storage (Parquet archive catalog)
+# -------------------------
+# One row per Parquet file; path is relative to ARCHIVE_DIR and the
+# datetime bounds let readers open only the files overlapping a range
+CREATE_ARCHIVE_CATALOG = """
+    CREATE TABLE IF NOT EXISTS history_archive (
+        path TEXT PRIMARY KEY,
+        kind TEXT NOT NULL,
+        month TEXT NOT NULL,
+        rows INTEGER NOT NULL,
+        min_datetime TEXT NOT NULL,
+        max_datetime TEXT NOT NULL,
+        created_at TEXT NOT NULL
+    )
+"""
+
+INSERT_ARCHIVE_FILE = """
+    INSERT INTO history_archive (
+        path, kind, month, rows, min_datetime, max_datetime, created_at
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+SELECT_ARCHIVE_FILES = """
+    SELECT path, rows, min_datetime, max_datetime FROM history_archive
+    WHERE kind = ? AND max_datetime >= ? AND min_datetime < ?
+    ORDER BY min_datetime ASC, path ASC
+"""
+
+SELECT_ARCHIVE_BOUNDS = """
+    SELECT MIN(min_datetime), MAX(max_datetime) FROM history_archive
+    WHERE kind = 'history'
+"""
+
+# Months (YYYY-MM) holding hot records older than the cutoff
+SELECT_ARCHIVE_MONTHS = """
+    SELECT DISTINCT substr(datetime, 1, 7) FROM analysis_history
+    WHERE datetime < ?
+    ORDER BY 1
+"""
+
+SELECT_ARCHIVE_ROWS = """
+    SELECT {columns} FROM analysis_history
+    WHERE datetime >= ? AND datetime < ?
+    ORDER BY datetime ASC, id ASC
+"""
+
+SELECT_ARCHIVE_DETECTIONS = """
+    SELECT {columns}, h.datetime AS analysis_datetime
+    FROM analysis_detections d
+    JOIN analysis_history h ON h.id = d.analysis_id
+    WHERE h.datetime >= ? AND h.datetime < ?
+    ORDER BY h.datetime ASC, h.id ASC
+"""
+
+SELECT_ALL_ARCHIVE_FILES = "SELECT path FROM history_archive"
+
+DELETE_ARCHIVE_FILE = "DELETE FROM history_archive WHERE path = ?"
+
+DELETE_ARCHIVE_CATALOG = "DELETE FROM history_archive"
+
+DELETE_ARCHIVED_ROWS = """
+    DELETE FROM analysis_history
+    WHERE datetime >= ? AND datetime < ?
+"""
@@ -0,0 +1,168 @@
+"""
+Daily and weekly (ISO week, Monday start) rollups of analysis_history.
+
+Each rollup row holds the sample count and per-class percentage sums for
+one (period, model_version, source). Triggers on analysis_history keep the
+rows in sync with every insert, upsert, delete, undo and clear, so trend
+charts read a few hundred rows instead of the full history.
+
+Usage:
+    python -m app.db.rollup --rebuild
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from ..core.config import DB_PATH
+from ..core.logger import get_logger
+from .archive import archive_bounds, merge_archived_rollups
+from .connection import get_connection
+from .queries import (
+    ROLLUP_PERIODS,
+    ROLLUP_CLASS_COLUMNS,
+    SELECT_HISTORY_SUMMARY,
+    rollup_schema,
+    rollup_rebuild,
+    select_rollup,
+)
+
+logger = get_logger("db.rollup")
+
+# Column the period key is exposed as, matching prepare_time_series_data
+PERIOD_COLUMNS = {"daily": "date", "weekly": "week"}
+
+def _existing_tables(conn):
+    return {
+        row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    }
+
+def install_rollups(conn):
+    """
+    Create the rollup tables and their triggers on ``conn`` if missing.
+
+    A table that did not exist yet is filled from the current history, so
+    triggers and contents start out consistent. Runs inside the caller's
+    transaction.
+
+    Args:
+        conn (sqlite3.Connection): Open connection to the history database.
+    """
+    existing = _existing_tables(conn)
+
+    for period, (table, _) in ROLLUP_PERIODS.items():
+        for statement in rollup_schema(period):
+            conn.execute(statement)
+
+        if table not in existing:
+            for statement in rollup_rebuild(period):
+                conn.execute(statement)
+            logger.info(f"Rollup created | table={table}")
+
+def create_rollups():
+    """Create the rollup tables and their triggers if missing (see install_rollups)."""
+    with get_connection(DB_PATH) as conn:
+        install_rollups(conn)
+
+def rebuild_rollups():
+    """
+    Recompute every rollup table from analysis_history and the archive in
+    one transaction.
+
+    Returns:
+        dict: Period name -> number of rollup rows after the rebuild.
+    """
+    counts = {}
+
+    with get_connection(DB_PATH) as conn:
+        for period in ROLLUP_PERIODS:
+            for statement in rollup_rebuild(period):
+                conn.execute(statement)
+
+        # The rebuild only sees the hot table
+        merge_archived_rollups(conn)
+
+        for period, (table, _) in ROLLUP_PERIODS.items():
+            counts[period] = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    logger.info(f"Rollups rebuilt | rows={counts}")
+    return counts
+
+def load_rollup(period, model_version=None, source=None):
+    """
+    Load per-period mean class percentages from a rollup table.
+
+    Args:
+        period (str): "daily" or "weekly".
+        model_version (str, optional): Only include this model version.
+        source (str, optional): Only include this image source.
+
+    Returns:
+        pd.DataFrame: One row per period with a "date" (daily) or "week"
+            (weekly, Monday) datetime column, the <class>_percent means and
+            the number of samples.
+    """
+    if period not in ROLLUP_PERIODS:
+        raise ValueError(f"Unknown rollup period: {period!r}")
+
+    df = pd.read_sql_query(
+        select_rollup(period),
+        get_connection(DB_PATH),
+        params={"model_version": model_version, "source": source},
+    )
+
+    period_col = PERIOD_COLUMNS[period]
+    df = df.rename(columns={"period": period_col})
+    df[period_col] = pd.to_datetime(df[period_col])
+
+    percent_cols = [c for c in df.columns if c.endswith("_percent")]
+    return df[[period_col] + percent_cols + ["samples"]]
+
+def load_history_summary():
+    """
+    Headline history metrics from one aggregate query over the daily rollup.
+
+    Archived records stay counted in the rollup, so when the hot table is
+    empty ``latest`` falls back to the newest archived record.
+
+    Returns:
+        dict: ``total_images`` (int), ``latest`` (str or None, datetime of
+            the newest record) and ``class_sums`` (class key -> summed
+            percentage, keys as in DB_CLASS_MAP).
+    """
+    conn = get_connection(DB_PATH)
+    total_images, latest, *sums = conn.execute(SELECT_HISTORY_SUMMARY).fetchone()
+    if latest is None and total_images:
+        latest = archive_bounds(conn)[1]
+
+    return {
+        "total_images": total_images,
+        "latest": latest,
+        "class_sums": {
+            col: total or 0.0 for col, total in zip(ROLLUP_CLASS_COLUMNS, sums)
+        },
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the history rollup tables.")
+    parser.add_argument(
+        "--rebuild", action="store_true",
+        help="Recompute every rollup from analysis_history and the archive",
+    )
+    args = parser.parse_args()
+
+    if not args.rebuild:
+        parser.print_help()
+        return
+
+    start = time.perf_counter()
+    create_rollups()
+    counts = rebuild_rollups()
+    elapsed = time.perf_counter() - start
+
+    for period, rows in counts.items():
+        print(f"{period:7s} {rows} rows")
+    print(f"Rebuilt in {elapsed:.2f} s")
+
+if __name__ == "__main__":
+    main()
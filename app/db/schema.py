@@ -1,62 +1,163 @@
-import sqlite3
+import argparse
 
-from ..core.config import DB_PATH, IMAGE_SOURCE, MODEL_VERSION
+from ..core.config import DB_PATH, IMAGE_SOURCE, MODEL_VERSION, HISTORY_DEDUP
+from ..core.logger import get_logger
+from .connection import get_connection
+from .queries import (
+    CREATE_HISTORY_TABLE,
+    HISTORY_INDEXES,
+    BACKFILL_METADATA,
+    UNIQUE_RESULT_INDEX,
+    CREATE_UNIQUE_RESULT_INDEX,
+    DROP_UNIQUE_RESULT_INDEX,
+    COUNT_DUPLICATE_RESULTS,
+    DELETE_DUPLICATE_RESULTS,
+)
+
+logger = get_logger("db.schema")
 
 def create_tables():
     """Initialize SQLite database and create the analysis_history table if missing."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS analysis_history (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            datetime TEXT,
-            image TEXT,
-            image_hash TEXT,
-            source TEXT,
-            model_version TEXT,
-            confidence REAL,
-            metal_percent REAL,
-            mixed_waste_percent REAL,
-            paper_cardboard_percent REAL,
-            plastic_percent REAL,
-            wood_percent REAL
-        )
-    """)
-    conn.commit()
-    conn.close()
+    with get_connection(DB_PATH) as conn:
+        conn.execute(CREATE_HISTORY_TABLE)
 
-def migrate_db():
-    """Add missing columns (source, model_version, image_hash) to the database if they do not exist."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+# Columns added after the first release, in the order they were introduced
+ADDED_COLUMNS = {
+    "model_version": "TEXT",
+    "source": "TEXT",
+    "image_hash": "TEXT",
+    "batch_id": "TEXT",
+}
+
+def add_missing_columns(conn):
+    """
+    Add any of ADDED_COLUMNS that analysis_history does not have yet.
 
+    Args:
+        conn (sqlite3.Connection): Open connection to the history database.
+    """
     existing_cols = [
         row[1]
-        for row in cursor.execute("PRAGMA table_info(analysis_history)")
+        for row in conn.execute("PRAGMA table_info(analysis_history)")
     ]
 
-    if "model_version" not in existing_cols:
-        cursor.execute("ALTER TABLE analysis_history ADD COLUMN model_version TEXT")
+    for column, column_type in ADDED_COLUMNS.items():
+        if column not in existing_cols:
+            conn.execute(f"ALTER TABLE analysis_history ADD COLUMN {column} {column_type}")
+
+def migrate_db():
+    """Add missing columns (source, model_version, image_hash, batch_id) to the database if they do not exist."""
+    with get_connection(DB_PATH) as conn:
+        add_missing_columns(conn)
+
+def install_indexes(conn):
+    """
+    Create the analysis_history secondary indexes on ``conn`` if missing.
+
+    Args:
+        conn (sqlite3.Connection): Open connection to the history database.
+    """
+    for name, columns in HISTORY_INDEXES.items():
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} ON analysis_history ({columns})"
+        )
+
+def create_indexes():
+    """Create the analysis_history secondary indexes if missing and refresh planner statistics."""
+    with get_connection(DB_PATH) as conn:
+        install_indexes(conn)
+
+    # Runs ANALYZE only where statistics are missing or stale
+    get_connection(DB_PATH).execute("PRAGMA optimize")
+
+def dedup_enforced(conn):
+    """
+    Whether saves on ``conn`` upsert, i.e. the unique result index exists.
+
+    Args:
+        conn (sqlite3.Connection): Open connection to the history database.
 
-    if "source" not in existing_cols:
-        cursor.execute("ALTER TABLE analysis_history ADD COLUMN source TEXT")
+    Returns:
+        bool: True if UNIQUE_RESULT_INDEX is present.
+    """
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?",
+        (UNIQUE_RESULT_INDEX,)
+    ).fetchone() is not None
 
-    if "image_hash" not in existing_cols:
-        cursor.execute("ALTER TABLE analysis_history ADD COLUMN image_hash TEXT")
+def apply_dedup_policy():
+    """
+    Enforce (or lift) one record per (image_hash, model_version, confidence).
 
-    conn.commit()
-    conn.close()
+    With HISTORY_DEDUP enabled, a partial unique index is created so later
+    saves upsert. Existing records are never deleted here: if the history
+    already holds duplicates, the index is not created, saves keep
+    inserting, and a warning points to ``python -m app.db.schema --dedup``.
+    With the policy disabled, the unique index is dropped.
+
+    Returns:
+        bool: True if the policy is in force after the call.
+    """
+    with get_connection(DB_PATH) as conn:
+        if not HISTORY_DEDUP:
+            conn.execute(DROP_UNIQUE_RESULT_INDEX)
+            return False
+
+        if dedup_enforced(conn):
+            return True
+
+        duplicates = conn.execute(COUNT_DUPLICATE_RESULTS).fetchone()[0]
+        if duplicates:
+            logger.warning(
+                f"History de-duplication not enforced | duplicate_records={duplicates} "
+                f"| run 'python -m app.db.schema --dedup' to remove them"
+            )
+            return False
+
+        conn.execute(CREATE_UNIQUE_RESULT_INDEX)
+
+    logger.info("History de-duplication enforced")
+    return True
+
+def remove_duplicate_results():
+    """
+    Delete older duplicate records and enforce the unique result index.
+
+    Keeps the newest record of each (image_hash, model_version, confidence)
+    group; records without a hash are untouched. This permanently removes
+    history rows and is only run on request (``--dedup``).
+
+    Returns:
+        int: Number of records deleted.
+    """
+    with get_connection(DB_PATH) as conn:
+        removed = conn.execute(DELETE_DUPLICATE_RESULTS).rowcount
+        conn.execute(CREATE_UNIQUE_RESULT_INDEX)
+
+    logger.info(f"Duplicate results removed | deleted_records={removed}")
+    return removed
 
 def backfill_metadata():
     """Fill missing source and model_version fields for existing records in the database."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    with get_connection(DB_PATH) as conn:
+        conn.execute(BACKFILL_METADATA, (IMAGE_SOURCE, MODEL_VERSION))
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the history schema.")
+    parser.add_argument(
+        "--dedup", action="store_true",
+        help="Delete older duplicate results (newest kept) and enforce uniqueness",
+    )
+    args = parser.parse_args()
+
+    if not args.dedup:
+        parser.print_help()
+        return
+
+    from .migrations import init_db
+    init_db()
 
-    cursor.execute("""
-        UPDATE analysis_history
-        SET source = ?, model_version = ?
-        WHERE source IS NULL OR model_version IS NULL
-    """, (IMAGE_SOURCE, MODEL_VERSION))
+    print(f"Removed {remove_duplicate_results()} duplicate records")
 
-    conn.commit()
-    conn.close()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,414 @@
+"""
+Write-behind queue for history saves.
+
+One background thread owns every UI write to the history database. Saves
+are queued and return a ``concurrent.futures.Future`` at once; the writer
+groups whatever is queued (up to WRITE_BATCH_MAX saves, waiting at most
+WRITE_BATCH_WAIT_MS for more) into one transaction, and completes each
+future only after its transaction has committed. A failing group is
+retried one save at a time, so one bad row does not fail its neighbours.
+A save that still fails is not retried again: its future raises, and the
+caller must report it (the UI does so on its next rerun, see
+app.ui.pending_saves) or the save is lost.
+
+Grouping makes a stricter WRITE_SYNCHRONOUS affordable: one fsync covers a
+whole group. Saves still queued at interpreter exit are flushed.
+"""
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from datetime import datetime
+
+from ..core.config import (
+    DB_PATH,
+    WRITE_BEHIND,
+    WRITE_BATCH_MAX,
+    WRITE_BATCH_WAIT_MS,
+    WRITE_SYNCHRONOUS,
+)
+from ..core.logger import get_logger
+from .connection import get_connection
+from .database import save_to_db, save_batch_to_db, _history_row, _write_row
+
+logger = get_logger("db.writer")
+
+# Queue entry that stops the writer thread
+_STOP = object()
+
+@dataclass
+class WriterStats:
+    """
+    Snapshot of a HistoryWriter's counters.
+
+    Attributes:
+        queue_depth (int): Saves and jobs waiting in the queue.
+        submitted (int): Saves and jobs accepted so far.
+        committed (int): Saves and jobs completed successfully.
+        failed (int): Saves and jobs that raised.
+        transactions (int): Transactions committed.
+        last_commit_ms (float): Duration of the latest transaction.
+        mean_commit_ms (float): Mean transaction duration.
+        max_commit_ms (float): Slowest transaction.
+        mean_ack_ms (float): Mean time from submit to acknowledgement.
+    """
+    queue_depth: int
+    submitted: int
+    committed: int
+    failed: int
+    transactions: int
+    last_commit_ms: float
+    mean_commit_ms: float
+    max_commit_ms: float
+    mean_ack_ms: float
+
+class _Request:
+    """One queued unit of work: a history row, or a callable run on its own."""
+
+    __slots__ = ("row", "detections", "job", "future", "queued_at")
+
+    def __init__(self, row=None, detections=None, job=None):
+        self.row = row
+        self.detections = detections
+        self.job = job
+        self.future = Future()
+        self.queued_at = time.perf_counter()
+
+class HistoryWriter:
+    """
+    Background thread committing queued history saves in grouped transactions.
+
+    Args:
+        batch_max (int, optional): Saves per transaction at most.
+            Defaults to WRITE_BATCH_MAX.
+        batch_wait_ms (float, optional): How long to wait for more saves
+            after the first one of a group. Defaults to WRITE_BATCH_WAIT_MS.
+    """
+
+    def __init__(self, batch_max=WRITE_BATCH_MAX, batch_wait_ms=WRITE_BATCH_WAIT_MS):
+        self.batch_max = batch_max
+        self.batch_wait = batch_wait_ms / 1000
+
+        self._queue = queue.Queue()
+        self._conn = None
+        self._closed = False
+        self._lock = threading.Lock()
+        self._progress = threading.Condition(self._lock)
+
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._transactions = 0
+        self._commit_seconds = 0.0
+        self._last_commit = 0.0
+        self._max_commit = 0.0
+        self._ack_seconds = 0.0
+
+        self._thread = threading.Thread(
+            target=self._run,
+            name="history-writer",
+            daemon=True
+        )
+        self._thread.start()
+
+    # -------------------------
+    # Producer side
+    # -------------------------
+    def _put(self, request):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("History writer is closed")
+            self._submitted += 1
+            self._queue.put(request)
+        return request.future
+
+    def submit(self, image, image_hash, conf, percentages, detections=None):
+        """
+        Queue one analysis result (arguments as in ``save_to_db``).
+
+        The save time is taken now, not when the row is written.
+
+        Returns:
+            Future: Resolves to None once the row is committed, or raises
+                the error that prevented the save.
+        """
+        row = _history_row(
+            image,
+            image_hash,
+            conf,
+            percentages,
+            datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        )
+        return self._put(_Request(row=row, detections=detections))
+
+    def submit_batch(self, entries, conf, batch_id=None):
+        """
+        Queue a batch save (arguments as in ``save_batch_to_db``).
+
+        The batch keeps its own single transaction, run on the writer thread
+        between row groups.
+
+        Returns:
+            Future: Resolves to the BatchSaveResult.
+        """
+        entries = list(entries)
+        return self._put(_Request(job=lambda: save_batch_to_db(entries, conf, batch_id)))
+
+    def flush(self, timeout=None):
+        """
+        Wait until everything submitted so far is committed (or failed).
+
+        Args:
+            timeout (float, optional): Seconds to wait; None waits forever.
+
+        Returns:
+            bool: True if the queue drained in time.
+        """
+        with self._progress:
+            target = self._submitted
+            return self._progress.wait_for(
+                lambda: self._completed + self._failed >= target, timeout
+            )
+
+    def close(self, timeout=None):
+        """
+        Stop accepting saves, commit everything queued and stop the thread.
+
+        Args:
+            timeout (float, optional): Seconds to wait for the thread.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+
+        self._thread.join(timeout)
+        logger.info(f"History writer closed | {self.stats()}")
+
+    @property
+    def closed(self):
+        """Whether ``close`` has been called."""
+        return self._closed
+
+    def stats(self):
+        """Return a WriterStats snapshot."""
+        with self._lock:
+            done = self._completed + self._failed
+            return WriterStats(
+                queue_depth=self._queue.qsize(),
+                submitted=self._submitted,
+                committed=self._completed,
+                failed=self._failed,
+                transactions=self._transactions,
+                last_commit_ms=self._last_commit * 1000,
+                mean_commit_ms=(
+                    self._commit_seconds / self._transactions * 1000 if self._transactions else 0.0
+                ),
+                max_commit_ms=self._max_commit * 1000,
+                mean_ack_ms=self._ack_seconds / done * 1000 if done else 0.0,
+            )
+
+    # -------------------------
+    # Writer thread
+    # -------------------------
+    def _next_group(self, first):
+        """Collect up to batch_max requests arriving within batch_wait of ``first``."""
+        group = [first]
+        deadline = time.perf_counter() + self.batch_wait
+
+        while len(group) < self.batch_max:
+            remaining = deadline - time.perf_counter()
+            try:
+                request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            group.append(request)
+            if request is _STOP:
+                break
+
+        return group
+
+    def _run(self):
+        stopping = False
+
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+
+            group = self._next_group(first)
+            if group[-1] is _STOP:
+                stopping = True
+                group.pop()
+
+            # Consecutive row saves share a transaction; jobs run on their own
+            rows = []
+            for request in group:
+                if not request.future.set_running_or_notify_cancel():
+                    self._finish(request, cancelled=True)
+                elif request.job is None:
+                    rows.append(request)
+                else:
+                    self._commit_rows(rows)
+                    rows = []
+                    self._run_job(request)
+            self._commit_rows(rows)
+
+    def _connection(self):
+        """
+        Return the writer thread's connection, applying WRITE_SYNCHRONOUS
+        whenever it is (re)opened so row groups and batch jobs alike commit
+        at that durability.
+        """
+        conn = get_connection(DB_PATH)
+        if conn is not self._conn:
+            conn.execute(f"PRAGMA synchronous={WRITE_SYNCHRONOUS}")
+            self._conn = conn
+        return conn
+
+    def _commit_rows(self, requests):
+        if not requests:
+            return
+
+        try:
+            self._transaction(requests)
+        except Exception as e:
+            if len(requests) == 1:
+                self._fail(requests[0], e)
+                return
+
+            logger.warning(
+                f"Grouped save failed, retrying one by one | saves={len(requests)} | error={str(e)}"
+            )
+            for request in requests:
+                try:
+                    self._transaction([request])
+                except Exception as single_error:
+                    self._fail(request, single_error)
+
+    def _transaction(self, requests):
+        conn = self._connection()
+
+        start = time.perf_counter()
+        with conn:
+            for request in requests:
+                _write_row(conn, request.row, request.detections)
+        seconds = time.perf_counter() - start
+        self._record_commit(seconds)
+
+        logger.info(f"Saves committed | rows={len(requests)} | ms={seconds * 1000:.1f}")
+
+        for request in requests:
+            request.future.set_result(None)
+            self._finish(request)
+
+    def _run_job(self, request):
+        start = time.perf_counter()
+        try:
+            # Jobs reuse this thread's connection through get_connection
+            self._connection()
+            result = request.job()
+        except Exception as e:
+            self._fail(request, e)
+            return
+
+        self._record_commit(time.perf_counter() - start)
+        request.future.set_result(result)
+        self._finish(request)
+
+    def _fail(self, request, error):
+        logger.error(f"Queued save failed | error={str(error)}")
+        request.future.set_exception(error)
+        self._finish(request, failed=True)
+
+    def _record_commit(self, seconds):
+        with self._lock:
+            self._transactions += 1
+            self._commit_seconds += seconds
+            self._last_commit = seconds
+            self._max_commit = max(self._max_commit, seconds)
+
+    def _finish(self, request, failed=False, cancelled=False):
+        with self._progress:
+            if failed or cancelled:
+                self._failed += 1
+            else:
+                self._completed += 1
+            self._ack_seconds += time.perf_counter() - request.queued_at
+            self._progress.notify_all()
+
+# =========================
+# Process-wide writer
+# =========================
+_writer = None
+_writer_lock = threading.Lock()
+
+def get_writer():
+    """Return the process-wide HistoryWriter, starting it on first use."""
+    global _writer
+
+    with _writer_lock:
+        if _writer is None or _writer.closed:
+            _writer = HistoryWriter()
+            logger.info("History writer started")
+        return _writer
+
+def shutdown_writer(timeout=None):
+    """Commit queued saves and stop the process-wide writer (runs at exit)."""
+    with _writer_lock:
+        writer = _writer
+    if writer is not None:
+        writer.close(timeout)
+
+atexit.register(shutdown_writer)
+
+def _completed(fn, *args, **kwargs):
+    """Run ``fn`` now and wrap its outcome in a finished Future."""
+    future = Future()
+    try:
+        future.set_result(fn(*args, **kwargs))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+def queue_save(image, image_hash, conf, percentages, detections=None):
+    """
+    Save one analysis result through the writer (or inline without WRITE_BEHIND).
+
+    Returns:
+        Future: Resolves once the row is committed.
+    """
+    if not WRITE_BEHIND:
+        return _completed(save_to_db, image, image_hash, conf, percentages, detections=detections)
+    return get_writer().submit(image, image_hash, conf, percentages, detections)
+
+def queue_batch_save(entries, conf, batch_id=None):
+    """
+    Save a batch through the writer (or inline without WRITE_BEHIND).
+
+    Returns:
+        Future: Resolves to the BatchSaveResult.
+    """
+    if not WRITE_BEHIND:
+        return _completed(save_batch_to_db, entries, conf, batch_id)
+    return get_writer().submit_batch(entries, conf, batch_id)
+
+def flush_saves(timeout=None):
+    """
+    Wait for queued saves to commit, e.g. before an undo or clear.
+
+    Returns:
+        bool: True if nothing is left pending.
+    """
+    with _writer_lock:
+        writer = _writer
+    return writer is None or writer.flush(timeout)
+
+def writer_stats():
+    """Return the process-wide writer's WriterStats, or None if it never started."""
+    with _writer_lock:
+        writer = _writer
+    return writer.stats() if writer is not None else None
@@ -1,6 +1,6 @@
 from dataclasses import dataclass
 import numpy as np
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 @dataclass
 class SingleImageResult:
@@ -10,18 +10,25 @@ class SingleImageResult:
     Attributes:
         image_name (str): Filename of the analyzed image.
         image_hash (str): SHA256 hash of the image content.
-        image_rgb (np.ndarray): Original image in RGB format.
-        overlay (np.ndarray): Image overlay with detected masks.
+        image_rgb (np.ndarray): Original image in RGB format (a channel-reversed
+            view of the decoded BGR frame).
+        overlay (Optional[np.ndarray]): Image overlay with detected masks; None
+            when the vector overlay replaced it.
         percentages (Dict[str, float]): Class-wise pixel percentages.
         dominant (str): Dominant class in the image.
         overlay_bytes (Optional[bytes]): Optional overlay image in bytes.
         datetime (Optional[str]): Optional timestamp of analysis.
+        polygons (Optional[List[dict]]): Simplified mask polygons for vector overlays.
+        detections (Optional[List[dict]]): Per-instance class, confidence,
+            pixel area and box (see ``extract_detections``).
     """
     image_name: str
     image_hash: str
     image_rgb: np.ndarray
-    overlay: np.ndarray
+    overlay: Optional[np.ndarray]
     percentages: Dict[str, float]
     dominant: str
     overlay_bytes: Optional[bytes] = None  
     datetime: Optional[str] = None         
+    polygons: Optional[List[dict]] = None
+    detections: Optional[List[dict]] = None
@@ -1,4 +1,3 @@
-import cv2
 import io
 from PIL import Image
 from datetime import datetime
@@ -6,7 +5,12 @@ from datetime import datetime
 from ..core.logger import get_logger
 from ..core.preprocess import prepare_image_from_upload
 from ..core.inference import run_inference
-from ..core.postprocess import calculate_pixel_area, calculate_percentage
+from ..core.postprocess import (
+    calculate_pixel_area,
+    calculate_percentage,
+    extract_detections,
+    simplify_mask_polygons
+)
 from ..visualization.overlays import create_mask_overlay
 from .schema import SingleImageResult
 
@@ -24,6 +28,7 @@ def run_single_image_pipeline(
     visible_classes,
     max_width=MAX_IMAGE_WIDTH,
     max_height=MAX_IMAGE_HEIGHT,
+    vector_overlay=False,
 ):
     """
     Complete single-image analysis pipeline: prepare image, run inference,
@@ -36,6 +41,9 @@ def run_single_image_pipeline(
         visible_classes (list): Classes to include in overlay visualization.
         max_width (int, optional): Maximum image width. Defaults to MAX_IMAGE_WIDTH.
         max_height (int, optional): Maximum image height. Defaults to MAX_IMAGE_HEIGHT.
+        vector_overlay (bool, optional): The overlay is drawn in the browser from
+            the polygons, so the raster overlay and its PNG are skipped.
+            Defaults to False.
 
     Returns:
         SingleImageResult: Object containing processed image, overlay, 
@@ -63,14 +71,15 @@ def run_single_image_pipeline(
             logger.error("Invalid image upload")
             raise ValueError("Invalid image")
 
-        image_rgb = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB)
+        # RGB view for display and overlays; the model gets the BGR frame
+        image_rgb = image_bgr[..., ::-1]
         logger.info(f"Image prepared | name={safe_filename} | hash={image_hash}")
 
         # -------------------------
         # Run inference
         # -------------------------
         logger.info("Running inference")
-        results = run_inference(model, image_rgb, conf_thres)
+        results = run_inference(model, image_bgr, conf_thres)
 
         if results is None or results.masks is None or len(results.masks.data) == 0:
             logger.warning("No detection found")
@@ -102,31 +111,50 @@ def run_single_image_pipeline(
         )
         dominant = max(percentages, key=percentages.get)
 
-        logger.info(
-            f"Postprocess done | dominant={dominant} | percentages={percentages}"
+        polygons = simplify_mask_polygons(
+            getattr(results.masks, "xy", None), classes
         )
 
-        # -------------------------
-        # Create overlay
-        # -------------------------
-        overlay = create_mask_overlay(
-            image_rgb,
+        # Per-instance record for analytics (confidence/boxes when available)
+        confidences = getattr(results.boxes, "conf", None)
+        boxes_xyxy = getattr(results.boxes, "xyxy", None)
+        detections = extract_detections(
             masks,
             classes,
-            visible_classes,
-            class_names=CLASS_NAMES,
-            class_colors=CLASS_COLORS
+            confidences=confidences.cpu().numpy() if confidences is not None else None,
+            boxes_xyxy=boxes_xyxy.cpu().numpy() if boxes_xyxy is not None else None
+        )
+
+        logger.info(
+            f"Postprocess done | dominant={dominant} | percentages={percentages} | polygons={len(polygons)}"
         )
 
-        logger.info("Overlay created")
-        
         # -------------------------
-        # Convert overlay to bytes
+        # Create overlay
         # -------------------------
-        overlay_pil = Image.fromarray(overlay)
-        buf = io.BytesIO()
-        overlay_pil.save(buf, format="PNG")
-        overlay_bytes = buf.getvalue()
+        overlay = overlay_bytes = None
+
+        if vector_overlay:
+            logger.info("Raster overlay skipped | mode=vector")
+        else:
+            overlay = create_mask_overlay(
+                image_rgb,
+                masks,
+                classes,
+                visible_classes,
+                class_names=CLASS_NAMES,
+                class_colors=CLASS_COLORS
+            )
+
+            logger.info("Overlay created")
+
+            # -------------------------
+            # Convert overlay to bytes
+            # -------------------------
+            overlay_pil = Image.fromarray(overlay)
+            buf = io.BytesIO()
+            overlay_pil.save(buf, format="PNG")
+            overlay_bytes = buf.getvalue()
 
         result_datetime = datetime.now().isoformat()
 
@@ -141,6 +169,8 @@ def run_single_image_pipeline(
             percentages=percentages,
             dominant=dominant,
             datetime=result_datetime,
+            polygons=polygons,
+            detections=detections,
         )
 
     except Exception as e:
@@ -5,6 +5,7 @@ from .summary import render_data_summary
 from .history import render_history_section
 from .timeseries import render_time_series_section
 from .danger_zone import render_danger_zone
+from .pending_saves import report_pending_saves
 
 __all__ = [
     "render_sidebar",
@@ -14,4 +15,5 @@ __all__ = [
     "render_history_section",
     "render_time_series_section",
     "render_danger_zone",
+    "report_pending_saves",
 ]
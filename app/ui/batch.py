@@ -1,106 +1,327 @@
 import streamlit as st
 import cv2
 import json
-import zipfile
-from io import BytesIO
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from datetime import datetime
 
-from ..batch.processor import run_batch
-from ..core.config import MAX_IMAGE_WIDTH, MAX_IMAGE_HEIGHT, MODEL_VERSION
+from ..core.logger import get_logger
+from ..batch.processor import iter_batch
+from ..batch.schema import BatchResult
+from ..batch.artifacts import BatchArtifactStore
+from ..batch.export import (
+    BackgroundZipExporter,
+    JsonLinesWriter,
+    batch_record,
+    records_to_parquet
+)
+from ..core.config import (
+    MAX_IMAGE_WIDTH,
+    MAX_IMAGE_HEIGHT,
+    MODEL_VERSION,
+    REUSE_HISTORY_RESULTS,
+    WRITE_ACK_TIMEOUT_S
+)
 from ..visualization.renderer import render_analysis_result
-from ..db.database import save_to_db
+from ..visualization.delivery import encode_display_image
+from ..db.database import find_result_by_hash
+from ..db.writer import queue_batch_save
+from .pending_saves import track_save
 
-def run_batch_analysis(uploaded_files, model, conf_thres, visible_classes):
+# =========================
+# LOGGER
+# =========================
+logger = get_logger("ui.batch")
+
+def _batch_key(uploaded_files, conf_thres, visible_classes, overlay_mode="Raster"):
+    """
+    Identify a batch by its files and the settings that affect results.
+
+    Raster overlays bake the class selection into the images; vector
+    overlays keep every class's polygons and filter them when rendering,
+    so changing the selection does not reprocess a vector batch.
+    """
+    file_ids = tuple(
+        getattr(f, "file_id", None) or (getattr(f, "name", "unknown"), getattr(f, "size", None))
+        for f in uploaded_files
+    )
+    classes = tuple(visible_classes) if overlay_mode != "Vector" else None
+    return (file_ids, conf_thres, classes)
+
+def _get_batch_state(key):
+    """Return the session batch state, resetting it when the batch changes."""
+    state = st.session_state.get("batch_state")
+
+    if state is None or state["key"] != key:
+        if state is not None:
+            state["zip"].close()
+            state["jsonl"].close()
+            state["store"].close()
+            logger.info("Previous batch artifacts released")
+
+        state = {
+            "key": key,
+            "items": [],
+            "cancelled": False,
+            "store": BatchArtifactStore(),
+            "zip": BackgroundZipExporter(prefix="batch_overlays_"),
+            "jsonl": JsonLinesWriter(),
+            "parquet": None,
+        }
+        st.session_state.batch_state = state
+
+    return state
+
+def _compact_item(idx, item, store):
+    """
+    Move a rendered item's full-resolution data into the artifact store.
+
+    Keeps small display bytes on the item, stores the original array and the
+    overlay PNG (export-ready) in ``store``, then drops the arrays.
+    """
+    if item.error is not None or item.image_rgb is None:
+        return False
+
+    item.display = {
+        "image": encode_display_image(item.image_rgb),
+        "overlay": encode_display_image(item.overlay) if item.overlay is not None else None,
+    }
+
+    item.artifacts = {"image": f"{idx}/image"}
+    store.put(item.artifacts["image"], item.image_rgb)
+
+    # Reused results have no masks, and vector-mode results no raster
+    # overlay, so there is no overlay to export
+    if item.from_history or item.overlay is None:
+        item.release_images()
+        return True
+
+    success, buffer = cv2.imencode(".png", item.overlay[..., ::-1])
+    if success:
+        item.artifacts["overlay_png"] = f"{idx}/overlay_png"
+        store.put(item.artifacts["overlay_png"], buffer.tobytes())
+
+    item.release_images()
+    return True
+
+def _queue_overlay(exporter, item, store):
+    """Queue a compacted item's overlay PNG for the background ZIP."""
+    if item.artifacts and "overlay_png" in item.artifacts:
+        exporter.add(
+            f"{item.image}_overlay.png",
+            store.loader(item.artifacts["overlay_png"])
+        )
+
+def _full_resolution_sources(item, store):
+    """Map captions to in-memory arrays or lazy artifact-store loaders."""
+    if item.image_rgb is not None:
+        return {"Original Image": item.image_rgb, "Segmentation Result": item.overlay}
+
+    artifacts = item.artifacts or {}
+    return {
+        "Original Image": store.loader(artifacts["image"]) if "image" in artifacts else None,
+        "Segmentation Result": (
+            store.loader(artifacts["overlay_png"]) if "overlay_png" in artifacts else None
+        ),
+    }
+
+def _render_item(idx, item, store, conf_thres, visible_classes, overlay_mode):
+    """Render one batch result from its arrays or its compacted display bytes."""
+    with st.expander(f"📷 [{idx}] {item.image}"):
+        if item.error is not None:
+            st.error(f"❌ {item.error}")
+            return
+
+        if item.from_history:
+            st.info("♻️ Already analysed: stored percentages reused, no new overlay.")
+
+        images = item.display or {"image": item.image_rgb, "overlay": item.overlay}
+
+        render_analysis_result(
+            image_rgb=images["image"],
+            overlay=images["overlay"],
+            percentages=item.percentages,
+            dominant=item.dominant,
+            conf_thres=conf_thres,
+            visible_classes=visible_classes,
+            idx=idx,
+            polygons=item.polygons,
+            overlay_mode=overlay_mode,
+            image_size=item.image_size,
+            full_resolution=_full_resolution_sources(item, store)
+        )
+
+        st.divider()
+
+def _format_progress(progress):
+    """Build the progress bar label with throughput and ETA."""
+    return (
+        f"{progress.completed}/{progress.total} images · "
+        f"{progress.throughput:.2f} img/s · ETA {progress.eta:.0f}s"
+    )
+
+def run_batch_analysis(
+    uploaded_files, model, conf_thres, visible_classes, overlay_mode="Raster"
+):
     """
     Run the full batch analysis workflow in Streamlit.
 
     Steps:
-        1. Perform batch inference on uploaded images.
-        2. Display batch summary (total, success, failed).
-        3. Show results with overlays and dominant classes.
+        1. Stream batch inference, showing progress, throughput and ETA.
+        2. Show each result with overlays as soon as it is finished.
+        3. Display batch summary (total, success, failed).
         4. Provide download options for overlays (ZIP) and summary (JSON).
         5. Save successful results to database.
 
+    Results are kept in session state for the current batch, so reruns
+    (saving, cancelling, toggling widgets) do not reprocess the images.
+    Image arrays are released once rendered to keep memory flat.
+
     Args:
         uploaded_files: List of uploaded image files.
         model: Trained YOLO model.
         conf_thres (float): Confidence threshold for detections.
         visible_classes (list): Classes to display in overlays.
+        overlay_mode (str, optional): "Raster" or "Vector" overlay rendering.
     """
     st.subheader("📦 Batch Processing")
-    st.info("📦 Processing batch images...")
-
-    batch_result = run_batch(
-        files=uploaded_files,
-        model=model,
-        conf_thres=conf_thres,
-        visible_classes=visible_classes,
-        max_width=MAX_IMAGE_WIDTH,
-        max_height=MAX_IMAGE_HEIGHT
+
+    state = _get_batch_state(
+        _batch_key(uploaded_files, conf_thres, visible_classes, overlay_mode)
     )
+    items = state["items"]
+    store = state["store"]
+    total = len(uploaded_files)
+    pending = total - len(items)
 
-    st.success("✅ Batch processing completed")
+    # Clicking Cancel interrupts the running script with a rerun; results
+    # appended so far are kept and this run sees the flag before resuming
+    if pending and not state["cancelled"]:
+        if st.button("⏹️ Cancel Batch", use_container_width=True):
+            state["cancelled"] = True
+            logger.info(f"Batch cancel requested | completed={len(items)}/{total}")
 
-    st.subheader("📊 Batch Summary")
+    if pending and state["cancelled"]:
+        st.warning(f"⏹️ Batch cancelled after {len(items)} of {total} images.")
 
-    col1, col2, col3 = st.columns(3)
-    col1.metric("Total Images", batch_result.total_images)
-    col2.metric("Success", batch_result.success)
-    col3.metric("Failed", batch_result.failed)
+        if st.button("▶️ Resume Batch", use_container_width=True):
+            state["cancelled"] = False
 
-    st.caption("Batch inference completed. Results shown below.")
+            # The partial archive is final; rebuild it to include new results
+            state["zip"].close()
+            state["zip"] = BackgroundZipExporter(prefix="batch_overlays_")
+            for item in items:
+                _queue_overlay(state["zip"], item, store)
+
+            st.rerun()
+
+    summary_slot = st.container()
+    progress_slot = st.empty()
 
     st.divider()
     st.subheader("🖼️ Batch Results")
 
-    for idx, item in enumerate(batch_result.results, start=1):
-        with st.expander(f"📷 [{idx}] {item.image}"):
-            if item.error is not None:
-                st.error(f"❌ {item.error}")
-                continue
-
-            render_analysis_result(
-                image_rgb=item.image_rgb,
-                overlay=item.overlay,
-                percentages=item.percentages,
-                dominant=item.dominant,
-                conf_thres=conf_thres,
-                visible_classes=visible_classes,
-                idx=idx
-            )
+    for idx, item in enumerate(items, start=1):
+        _render_item(idx, item, store, conf_thres, visible_classes, overlay_mode)
+        if _compact_item(idx, item, store):
+            _queue_overlay(state["zip"], item, store)
 
-            st.divider()
+    if pending and not state["cancelled"]:
+        progress_bar = progress_slot.progress(
+            len(items) / total,
+            text=f"📦 Processing {pending} images..."
+        )
 
-    st.subheader("📤 Batch Export")
+        for item, progress in iter_batch(
+            uploaded_files[len(items):],
+            model,
+            conf_thres,
+            visible_classes,
+            MAX_IMAGE_WIDTH,
+            MAX_IMAGE_HEIGHT,
+            should_cancel=lambda: state["cancelled"],
+            vector_overlay=overlay_mode == "Vector",
+            start_index=len(items) + 1,
+            total=total,
+            lookup=(
+                (lambda image_hash: find_result_by_hash(image_hash, conf_thres))
+                if REUSE_HISTORY_RESULTS else None
+            ),
+        ):
+            items.append(item)
+            state["jsonl"].write(batch_record(item, conf_thres, MODEL_VERSION))
+            progress_bar.progress(progress.fraction, text=_format_progress(progress))
 
-    # ===== Create ZIP for overlay images =====
-    zip_buffer = BytesIO()
+            _render_item(progress.completed, item, store, conf_thres, visible_classes, overlay_mode)
+            if _compact_item(progress.completed, item, store):
+                _queue_overlay(state["zip"], item, store)
 
-    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
-        for item in batch_result.results:
-            if item.error is None:
-                overlay_bgr = cv2.cvtColor(item.overlay, cv2.COLOR_RGB2BGR)
-                success, buffer = cv2.imencode(".png", overlay_bgr)
+        progress_slot.success("✅ Batch processing completed")
 
-                if success:
-                    zip_file.writestr(
-                        f"{item.image}_overlay.png",
-                        buffer.tobytes()
-                    )
+    # All results so far are queued; let the archive complete
+    state["zip"].finish()
 
-    zip_buffer.seek(0)
+    success = sum(1 for item in items if item.error is None)
+    batch_result = BatchResult(
+        total_images=len(items),
+        success=success,
+        failed=len(items) - success,
+        results=items
+    )
 
-    has_overlays = batch_result.success > 0
+    with summary_slot:
+        st.subheader("📊 Batch Summary")
 
-    st.download_button(
-        label="🗂️ Download ALL Overlay Images (ZIP)",
-        data=zip_buffer,
-        file_name=f"batch_overlays_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
-        mime="application/zip",
-        use_container_width=True,
-        disabled=not has_overlays
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Total Images", total)
+        col2.metric("Success", batch_result.success)
+        col3.metric("Failed", batch_result.failed)
+
+        st.caption(
+            f"Processed {len(items)} of {total} images. Results shown below. "
+            f"Artifacts: {store.memory_bytes / 1e6:.1f} MB in memory, "
+            f"{store.disk_bytes / 1e6:.1f} MB on disk."
+        )
+
+    st.subheader("📤 Batch Export")
+
+    # ===== ZIP of overlay images (built in the background) =====
+    exporter = state["zip"]
+    has_overlays = any(
+        item.artifacts and "overlay_png" in item.artifacts for item in items
     )
 
+    # Polled, never waited on: a rerun must not block on the archive
+    if has_overlays and exporter.ready:
+        with open(exporter.path, "rb") as zip_file:
+            st.download_button(
+                label="🗂️ Download ALL Overlay Images (ZIP)",
+                data=zip_file,
+                file_name=f"batch_overlays_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
+                mime="application/zip",
+                use_container_width=True
+            )
+    else:
+        st.download_button(
+            label=(
+                "🗂️ Preparing overlay ZIP..." if has_overlays and exporter.error is None
+                else "🗂️ Download ALL Overlay Images (ZIP)"
+            ),
+            data=b"",
+            file_name="batch_overlays.zip",
+            mime="application/zip",
+            use_container_width=True,
+            disabled=True
+        )
+
+        if exporter.error is not None:
+            st.error(f"❌ ZIP export failed: {exporter.error}")
+        elif has_overlays:
+            st.caption("The overlay ZIP is still being written.")
+            if st.button("🔄 Check Again", key="batch_zip_refresh"):
+                st.rerun()
+        elif overlay_mode == "Vector" and batch_result.success > 0:
+            st.caption("Overlay images are only exported for results processed in Raster overlay mode.")
+
     batch_summary = {
         "batch_datetime": datetime.now().isoformat(),
         "total_images": batch_result.total_images,
@@ -134,6 +355,32 @@ def run_batch_analysis(uploaded_files, model, conf_thres, visible_classes):
         use_container_width=True
     )
 
+    # ===== Columnar / streaming exports =====
+    # Parquet is rebuilt only when new results arrived since the last rerun
+    if state["parquet"] is None or state["parquet"][0] != len(items):
+        records = [batch_record(item, conf_thres, MODEL_VERSION) for item in items]
+        state["parquet"] = (len(items), records_to_parquet(records))
+
+    col_jsonl, col_parquet = st.columns(2)
+
+    with col_jsonl, open(state["jsonl"].path, "rb") as jsonl_file:
+        st.download_button(
+            label="🧾 Download Results (JSON Lines)",
+            data=jsonl_file,
+            file_name=f"batch_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl",
+            mime="application/x-ndjson",
+            use_container_width=True
+        )
+
+    with col_parquet:
+        st.download_button(
+            label="📊 Download Results (Parquet)",
+            data=state["parquet"][1],
+            file_name=f"batch_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.parquet",
+            mime="application/vnd.apache.parquet",
+            use_container_width=True
+        )
+
     st.divider()
     st.subheader("💾 Batch Save")
 
@@ -144,18 +391,46 @@ def run_batch_analysis(uploaded_files, model, conf_thres, visible_classes):
         use_container_width=True,
         disabled=not can_save
     ):
+        unsaved = [
+            item for item in batch_result.results
+            if item.error is None and not item.saved
+        ]
+
+        def _unmark():
+            for item in unsaved:
+                item.saved = False
+
+        # Marked up front so a queued batch is not saved twice; a later
+        # failure unmarks the items for another attempt
+        for item in unsaved:
+            item.saved = True
+
         with st.spinner("Saving batch results to database..."):
-            saved_count = 0
-
-            for item in batch_result.results:
-                if item.error is None and not item.saved:
-                    save_to_db(
-                        item.image,
-                        None,
-                        conf_thres,
-                        item.percentages
-                    )
-                    item.saved = True
-                    saved_count += 1
-
-        st.success(f"✅ Saved {saved_count} records to history")
+            try:
+                future = queue_batch_save(
+                    [
+                        (item.image, item.image_hash, item.percentages, item.detections)
+                        for item in unsaved
+                    ],
+                    conf_thres
+                )
+                saved = future.result(timeout=WRITE_ACK_TIMEOUT_S)
+
+            except FuturesTimeoutError:
+                # Still queued; the outcome is reported on a later rerun
+                logger.info(f"Batch save queued | rows={len(unsaved)}")
+                track_save(future, f"batch of {len(unsaved)} results", on_failure=_unmark)
+                st.info("Batch save queued; it will appear in the history shortly.")
+                return
+
+            except Exception as e:
+                _unmark()
+                logger.error(f"Batch save failed | error={str(e)}", exc_info=True)
+                st.error("Failed to save batch results.")
+                return
+
+        st.success(
+            f"✅ Saved {saved.rows} records to history "
+            f"({saved.rows_per_second:,.0f} rows/s)"
+        )
+        st.caption(f"Batch ID: {saved.batch_id}")
@@ -1,6 +1,7 @@
 import streamlit as st
 
 from ..db.database import undo_last_save, clear_history
+from ..db.writer import flush_saves
 
 def render_danger_zone():
     """
@@ -40,6 +41,8 @@ def render_danger_zone():
         c1, c2 = st.columns(2)
 
         if c1.button("🔥 Yes, Proceed"):
+            # Queued saves must land first, so undo removes the latest one
+            flush_saves()
             if st.session_state.confirm_action == "undo":
                 undo_last_save()
             else:
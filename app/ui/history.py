@@ -3,7 +3,13 @@ import pandas as pd
 from datetime import datetime, date
 
 from ..core.logger import get_logger
-from ..db.database import load_history
+from ..db.cache import cached_read
+from ..db.database import (
+    get_history_bounds,
+    count_history,
+    load_history_page,
+    load_history_range
+)
 from ..core.config import DB_CLASS_MAP
 
 PAGE_SIZE = 20
@@ -13,6 +19,29 @@ PAGE_SIZE = 20
 # =========================
 logger = get_logger("ui.history")
 
+def _page_state(filter_key):
+    """Return keyset pagination state, resetting it when the filters change."""
+    state = st.session_state.get("history_pages")
+
+    if state is None or state["filters"] != filter_key:
+        # cursors[i] is the (datetime, id) after which page i + 1 starts
+        state = {"filters": filter_key, "cursors": [None], "last_key": None}
+        st.session_state.history_pages = state
+
+    return state
+
+def _next_page():
+    state = st.session_state.history_pages
+    if state["last_key"] is not None:
+        state["cursors"].append(state["last_key"])
+        logger.info(f"History pagination | next → page {len(state['cursors'])}")
+
+def _previous_page():
+    state = st.session_state.history_pages
+    if len(state["cursors"]) > 1:
+        state["cursors"].pop()
+        logger.info(f"History pagination | previous → page {len(state['cursors'])}")
+
 def render_history_section():
     """
     Render the historical records section in Streamlit with filters, pagination, and export.
@@ -22,9 +51,13 @@ def render_history_section():
         - Paginate results (default 20 records per page).
         - Display selected columns and percentages for visible classes.
         - Export filtered records as CSV.
-    
+
+    Filtering, column selection and ordering run in SQLite; each rerun reads
+    one page (keyset pagination on datetime/id) and an indexed COUNT, so page
+    turns cost the same however large the history grows.
+
     Uses:
-        - st.session_state.history_page for pagination.
+        - st.session_state.history_pages for pagination cursors.
         - DB_CLASS_MAP for class display mapping.
     """
     st.divider()
@@ -32,16 +65,13 @@ def render_history_section():
 
     logger.info("History section opened")
 
-    df_hist = load_history()
+    oldest, newest = cached_read(get_history_bounds)
 
-    if df_hist.empty:
+    if oldest is None:
         logger.info("History is empty")
         st.info("No historical records available.")
         return
 
-    df_hist["datetime"] = pd.to_datetime(df_hist["datetime"])
-    logger.info(f"Loaded history records | total={len(df_hist)}")
-
     # =========================
     # CLASS FILTER
     # =========================
@@ -57,8 +87,8 @@ def render_history_section():
     # =========================
     # DATE FILTER
     # =========================
-    min_date = df_hist["datetime"].min().date()
-    max_date = df_hist["datetime"].max().date()
+    min_date = pd.to_datetime(oldest).date()
+    max_date = pd.to_datetime(newest).date()
 
     date_range = st.date_input(
         "Select Date Range",
@@ -91,11 +121,6 @@ def render_history_section():
     # =========================
     # APPLY FILTERS
     # =========================
-    filtered_df = df_hist[
-        (df_hist["datetime"].dt.date >= start_date) &
-        (df_hist["datetime"].dt.date <= end_date)
-    ].copy()
-
     percent_cols = [f"{c}_percent" for c in DB_CLASS_MAP.keys()]
     class_cols_to_keep = [
         col for col in percent_cols
@@ -111,9 +136,10 @@ def render_history_section():
         "confidence"
     ]
 
-    filtered_df = filtered_df[base_cols + class_cols_to_keep]
+    columns = base_cols + class_cols_to_keep
+    total_rows = cached_read(count_history, start_date, end_date)
 
-    if filtered_df.empty:
+    if total_rows == 0:
         logger.info("No records after applying filters")
         st.info("No records match the selected filters.")
         return
@@ -121,22 +147,31 @@ def render_history_section():
     # =========================
     # PAGINATION
     # =========================
-    total_pages = (len(filtered_df) + PAGE_SIZE - 1) // PAGE_SIZE
-
-    if "history_page" not in st.session_state:
-        st.session_state.history_page = 1
+    total_pages = (total_rows + PAGE_SIZE - 1) // PAGE_SIZE
+
+    state = _page_state((start_date, end_date))
+    page = len(state["cursors"])
+
+    page_df = cached_read(
+        load_history_page,
+        start_date,
+        end_date,
+        columns=columns,
+        after=state["cursors"][-1],
+        limit=PAGE_SIZE
+    )
 
-    page = st.session_state.history_page
-    start_idx = (page - 1) * PAGE_SIZE
-    end_idx = start_idx + PAGE_SIZE
+    state["last_key"] = (
+        (page_df["datetime"].iloc[-1], int(page_df["id"].iloc[-1]))
+        if len(page_df) == PAGE_SIZE and page < total_pages else None
+    )
 
     logger.info(
-        f"Render history page | page={page}/{total_pages} | rows={len(filtered_df)}"
+        f"Render history page | page={page}/{total_pages} | rows={total_rows}"
     )
 
-    display_df = filtered_df.iloc[start_idx:end_idx]
-
-    display_df = display_df.drop(columns=["id"])
+    display_df = page_df[columns].drop(columns=["id"])
+    display_df["datetime"] = pd.to_datetime(display_df["datetime"])
 
     st.dataframe(
         display_df,
@@ -153,33 +188,29 @@ def render_history_section():
         st.write(" ")
 
     with col2:
-        if st.button("⬅️ Previous") and page > 1:
-            st.session_state.history_page -= 1
-            logger.info(
-                f"History pagination | previous → page {st.session_state.history_page}"
-            )
+        st.button("⬅️ Previous", on_click=_previous_page, disabled=page <= 1)
 
     with col3:
-        if st.button("Next ➡️") and page < total_pages:
-            st.session_state.history_page += 1
-            logger.info(
-                f"History pagination | next → page {st.session_state.history_page}"
-            )
+        st.button("Next ➡️", on_click=_next_page, disabled=state["last_key"] is None)
 
     # =========================
     # EXPORT CSV
     # =========================
     filename = f"filtered_waste_history_{datetime.now().strftime('%Y%m%d')}.csv"
 
-    st.download_button(
-        "⬇️ Export Records (CSV)",
-        filtered_df.to_csv(index=False).encode("utf-8"),
-        filename,
-        use_container_width=True
-    )
+    # The full filtered range is only read when an export is requested
+    if st.button("📄 Prepare CSV Export", use_container_width=True):
+        export_df = load_history_range(start_date, end_date, columns=columns)[columns]
 
-    logger.info(
-        f"History export triggered | rows={len(filtered_df)} | file={filename}"
-    )
+        st.download_button(
+            "⬇️ Export Records (CSV)",
+            export_df.to_csv(index=False).encode("utf-8"),
+            filename,
+            use_container_width=True
+        )
+
+        logger.info(
+            f"History export triggered | rows={len(export_df)} | file={filename}"
+        )
 
-    st.caption("Export historical records currently shown above.")
+    st.caption(f"Export all {total_rows} records matching the filters above.")
@@ -0,0 +1,52 @@
+import streamlit as st
+
+from ..core.logger import get_logger
+
+# =========================
+# LOGGER
+# =========================
+logger = get_logger("ui.pending_saves")
+
+def track_save(future, label, on_failure=None):
+    """
+    Remember a save that was not acknowledged in time, so its outcome is
+    reported on a later rerun.
+
+    Args:
+        future (Future): Future returned by queue_save / queue_batch_save.
+        label (str): What was saved, for the messages shown to the user.
+        on_failure (callable, optional): Called with no arguments if the save
+            fails, e.g. to let the user retry it.
+    """
+    st.session_state.setdefault("pending_saves", []).append((future, label, on_failure))
+
+def report_pending_saves():
+    """
+    Report tracked saves that finished since the last rerun.
+
+    Committed saves are confirmed with a toast, failed saves are shown as
+    errors (and their ``on_failure`` is called); saves still queued stay
+    tracked for the next rerun. Saves queued by a session that never reruns
+    are only reported in the writer's log.
+    """
+    pending = st.session_state.get("pending_saves")
+    if not pending:
+        return
+
+    waiting = []
+    for future, label, on_failure in pending:
+        if not future.done():
+            waiting.append((future, label, on_failure))
+            continue
+
+        error = None if future.cancelled() else future.exception()
+        if future.cancelled() or error is not None:
+            logger.error(f"Queued save failed | item={label} | error={str(error)}")
+            st.error(f"Failed to save {label}. Please save it again.")
+            if on_failure is not None:
+                on_failure()
+        else:
+            logger.info(f"Queued save committed | item={label}")
+            st.toast(f"Saved {label}.")
+
+    st.session_state.pending_saves = waiting
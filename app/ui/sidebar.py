@@ -1,5 +1,6 @@
 import streamlit as st
-from ..core.config import CLASS_NAMES
+from ..core.config import CLASS_NAMES, OVERLAY_MODES
+from ..db.writer import writer_stats
 
 def render_sidebar(mode_options=["Single Image", "Batch"]):
     """
@@ -8,14 +9,16 @@ def render_sidebar(mode_options=["Single Image", "Batch"]):
     Features:
         - Select analysis mode (Single Image or Batch).
         - Choose which mask classes to display.
+        - Choose raster or client-side vector overlay rendering.
         - Set confidence threshold for detections.
         - Upload image(s) depending on selected mode.
+        - Show the background save queue depth and commit latency.
 
     Args:
         mode_options (list, optional): List of analysis mode options. Defaults to ["Single Image", "Batch"].
 
     Returns:
-        tuple: (mode, visible_classes, conf_thres, uploaded_files)
+        tuple: (mode, visible_classes, overlay_mode, conf_thres, uploaded_files)
     """
     st.sidebar.header("Controls")
 
@@ -36,6 +39,14 @@ def render_sidebar(mode_options=["Single Image", "Batch"]):
         key="visible_mask_classes"
     )
 
+    overlay_mode = st.sidebar.radio(
+        "Overlay Rendering",
+        options=OVERLAY_MODES,
+        index=0,
+        horizontal=True,
+        help="Vector draws mask outlines in the browser; class toggles need no reprocessing."
+    )
+
     conf_thres = st.sidebar.slider(
         "Confidence Threshold",
         min_value=0.05,
@@ -58,7 +69,15 @@ def render_sidebar(mode_options=["Single Image", "Batch"]):
         )
         st.info(
             "📦 Batch mode processes multiple images sequentially. "
-            "Results will be summarized after completion."
+            "Results appear as each image finishes; the batch can be cancelled."
+        )
+
+    # Background save writer health (only once a save has started it)
+    stats = writer_stats()
+    if stats is not None:
+        st.sidebar.caption(
+            f"Save queue: {stats.queue_depth} pending | "
+            f"commit {stats.last_commit_ms:.0f} ms (mean {stats.mean_commit_ms:.0f} ms)"
         )
 
-    return mode, visible_classes, conf_thres, uploaded
+    return mode, visible_classes, overlay_mode, conf_thres, uploaded
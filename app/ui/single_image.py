@@ -1,21 +1,27 @@
 import streamlit as st
 import json
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 
 from ..core.logger import get_logger
 from ..pipelines.single_image import run_single_image_pipeline
 from ..core.config import (
     MAX_IMAGE_WIDTH,
     MAX_IMAGE_HEIGHT,
+    WRITE_ACK_TIMEOUT_S,
 )
 from ..visualization.renderer import render_analysis_result
-from ..db.database import save_to_db
+from ..visualization.delivery import show_image
+from ..db.writer import queue_save
+from .pending_saves import track_save
 
 # =========================
 # LOGGER
 # =========================
 logger = get_logger("ui.log")
 
-def run_single_image_analysis(uploaded_files, model, conf_thres, visible_classes):
+def run_single_image_analysis(
+    uploaded_files, model, conf_thres, visible_classes, overlay_mode="Raster"
+):
     """
     Streamlit UI wrapper for single image analysis workflow.
 
@@ -31,6 +37,7 @@ def run_single_image_analysis(uploaded_files, model, conf_thres, visible_classes
         model: Trained YOLO model.
         conf_thres (float): Confidence threshold for detections.
         visible_classes (list): Classes to display in overlay visualization.
+        overlay_mode (str, optional): "Raster" or "Vector" overlay rendering.
     """
     files = uploaded_files if isinstance(uploaded_files, list) else [uploaded_files]
 
@@ -48,6 +55,7 @@ def run_single_image_analysis(uploaded_files, model, conf_thres, visible_classes
                 visible_classes=visible_classes,
                 max_width=MAX_IMAGE_WIDTH,
                 max_height=MAX_IMAGE_HEIGHT,
+                vector_overlay=overlay_mode == "Vector",
             )
 
             logger.info(
@@ -64,11 +72,9 @@ def run_single_image_analysis(uploaded_files, model, conf_thres, visible_classes
         # =========================
         # PREVIEW
         # =========================
-        st.image(
-            result.image_rgb,
-            caption=f"Preview: {result.image_name}",
-            use_container_width=True,
-        )
+        # Same encoded bytes as the "Original Image" column, so the
+        # browser receives this image only once
+        show_image(st, result.image_rgb, caption=f"Preview: {result.image_name}")
 
         # =========================
         # RENDER ANALYSIS
@@ -80,6 +86,8 @@ def run_single_image_analysis(uploaded_files, model, conf_thres, visible_classes
             conf_thres=conf_thres,
             visible_classes=visible_classes,
             idx="single",
+            polygons=result.polygons,
+            overlay_mode=overlay_mode,
         )
 
         # =========================
@@ -89,17 +97,25 @@ def run_single_image_analysis(uploaded_files, model, conf_thres, visible_classes
 
             with st.spinner("Saving result..."):
                 try:
-                    save_to_db(
+                    saved = queue_save(
                         result.image_name,
                         result.image_hash,
                         conf_thres,
                         result.percentages,
+                        detections=result.detections,
                     )
+                    saved.result(timeout=WRITE_ACK_TIMEOUT_S)
                     logger.info(
                         f"Save success | image={result.image_name}"
                     )
                     st.success("Saved successfully.")
 
+                except FuturesTimeoutError:
+                    # Still queued; the outcome is reported on a later rerun
+                    logger.info(f"Save queued | image={result.image_name}")
+                    track_save(saved, result.image_name)
+                    st.info("Save queued; it will appear in the history shortly.")
+
                 except Exception as e:
                     logger.error(
                         f"Save failed | image={result.image_name} | error={str(e)}",
@@ -119,15 +135,18 @@ def _render_export(result, conf_thres):
 
     col_img, col_json = st.columns(2)
 
-    # Overlay image download
+    # Overlay image download (vector mode draws the overlay in the browser)
     with col_img:
         st.download_button(
             label="🖼️ Overlay Image",
-            data=result.overlay_bytes,
+            data=result.overlay_bytes or b"",
             file_name=f"{result.image_name}_overlay.png",
             mime="image/png",
-            use_container_width=True
+            use_container_width=True,
+            disabled=result.overlay_bytes is None
         )
+        if result.overlay_bytes is None:
+            st.caption("Switch to Raster overlay mode to export the overlay image.")
 
     # JSON summary download
     summary = {
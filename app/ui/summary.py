@@ -1,7 +1,8 @@
 import streamlit as st
 import pandas as pd
 
-from ..db.database import load_history
+from ..db.analytics import history_totals
+from ..db.cache import cached_read
 from ..core.config import DB_CLASS_MAP
 
 def render_data_summary():
@@ -15,27 +16,23 @@ def render_data_summary():
 
     Uses:
         - DB_CLASS_MAP for mapping column names to display names.
-        - load_history() to fetch historical analysis data.
+        - history_totals() for totals from the analytics engine (the rollup
+          tables on sqlite, one aggregate query on duckdb), through the
+          shared history cache (cached_read).
     """
     st.divider()
     st.subheader("📊 Data Summary")
 
-    df_hist_summary = load_history()
+    summary = cached_read(history_totals)
 
-    if df_hist_summary.empty:
+    if summary["total_images"] == 0:
         st.info("No data available for summary.")
         return
 
-    total_images = len(df_hist_summary)
-    df_hist_summary["datetime"] = pd.to_datetime(df_hist_summary["datetime"])
-    latest_datetime = df_hist_summary["datetime"].max()
+    total_images = summary["total_images"]
+    latest_datetime = pd.to_datetime(summary["latest"])
 
-    percent_cols = [c for c in df_hist_summary.columns if c.endswith("_percent")]
-    total_by_class = (
-        df_hist_summary[percent_cols]
-        .sum()
-        .rename(lambda x: x.replace("_percent", ""))
-    )
+    total_by_class = pd.Series(summary["class_sums"])
     most_common_class = total_by_class.rename(DB_CLASS_MAP).idxmax()
 
     s1, s2, s3 = st.columns(3)
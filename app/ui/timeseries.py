@@ -1,30 +1,85 @@
 import streamlit as st
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from ..core.logger import get_logger
-from ..db.database import load_history
-from ..core.config import CLASS_NAMES
+from ..db.analytics import get_engine, history_bucket_sums, history_frame
+from ..db.cache import cached_read
+from ..db.database import get_history_bounds
+from ..db.rollup import load_rollup
+from ..core.config import CLASS_NAMES, DB_CLASS_MAP, TREND_MAX_POINTS
 from ..visualization.timeseries import (
-    prepare_time_series_data,
-    create_time_series_chart
+    AGGREGATION_WINDOWS,
+    ROLLING_WINDOWS,
+    TIME_BUCKETS,
+    bucket_means,
+    downsample_time_series,
+    rolling_from_daily,
+    to_long,
+    create_time_series_chart,
+    rollup_to_long
 )
 
 PAGE_SIZE = 10
 
+PERCENT_COLUMNS = [f"{col}_percent" for col in DB_CLASS_MAP]
+
+# Aggregation mode -> (rollup period, time axis column)
+ROLLUP_MODES = {
+    "Daily Average": ("daily", "date"),
+    "Weekly Average": ("weekly", "week"),
+}
+
+# Resampling window -> analytics bucket frequency
+ENGINE_FREQS = {"hourly": "hour", "daily": "day", "weekly": "week", "monthly": "month"}
+
+AGGREGATION_MODES = [
+    "Raw (Per Image)",
+    "Hourly Average",
+    "Daily Average",
+    "Weekly Average",
+    "Monthly Average",
+    *ROLLING_WINDOWS,
+]
+
 # =========================
 # LOGGER
 # =========================
 logger = get_logger("ui.timeseries")
 
+def _zoom_range():
+    """Zoom slider over the whole history; None if it is empty."""
+    oldest, newest = cached_read(get_history_bounds)
+    if oldest is None:
+        return None
+
+    first, last = pd.Timestamp(oldest).to_pydatetime(), pd.Timestamp(newest).to_pydatetime()
+    if first >= last:
+        return first, last
+
+    return st.slider(
+        "Zoom Range",
+        min_value=first,
+        max_value=last,
+        value=(first, last),
+        step=timedelta(minutes=1),
+        format="YYYY-MM-DD HH:mm"
+    )
+
 def render_time_series_section():
     """
     Render temporal trends section with time series visualization.
 
     Features:
-        - Select aggregation mode: Raw, Daily, or Weekly averages.
+        - Select aggregation mode: Raw, hourly, daily, weekly or monthly
+          averages, or trailing rolling averages. Averages are aggregated
+          by the analytics engine (app.db.analytics), one row per bucket;
+          Daily/Weekly on the sqlite engine read the rollup tables. Weeks
+          start on Monday.
         - Choose waste class to visualize.
-        - Interactive Plotly chart of waste proportions over time.
+        - Interactive Plotly chart of waste proportions over time. Raw mode
+          loads only the selected zoom range and plots at most
+          TREND_MAX_POINTS points per class (LTTB).
         - Paginated table of aggregated results.
         - CSV export of current summary.
     """
@@ -35,23 +90,64 @@ def render_time_series_section():
 
     aggregation_mode = st.radio(
         "Time Series Aggregation",
-        ["Raw (Per Image)", "Daily Average", "Weekly Average"],
+        AGGREGATION_MODES,
         horizontal=True
     )
 
     logger.info(f"Aggregation mode selected | mode={aggregation_mode}")
 
-    df_hist = load_history()
+    df_agg = None
 
-    if df_hist.empty:
-        logger.info("Time series skipped | history is empty")
-        st.info("Not enough data to display time series.")
-        return
+    if aggregation_mode == "Raw (Per Image)":
+        zoom = _zoom_range()
+
+        if zoom is None:
+            logger.info("Time series skipped | history is empty")
+            st.info("Not enough data to display time series.")
+            return
+
+        start, end = zoom
+        # Whole days around the zoom range; the exact bounds are applied
+        # when downsampling
+        df_hist = cached_read(
+            history_frame, start.date(), end.date(), columns=["datetime", *PERCENT_COLUMNS]
+        )
+        logger.info(f"History loaded for time series | rows={len(df_hist)} | range={start}..{end}")
+        df_long = to_long(df_hist, "datetime")
+
+    elif aggregation_mode in ROLLUP_MODES and get_engine() == "sqlite":
+        period, period_col = ROLLUP_MODES[aggregation_mode]
+
+        # Pre-aggregated rows maintained by triggers, not the full history
+        df_agg = cached_read(load_rollup, period)
 
-    df_hist["datetime"] = pd.to_datetime(df_hist["datetime"])
-    logger.info(f"History loaded for time series | rows={len(df_hist)}")
+        if df_agg.empty:
+            logger.info("Time series skipped | history is empty")
+            st.info("Not enough data to display time series.")
+            return
 
-    df_agg, df_long = prepare_time_series_data(df_hist, aggregation_mode)
+        logger.info(f"Rollup loaded for time series | period={period} | rows={len(df_agg)}")
+        df_long = rollup_to_long(df_agg, period_col)
+
+    else:
+        # One row per bucket (per day for rolling windows) from the
+        # analytics engine's GROUP BY, not the records themselves
+        window = AGGREGATION_WINDOWS.get(aggregation_mode, "daily")
+        df_sums = cached_read(history_bucket_sums, ENGINE_FREQS[window])
+
+        if df_sums.empty:
+            logger.info("Time series skipped | history is empty")
+            st.info("Not enough data to display time series.")
+            return
+
+        logger.info(f"Buckets loaded for time series | window={window} | rows={len(df_sums)}")
+
+        if aggregation_mode in ROLLING_WINDOWS:
+            df_agg = rolling_from_daily(df_sums, ROLLING_WINDOWS[aggregation_mode])
+            df_long = to_long(df_agg, "date")
+        else:
+            df_agg = bucket_means(df_sums, window)
+            df_long = to_long(df_agg, TIME_BUCKETS[window][0])
 
     if df_long is None:
         logger.warning("Time series preparation failed | df_long is None")
@@ -79,14 +175,40 @@ def render_time_series_section():
     # PLOT CHART
     # =========================
     title = f"Waste Proportion Over Time ({aggregation_mode})"
-    fig = create_time_series_chart(df_long, selected, title)
+
+    if aggregation_mode == "Raw (Per Image)":
+        if selected != "All":
+            df_long = df_long[df_long["Class"] == selected]
+
+        # Bounded payload whatever the history size; a narrower range
+        # is re-sampled from its own records, so zooming adds detail
+        df_plot = downsample_time_series(df_long, TREND_MAX_POINTS, start, end)
+        visible = int(
+            (df_long["datetime"].between(start, end) & df_long["Percentage"].notna()).sum()
+        )
+        downsampled = len(df_plot) < visible
+
+        logger.info(
+            f"Raw series downsampled | points={len(df_plot)} | in_range={visible} | "
+            f"range={start}..{end}"
+        )
+
+        fig = create_time_series_chart(df_plot, selected, title, markers=not downsampled)
+    else:
+        fig = create_time_series_chart(df_long, selected, title)
 
     st.plotly_chart(fig, use_container_width=True)
 
     logger.info("Time series chart rendered")
 
     if aggregation_mode == "Raw (Per Image)":
-        st.caption("Each point represents the result from a single image.")
+        if downsampled:
+            st.caption(
+                f"Showing {len(df_plot):,} of {visible:,} points, downsampled to keep "
+                "peaks and dips. Narrow the zoom range to see every image."
+            )
+        else:
+            st.caption("Each point represents the result from a single image.")
 
     # =========================
     # TABLE + PAGINATION
@@ -1,3 +1,4 @@
 from .charts import *
+from .delivery import *
 from .overlays import *
 from .timeseries import *
@@ -0,0 +1,170 @@
+import cv2
+import hashlib
+import threading
+import numpy as np
+import streamlit as st
+from collections import OrderedDict
+
+from ..core.logger import get_logger
+from ..core.preprocess import resize_image_keep_ratio
+from ..core.config import (
+    DISPLAY_IMAGE_WIDTH,
+    DISPLAY_IMAGE_FORMAT,
+    DISPLAY_IMAGE_QUALITY,
+    DISPLAY_CACHE_MAX_MB,
+)
+
+# =========================
+# LOGGER
+# =========================
+logger = get_logger("visualization.delivery")
+
+# Encoder extension and quality flag per display format
+_ENCODERS = {
+    "JPEG": (".jpg", cv2.IMWRITE_JPEG_QUALITY),
+    "WEBP": (".webp", cv2.IMWRITE_WEBP_QUALITY),
+}
+
+# Process-wide LRU cache: (digest, width, format, quality) -> encoded bytes
+_cache = OrderedDict()
+_cache_bytes = 0
+_cache_lock = threading.Lock()
+
+def image_digest(image):
+    """
+    Compute a fast content digest of an image array.
+
+    Args:
+        image (np.ndarray): Image array of any shape and dtype.
+
+    Returns:
+        str: Hexadecimal BLAKE2b digest covering shape, dtype and pixels.
+    """
+    array = image
+    order = "C"
+
+    # Channel-reversed views (RGB over a BGR frame) hash their base, no copy
+    if (
+        array.ndim == 3
+        and not array.flags.c_contiguous
+        and array[..., ::-1].flags.c_contiguous
+    ):
+        array = array[..., ::-1]
+        order = "reversed"
+
+    array = np.ascontiguousarray(array)
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{array.shape}|{array.dtype}|{order}".encode("utf-8"))
+    digest.update(array.data)
+    return digest.hexdigest()
+
+def encode_display_image(
+    image_rgb,
+    max_width=DISPLAY_IMAGE_WIDTH,
+    fmt=DISPLAY_IMAGE_FORMAT,
+    quality=DISPLAY_IMAGE_QUALITY,
+):
+    """
+    Downsize an RGB image to display width and encode it once as JPEG/WebP.
+
+    Encoded bytes are cached by image digest, so identical images on a page
+    (or across reruns) are encoded once and share one browser media file.
+    Already-encoded bytes are passed through unchanged.
+
+    Args:
+        image_rgb (np.ndarray | bytes): Image in RGB format, shape (H, W, 3),
+            or previously encoded display bytes.
+        max_width (int, optional): Target display width in pixels.
+        fmt (str, optional): "JPEG" or "WEBP".
+        quality (int, optional): Encoder quality (0-100).
+
+    Returns:
+        bytes: Encoded image bytes.
+    """
+    global _cache_bytes
+
+    if isinstance(image_rgb, (bytes, bytearray)):
+        return bytes(image_rgb)
+
+    fmt = fmt.upper()
+    if fmt not in _ENCODERS:
+        raise ValueError(f"Unsupported display format: {fmt}")
+
+    key = (image_digest(image_rgb), max_width, fmt, quality)
+
+    with _cache_lock:
+        encoded = _cache.get(key)
+        if encoded is not None:
+            _cache.move_to_end(key)
+            return encoded
+
+    # Width-bound resize; height is left unconstrained
+    resized = resize_image_keep_ratio(
+        image_rgb, max_width, image_rgb.shape[0]
+    )
+
+    ext, quality_flag = _ENCODERS[fmt]
+    success, buffer = cv2.imencode(
+        ext,
+        resized[..., ::-1],
+        [quality_flag, int(quality)]
+    )
+
+    if not success:
+        raise ValueError(f"Failed to encode display image as {fmt}")
+
+    encoded = buffer.tobytes()
+
+    with _cache_lock:
+        if key not in _cache:
+            _cache[key] = encoded
+            _cache_bytes += len(encoded)
+
+        max_bytes = DISPLAY_CACHE_MAX_MB * 1024 * 1024
+        while _cache_bytes > max_bytes and len(_cache) > 1:
+            _, evicted = _cache.popitem(last=False)
+            _cache_bytes -= len(evicted)
+
+    return encoded
+
+def show_image(container, image_rgb, caption=None):
+    """
+    Display an RGB image at display resolution.
+
+    Args:
+        container: Streamlit container or column (e.g., ``st`` or ``st.columns(...)[i]``).
+        image_rgb (np.ndarray | bytes): Image in RGB format or encoded bytes.
+        caption (str, optional): Caption shown below the image.
+    """
+    container.image(
+        encode_display_image(image_rgb),
+        caption=caption,
+        use_container_width=True
+    )
+
+def render_full_resolution(images, key):
+    """
+    Render full-resolution images only when explicitly requested by the user.
+
+    Args:
+        images (dict): Mapping of caption to an RGB image, encoded image
+            bytes, or a zero-argument loader returning either. Loaders are
+            only called when the user asks; None results are skipped.
+        key: Unique identifier for the Streamlit toggle widget.
+    """
+    if not st.checkbox("🔍 Show full resolution", key=f"full_res_{key}"):
+        return
+
+    logger.info(f"Full resolution requested | key={key}")
+
+    for caption, image in images.items():
+        if callable(image):
+            image = image()
+        if image is None:
+            continue
+        st.image(
+            image,
+            caption=f"{caption} (full resolution)",
+            output_format="PNG"
+        )
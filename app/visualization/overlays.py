@@ -1,6 +1,9 @@
+import base64
 import numpy as np
+import plotly.graph_objects as go
 from ..core.preprocess import hex_to_rgb
-from ..core.config import CLASS_NAMES, CLASS_COLORS, DB_CLASS_MAP
+from ..core.config import CLASS_NAMES, CLASS_COLORS, DB_CLASS_MAP, DISPLAY_IMAGE_FORMAT
+from .delivery import encode_display_image
 
 def create_mask_overlay(
     image_rgb,
@@ -45,3 +48,98 @@ def create_mask_overlay(
 
     overlay = np.clip(overlay, 0, 255).astype(np.uint8)
     return overlay
+
+def create_vector_overlay(
+    image_rgb,
+    polygons,
+    visible_classes,
+    class_names=CLASS_NAMES,
+    class_colors=CLASS_COLORS,
+    alpha=0.4,
+    image_size=None
+):
+    """
+    Build a Plotly figure that draws mask polygons over the base image in the browser.
+
+    Each class is one filled trace, so toggling classes in the legend happens
+    client-side without a server rerun or re-encoding the image.
+
+    Args:
+        image_rgb (np.ndarray | bytes): Original image in RGB format, shape (H, W, 3),
+            or its display-encoded bytes.
+        polygons (list[dict]): Simplified polygons from ``simplify_mask_polygons``.
+        visible_classes (list[str]): Classes initially shown; others start hidden.
+        class_names (list[str], optional): Class display names. Defaults to CLASS_NAMES.
+        class_colors (dict[str, str], optional): Hex colors for each class. Defaults to CLASS_COLORS.
+        alpha (float, optional): Fill opacity of the polygons. Defaults to 0.4.
+        image_size (tuple[int, int], optional): (width, height) of the frame the
+            polygons refer to. Required when ``image_rgb`` is encoded bytes.
+
+    Returns:
+        plotly.graph_objects.Figure: Figure with the base image and one trace per class.
+    """
+    if image_size is not None:
+        width, height = image_size
+    else:
+        height, width = image_rgb.shape[:2]
+
+    base64_image = base64.b64encode(encode_display_image(image_rgb)).decode("ascii")
+    mime = "image/webp" if DISPLAY_IMAGE_FORMAT.upper() == "WEBP" else "image/jpeg"
+
+    fig = go.Figure()
+
+    for display_name in class_names:
+        xs, ys = [], []
+
+        for polygon in polygons:
+            if polygon["class"] != display_name:
+                continue
+
+            points = polygon["points"]
+            # Close the ring and separate polygons with None
+            xs.extend([p[0] for p in points] + [points[0][0], None])
+            ys.extend([p[1] for p in points] + [points[0][1], None])
+
+        if not xs:
+            continue
+
+        r, g, b = hex_to_rgb(class_colors[display_name])
+
+        fig.add_trace(go.Scatter(
+            x=xs,
+            y=ys,
+            mode="lines",
+            fill="toself",
+            fillcolor=f"rgba({r},{g},{b},{alpha})",
+            line=dict(color=class_colors[display_name], width=1),
+            name=display_name,
+            hoverinfo="name",
+            visible=True if display_name in visible_classes else "legendonly"
+        ))
+
+    fig.add_layout_image(
+        source=f"data:{mime};base64,{base64_image}",
+        xref="x",
+        yref="y",
+        x=0,
+        y=0,
+        sizex=width,
+        sizey=height,
+        sizing="stretch",
+        layer="below"
+    )
+
+    fig.update_xaxes(range=[0, width], visible=False, constrain="domain")
+    fig.update_yaxes(
+        range=[height, 0],
+        visible=False,
+        scaleanchor="x",
+        constrain="domain"
+    )
+    fig.update_layout(
+        margin=dict(l=0, r=0, t=0, b=0),
+        legend=dict(orientation="h", yanchor="bottom", y=1.0),
+        plot_bgcolor="rgba(0,0,0,0)"
+    )
+
+    return fig
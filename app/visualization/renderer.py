@@ -4,6 +4,8 @@ from .charts import (
     create_composition_donut,
     create_proportion_bar
 )
+from .delivery import show_image, render_full_resolution
+from .overlays import create_vector_overlay
 
 def render_analysis_result(
     *,
@@ -13,39 +15,58 @@ def render_analysis_result(
     dominant,
     conf_thres,
     visible_classes,
-    idx
+    idx,
+    polygons=None,
+    overlay_mode="Raster",
+    image_size=None,
+    full_resolution=None
 ):
     """
-    Overlay segmentation masks on an RGB image.
+    Shared renderer for Single & Batch results.
 
     Args:
-        image_rgb (np.ndarray): Original image in RGB format, shape (H, W, 3).
-        masks (np.ndarray): Boolean masks of detected objects, shape (N, H, W).
-        classes (np.ndarray): Array of class IDs corresponding to each mask, shape (N,).
-        visible_classes (list[str]): List of class names to display in the overlay.
-        class_names (list[str], optional): Mapping of class IDs to display names. Defaults to CLASS_NAMES.
-        class_colors (dict[str, str], optional): Hex colors for each class. Defaults to CLASS_COLORS.
-        alpha (float, optional): Transparency factor for overlay (0 = invisible, 1 = fully colored). Defaults to 0.4.
-
-    Returns:
-        np.ndarray: Image with colored mask overlay, dtype=np.uint8, shape (H, W, 3).
-    """
-    """
-    Shared renderer for Single & Batch results
-    idx: unique identifier for Streamlit keys
+        image_rgb (np.ndarray | bytes): Original image in RGB format, shape (H, W, 3),
+            or its display-encoded bytes.
+        overlay (np.ndarray | bytes | None): Image with raster mask overlay, or its
+            display-encoded bytes. None if only the vector overlay was made.
+        percentages (dict[str, float]): Class-wise pixel percentages.
+        dominant (str): Dominant waste class.
+        conf_thres (float): Confidence threshold used for inference.
+        visible_classes (list[str]): Classes selected for display.
+        idx: Unique identifier for Streamlit keys.
+        polygons (list[dict], optional): Simplified mask polygons for vector mode.
+        overlay_mode (str, optional): "Raster" (server-rendered image) or
+            "Vector" (polygons drawn in the browser). Defaults to "Raster".
+        image_size (tuple[int, int], optional): (width, height) of the analysed
+            frame; needed for vector mode when images are passed as bytes.
+        full_resolution (dict, optional): Images offered in full resolution on
+            demand. Defaults to the original image and overlay.
     """
     # === IMAGES ===
-    c = st.columns([1, 2, 2, 1])
-    c[1].image(
-        image_rgb,
-        caption="Original Image",
-        use_container_width=True
-    )
-    c[2].image(
-        overlay,
-        caption="Segmentation Result",
-        use_container_width=True
-    )
+    if (overlay_mode == "Vector" or overlay is None) and polygons is not None:
+        # The figure embeds the image itself; hiding every class in the
+        # legend shows the original, so it is not sent a second time
+        c = st.columns([1, 4, 1])
+        c[1].plotly_chart(
+            create_vector_overlay(
+                image_rgb, polygons, visible_classes, image_size=image_size
+            ),
+            use_container_width=True,
+            key=f"vector_{idx}"
+        )
+        c[1].caption("Original Image with Segmentation (click legend to toggle classes)")
+    else:
+        c = st.columns([1, 2, 2, 1])
+        show_image(c[1], image_rgb, caption="Original Image")
+        show_image(c[2], overlay, caption="Segmentation Result")
+
+    if full_resolution is None:
+        full_resolution = {
+            "Original Image": image_rgb,
+            "Segmentation Result": overlay
+        }
+
+    render_full_resolution(full_resolution, key=idx)
 
     if len(visible_classes) == 0:
         st.warning("All mask classes are hidden. No overlay is displayed.")
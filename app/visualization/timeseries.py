@@ -1,38 +1,42 @@
+import numpy as np
+import pandas as pd
 import plotly.express as px
-from ..core.config import CLASS_COLORS
+from ..core.config import CLASS_COLORS, DB_CLASS_MAP, TREND_MAX_POINTS, TREND_ROLLING_DAYS
 
-def create_time_series_chart(df_long, selected_class, chart_title):
+def create_time_series_chart(df_long, selected_class, chart_title, markers=True):
     """
     Create a time series line chart for waste proportions.
 
     Args:
         df_long (pd.DataFrame): Long-format DataFrame with columns:
-            - 'datetime' / 'date' / 'week': time axis
+            - one of TIME_AXES: time axis
             - 'Class': waste class name
             - 'Percentage': class proportion
         selected_class (str): Class to display. Use "All" to show all classes.
         chart_title (str): Title of the chart.
+        markers (bool): Draw a marker on every point.
 
     Returns:
         plotly.graph_objs._figure.Figure: Interactive Plotly line chart.
     """
+    x_col = next(col for col in TIME_AXES if col in df_long.columns)
+
     if selected_class == "All":
         fig = px.line(
             df_long,
-            x="datetime" if "datetime" in df_long.columns else "date" if "date" in df_long.columns else "week",
+            x=x_col,
             y="Percentage",
             color="Class",
-            markers=True,
+            markers=markers,
             title=chart_title,
             color_discrete_map=CLASS_COLORS
         )
     else:
-        x_col = "datetime" if "datetime" in df_long.columns else "date" if "date" in df_long.columns else "week"
         fig = px.line(
             df_long[df_long["Class"] == selected_class],
             x=x_col,
             y="Percentage",
-            markers=True,
+            markers=markers,
             title=chart_title,
             color_discrete_sequence=[CLASS_COLORS[selected_class]]
         )
@@ -40,86 +44,329 @@ def create_time_series_chart(df_long, selected_class, chart_title):
     fig.update_layout(hovermode="x unified")
     return fig
 
+def _floor_hour(ts):
+    return ts.dt.floor("h")
+
+def _floor_day(ts):
+    return ts.dt.floor("D")
+
+def _floor_week(ts):
+    """Monday of the ISO week, as in the weekly rollup."""
+    return ts.dt.floor("D") - pd.to_timedelta(ts.dt.dayofweek, unit="D")
+
+def _floor_month(ts):
+    return ts.dt.floor("D") - pd.to_timedelta(ts.dt.day - 1, unit="D")
+
+# Resampling window -> (time axis column, vectorized floor of a datetime Series)
+TIME_BUCKETS = {
+    "hourly": ("hour", _floor_hour),
+    "daily": ("date", _floor_day),
+    "weekly": ("week", _floor_week),
+    "monthly": ("month", _floor_month),
+}
+
+# Aggregation mode (UI label) -> resampling window
+AGGREGATION_WINDOWS = {
+    "Hourly Average": "hourly",
+    "Daily Average": "daily",
+    "Weekly Average": "weekly",
+    "Monthly Average": "monthly",
+}
+
+# Aggregation mode (UI label) -> rolling window length in days
+ROLLING_WINDOWS = {f"Rolling {days}-Day Average": days for days in TREND_ROLLING_DAYS}
+
+# Time axis columns create_time_series_chart recognises, in priority order
+TIME_AXES = ("datetime", "hour", "date", "week", "month")
+
+def _percent_columns(df):
+    return [c for c in df.columns if c.endswith("_percent")]
+
+def to_long(df, time_col):
+    """
+    Reshape one-column-per-class data to long format in a single pass.
+
+    Equivalent to ``melt`` followed by mapping column names to class display
+    names, but builds the columns directly with numpy: the class column is a
+    categorical built from codes, so no per-row string work is done.
+
+    Args:
+        df (pd.DataFrame): A time axis column, <class>_percent columns and
+            optionally a samples column.
+        time_col (str): Name of the time axis column.
+
+    Returns:
+        pd.DataFrame: Columns [time_col, ('samples'), 'Class', 'Percentage'],
+            grouped by class in column order.
+    """
+    percent_cols = _percent_columns(df)
+    rows, classes = len(df), len(percent_cols)
+
+    long = {time_col: np.tile(df[time_col].to_numpy(), classes)}
+    if "samples" in df.columns:
+        long["samples"] = np.tile(df["samples"].to_numpy(), classes)
+
+    long["Class"] = pd.Categorical.from_codes(
+        np.repeat(np.arange(classes), rows),
+        categories=[DB_CLASS_MAP[c.removesuffix("_percent")] for c in percent_cols],
+    )
+    # Column-major flatten: every row of the first class, then the next
+    long["Percentage"] = df[percent_cols].to_numpy(dtype="float64").reshape(-1, order="F")
+
+    return pd.DataFrame(long)
+
+def bucket_time_series(df_hist, window):
+    """
+    Mean class percentages and sample counts per time bucket.
+
+    Buckets come from a vectorized floor of the datetime column (weeks start
+    on Monday); missing percentages are left out of the means. The input is
+    not modified.
+
+    Args:
+        df_hist (pd.DataFrame): Records with a datetime64 "datetime" column
+            and <class>_percent columns.
+        window (str): Key of TIME_BUCKETS.
+
+    Returns:
+        pd.DataFrame: One row per non-empty bucket, in time order, with the
+            bucket column (see TIME_BUCKETS), the <class>_percent means and
+            samples.
+    """
+    if window not in TIME_BUCKETS:
+        raise ValueError(f"Unknown resampling window: {window!r}")
+
+    time_col, floor = TIME_BUCKETS[window]
+    percent_cols = _percent_columns(df_hist)
+
+    grouped = df_hist[percent_cols].groupby(floor(df_hist["datetime"]).rename(time_col))
+    df_agg = grouped.mean()
+    df_agg["samples"] = grouped.size()
+
+    return df_agg.reset_index()
+
+def bucket_means(df_sums, window):
+    """
+    Bucket summary from per-bucket sums, as ``bucket_time_series`` returns.
+
+    Args:
+        df_sums (pd.DataFrame): Columns bucket, samples, <class>_percent_sum
+            and <class>_percent_count (see
+            app.db.analytics.history_bucket_sums).
+        window (str): Key of TIME_BUCKETS, naming the time axis column.
+
+    Returns:
+        pd.DataFrame: The bucket column, <class>_percent means (missing if a
+            bucket has no value for the class) and samples.
+    """
+    time_col, _ = TIME_BUCKETS[window]
+    percent_cols = [c.removesuffix("_sum") for c in df_sums.columns if c.endswith("_percent_sum")]
+
+    sums = df_sums[[f"{c}_sum" for c in percent_cols]].set_axis(percent_cols, axis=1)
+    counts = df_sums[[f"{c}_count" for c in percent_cols]].set_axis(percent_cols, axis=1)
+
+    df_agg = sums / counts.where(counts > 0)
+    df_agg.insert(0, time_col, df_sums["bucket"])
+    df_agg["samples"] = df_sums["samples"]
+
+    return df_agg
+
+def rolling_from_daily(df_daily, days):
+    """
+    Trailing rolling-window means over calendar days, one point per day,
+    from per-day sums.
+
+    Each day's value averages every record of the ``days`` days ending on
+    it (exactly, from the sums and counts, so busy days weigh more). Days
+    with no records in their window are omitted.
+
+    Args:
+        df_daily (pd.DataFrame): Daily sums as for ``bucket_means``.
+        days (int): Window length in days.
+
+    Returns:
+        pd.DataFrame: Columns date, <class>_percent means, samples (records
+            in the window).
+    """
+    percent_cols = [c.removesuffix("_sum") for c in df_daily.columns if c.endswith("_percent_sum")]
+    if df_daily.empty:
+        return pd.DataFrame(columns=["date", *percent_cols, "samples"])
+
+    daily = df_daily.set_index(df_daily["bucket"].rename("date"))
+    sums = daily[[f"{c}_sum" for c in percent_cols]].set_axis(percent_cols, axis=1)
+    counts = daily[[f"{c}_count" for c in percent_cols]].set_axis(percent_cols, axis=1)
+
+    calendar = pd.date_range(daily.index.min(), daily.index.max(), freq="D", name="date")
+
+    def _window(frame):
+        return frame.reindex(calendar, fill_value=0).rolling(days, min_periods=1).sum()
+
+    counts = _window(counts)
+    df_agg = _window(sums) / counts.where(counts > 0)
+    df_agg["samples"] = _window(daily["samples"]).astype("int64")
+
+    return df_agg[df_agg["samples"] > 0].reset_index()
+
+def rolling_time_series(df_hist, days):
+    """
+    Trailing rolling-window means over calendar days, one point per day
+    (see ``rolling_from_daily``). The input is not modified.
+
+    Args:
+        df_hist (pd.DataFrame): Records with a datetime64 "datetime" column
+            and <class>_percent columns.
+        days (int): Window length in days.
+
+    Returns:
+        pd.DataFrame: Columns date, <class>_percent means, samples (records
+            in the window).
+    """
+    percent_cols = _percent_columns(df_hist)
+    grouped = df_hist[percent_cols].groupby(df_hist["datetime"].dt.floor("D").rename("bucket"))
+
+    df_daily = pd.concat(
+        [grouped.sum().add_suffix("_sum"), grouped.count().add_suffix("_count")], axis=1
+    )
+    df_daily["samples"] = grouped.size()
+
+    return rolling_from_daily(df_daily.reset_index(), days)
+
 def prepare_time_series_data(df_hist, aggregation_mode):
     """
     Prepare historical analysis data for time series visualization.
 
     Args:
-        df_hist (pd.DataFrame): Historical analysis records with datetime and class percentage columns.
-        aggregation_mode (str): Aggregation method. Options:
-            - "Raw (Per Image)": each image as a separate point.
-            - "Daily Average": average per day.
-            - "Weekly Average": average per week.
+        df_hist (pd.DataFrame): Historical analysis records with a datetime64
+            "datetime" column and class percentage columns. Not modified.
+        aggregation_mode (str): "Raw (Per Image)", a key of
+            AGGREGATION_WINDOWS or a key of ROLLING_WINDOWS.
 
     Returns:
         tuple:
-            - df_agg (pd.DataFrame or None): Aggregated summary per day/week or None for raw.
-            - df_long (pd.DataFrame or None): Long-format DataFrame for plotting.
-              Columns: ['datetime'/'date'/'week', 'Class', 'Percentage', 'samples' (for daily/weekly)]
+            - df_agg (pd.DataFrame or None): Summary per bucket, None for raw.
+            - df_long (pd.DataFrame or None): Long-format DataFrame for
+              plotting (see ``to_long``); None for an unknown mode.
     """
-    from core.config import DB_CLASS_MAP
-    
-    percent_cols = [c for c in df_hist.columns if c.endswith("_percent")]
-
     if aggregation_mode == "Raw (Per Image)":
-        # Convert to long format
-        df_long = df_hist.melt(
-            id_vars="datetime",
-            value_vars=percent_cols,
-            var_name="Class",
-            value_name="Percentage"
-        )
-        df_long["Class"] = (
-            df_long["Class"]
-            .str.replace("_percent", "")
-            .map(DB_CLASS_MAP)
-        )
-        return None, df_long
-
-    elif aggregation_mode == "Daily Average":
-        df_hist["date"] = df_hist["datetime"].dt.date
-        df_daily = (
-            df_hist
-            .groupby("date")[percent_cols]
-            .mean()
-            .reset_index()
-        )
-        df_daily["samples"] = df_hist.groupby("date").size().values
+        return None, to_long(df_hist, "datetime")
 
-        df_daily_long = df_daily.melt(
-            id_vars=["date", "samples"],
-            value_vars=percent_cols,
-            var_name="Class",
-            value_name="Percentage"
-        )
-        df_daily_long["Class"] = (
-            df_daily_long["Class"]
-            .str.replace("_percent", "")
-            .map(DB_CLASS_MAP)
-        )
-        return df_daily, df_daily_long
-
-    elif aggregation_mode == "Weekly Average":
-        df_hist["week"] = df_hist["datetime"].dt.to_period("W-MON").apply(lambda r: r.start_time)
-        df_weekly = (
-            df_hist
-            .groupby("week")[percent_cols]
-            .mean()
-            .reset_index()
-        )
-        df_weekly["samples"] = df_hist.groupby("week").size().values
+    if aggregation_mode in AGGREGATION_WINDOWS:
+        window = AGGREGATION_WINDOWS[aggregation_mode]
+        df_agg = bucket_time_series(df_hist, window)
+        return df_agg, to_long(df_agg, TIME_BUCKETS[window][0])
 
-        df_weekly_long = df_weekly.melt(
-            id_vars=["week", "samples"],
-            value_vars=percent_cols,
-            var_name="Class",
-            value_name="Percentage"
-        )
-        df_weekly_long["Class"] = (
-            df_weekly_long["Class"]
-            .str.replace("_percent", "")
-            .map(DB_CLASS_MAP)
-        )
-        return df_weekly, df_weekly_long
+    if aggregation_mode in ROLLING_WINDOWS:
+        df_agg = rolling_time_series(df_hist, ROLLING_WINDOWS[aggregation_mode])
+        return df_agg, to_long(df_agg, "date")
 
     return None, None
+
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling of one series.
+
+    Keeps the first and last points and, from each of ``threshold - 2``
+    equal-count buckets in between, the point forming the largest triangle
+    with the point kept from the previous bucket and the mean of the next
+    bucket. Peaks and dips survive, unlike with striding or averaging.
+
+    Args:
+        x (np.ndarray): Ascending x values (numbers or datetime64).
+        y (np.ndarray): y values, no NaN.
+        threshold (int): Number of points to keep, at least 3.
+
+    Returns:
+        np.ndarray: Ascending positions of the kept points (all of them if
+            the series has no more than ``threshold`` points).
+    """
+    if threshold < 3:
+        raise ValueError(f"LTTB needs a threshold of at least 3, got {threshold}")
+
+    n = len(x)
+    if n <= threshold:
+        return np.arange(n)
+
+    x = np.asarray(x)
+    if x.dtype.kind == "M":
+        x = x.view("int64")
+    # Offsets from the first point keep float precision for epoch timestamps
+    x = x.astype("float64") - float(x[0])
+    y = np.asarray(y, dtype="float64")
+
+    # Bucket i covers positions edges[i]:edges[i + 1]; the ends are kept
+    edges = (np.arange(threshold - 1) * ((n - 2) / (threshold - 2))).astype("int64") + 1
+    edges[-1] = n - 1
+
+    kept = np.empty(threshold, dtype="int64")
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+
+        if i + 2 < len(edges):
+            next_lo, next_hi = hi, edges[i + 2]
+            cx, cy = x[next_lo:next_hi].mean(), y[next_lo:next_hi].mean()
+        else:
+            cx, cy = x[-1], y[-1]
+
+        # Twice the triangle area; the constant factor does not change argmax
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(area.argmax())
+        kept[i + 1] = a
+
+    return kept
+
+def downsample_time_series(df_long, max_points=TREND_MAX_POINTS, start=None, end=None):
+    """
+    Limit a long-format series to ``max_points`` per class for plotting.
+
+    Rows outside [start, end] and missing percentages are dropped first, so
+    zooming in to a shorter range brings back detail at the same payload.
+    Each class is then reduced with ``lttb``.
+
+    Args:
+        df_long (pd.DataFrame): Long format as returned by ``to_long``.
+        max_points (int): Points kept per class, about the chart width in
+            pixels.
+        start (datetime-like, optional): First time axis value to keep.
+        end (datetime-like, optional): Last time axis value to keep.
+
+    Returns:
+        pd.DataFrame: Subset of ``df_long`` rows, in time order per class.
+    """
+    x_col = next(col for col in TIME_AXES if col in df_long.columns)
+
+    mask = df_long["Percentage"].notna()
+    if start is not None:
+        mask &= df_long[x_col] >= start
+    if end is not None:
+        mask &= df_long[x_col] <= end
+    df = df_long[mask]
+
+    xs = df[x_col].to_numpy()
+    ys = df["Percentage"].to_numpy()
+    kept = []
+
+    for positions in df.groupby("Class", observed=True, sort=False).indices.values():
+        positions = positions[np.argsort(xs[positions], kind="stable")]
+        kept.append(positions[lttb(xs[positions], ys[positions], max_points)])
+
+    if not kept:
+        return df
+
+    return df.iloc[np.concatenate(kept)]
+
+def rollup_to_long(df_agg, period_col):
+    """
+    Convert a rollup summary (see app.db.rollup.load_rollup) to long format.
+
+    Args:
+        df_agg (pd.DataFrame): One row per period with <class>_percent means
+            and a samples column.
+        period_col (str): Time axis column, "date" or "week".
+
+    Returns:
+        pd.DataFrame: Columns [period_col, 'samples', 'Class', 'Percentage'].
+    """
+    return to_long(df_agg, period_col)
@@ -0,0 +1,144 @@
+"""
+Benchmark trend aggregates: pandas over the full table vs the SQLite and
+DuckDB analytics engines (app.db.analytics).
+
+For each size a temporary database is seeded with synthetic history, then
+each path computes the headline totals, hourly and monthly bucket sums and
+a one-month record frame. The pandas path loads every record and groups in
+pandas; the engines GROUP BY in SQL (time_bucket on DuckDB) and return one
+row per bucket. The DuckDB column also reports the one-off mirror load.
+
+Usage:
+    python benchmarks/bench_analytics.py [--rows 100000,1000000,10000000] [--repeat 3]
+"""
+import argparse
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.db import analytics
+from app.db import rollup
+from app.db.connection import get_connection, close_connections
+from app.db.queries import CREATE_HISTORY_TABLE, ROLLUP_CLASS_COLUMNS
+from app.db.rollup import create_rollups, rebuild_rollups
+from app.db.schema import install_indexes
+
+SEED_CHUNK = 200_000
+PERCENT_COLS = [f"{col}_percent" for col in ROLLUP_CLASS_COLUMNS]
+
+def _seed(path, rows):
+    conn = sqlite3.connect(path)
+    conn.execute(CREATE_HISTORY_TABLE)
+    rng = np.random.default_rng(0)
+    start = np.datetime64("2023-01-01T00:00:00")
+
+    for offset in range(0, rows, SEED_CHUNK):
+        n = min(SEED_CHUNK, rows - offset)
+        seconds = rng.integers(0, 2 * 365 * 86400, n)
+        stamps = np.datetime_as_string(start + seconds.astype("timedelta64[s]"), unit="s")
+        percents = rng.dirichlet(np.ones(5), n) * 100
+        conn.executemany(
+            f"""
+            INSERT INTO analysis_history (
+                datetime, image, source, model_version, confidence, {", ".join(PERCENT_COLS)}
+            )
+            VALUES (?, 'bench.jpg', 'camera', 'bench', 0.5, ?, ?, ?, ?, ?)
+            """,
+            (
+                (str(stamp).replace("T", " "), *map(float, row))
+                for stamp, row in zip(stamps, percents)
+            ),
+        )
+        conn.commit()
+
+    conn.close()
+
+def _pandas_path(path):
+    """The pre-analytics pattern: load every row, then aggregate in pandas."""
+    df = pd.read_sql_query("SELECT * FROM analysis_history", sqlite3.connect(path))
+    df["datetime"] = pd.to_datetime(df["datetime"])
+
+    totals = (len(df), df["datetime"].max(), df[PERCENT_COLS].sum())
+    hourly = df.groupby(df["datetime"].dt.floor("h"))[PERCENT_COLS].agg(["sum", "count"])
+    monthly = df.groupby(df["datetime"].dt.to_period("M"))[PERCENT_COLS].agg(["sum", "count"])
+    month = df[(df["datetime"] >= "2024-03-01") & (df["datetime"] < "2024-04-01")]
+    return totals, hourly, monthly, month
+
+def _engine_path():
+    return (
+        analytics.history_totals(),
+        analytics.history_bucket_sums("hour"),
+        analytics.history_bucket_sums("month"),
+        analytics.history_frame(date(2024, 3, 1), date(2024, 3, 31), columns=PERCENT_COLS),
+    )
+
+def _best(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", default="100000,1000000,10000000")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    engines = ["sqlite"]
+    try:
+        import duckdb  # noqa: F401
+        from app.db.duckdb_mirror import close_mirrors
+        engines.append("duckdb")
+    except ImportError:
+        print("duckdb not installed; skipping the duckdb engine")
+
+    print(f"{'rows':>10s} {'pandas':>10s} " + " ".join(f"{e:>10s}" for e in engines) + "  mirror load")
+
+    for rows in (int(r) for r in args.rows.split(",")):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = str(Path(tmp) / "bench.db")
+            _seed(path, rows)
+
+            analytics.DB_PATH = rollup.DB_PATH = path
+            analytics.ANALYTICS_DUCKDB_PATH = str(Path(tmp) / "bench.duckdb")
+            with get_connection(path) as conn:
+                install_indexes(conn)
+            create_rollups()
+            rebuild_rollups()
+
+            results = {"pandas": _best(lambda path=path: _pandas_path(path), args.repeat)}
+            mirror_load = float("nan")
+
+            for engine in engines:
+                analytics.ANALYTICS_ENGINE = engine
+                analytics.apply_analytics_policy()
+
+                if engine == "duckdb":
+                    start = time.perf_counter()
+                    analytics._mirror().sync()
+                    mirror_load = time.perf_counter() - start
+
+                results[engine] = _best(_engine_path, args.repeat)
+
+            if "duckdb" in engines:
+                close_mirrors()
+            close_connections()
+
+        print(
+            f"{rows:>10d} "
+            + " ".join(f"{results[k]:>9.3f}s" for k in ["pandas", *engines])
+            + f"  {mirror_load:.2f}s"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark history save/load latency under concurrent readers and writers.
+
+Compares the previous access pattern (a fresh rollback-journal connection
+per call) with the persistent WAL connections from app.db.connection, on a
+temporary database seeded with synthetic history.
+
+Usage:
+    python benchmarks/bench_db_concurrency.py [--rows 20000] [--readers 4] [--writers 2] [--seconds 5]
+"""
+import argparse
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.db.connection import get_connection, close_connections
+
+_CREATE = """
+    CREATE TABLE analysis_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        datetime TEXT, image TEXT, image_hash TEXT, source TEXT,
+        model_version TEXT, confidence REAL,
+        metal_percent REAL, mixed_waste_percent REAL,
+        paper_cardboard_percent REAL, plastic_percent REAL, wood_percent REAL
+    )
+"""
+_INSERT = """
+    INSERT INTO analysis_history (
+        datetime, image, image_hash, source, model_version, confidence,
+        metal_percent, mixed_waste_percent,
+        paper_cardboard_percent, plastic_percent, wood_percent
+    )
+    VALUES (datetime('now'), 'bench.jpg', 'hash', 'upload', 'bench', 0.5, 20, 20, 20, 20, 20)
+"""
+_SELECT = "SELECT * FROM analysis_history ORDER BY datetime ASC"
+
+def _legacy_connection(path):
+    return sqlite3.connect(path)
+
+def _seed(path, rows):
+    conn = sqlite3.connect(path)
+    conn.execute(_CREATE)
+    conn.executemany(_INSERT.replace("datetime('now')", "?"), [
+        (f"2024-01-01 00:00:{i % 60:02d}",) for i in range(rows)
+    ])
+    conn.commit()
+    conn.close()
+
+def _run(path, mode, readers, writers, seconds):
+    stop = threading.Event()
+    save_ms, load_ms, errors = [], [], []
+    lock = threading.Lock()
+
+    def timed(samples, fn):
+        start = time.perf_counter()
+        try:
+            fn()
+        except sqlite3.OperationalError as e:
+            with lock:
+                errors.append(str(e))
+            return
+        with lock:
+            samples.append((time.perf_counter() - start) * 1000)
+
+    def save():
+        if mode == "legacy":
+            conn = _legacy_connection(path)
+            conn.execute(_INSERT)
+            conn.commit()
+            conn.close()
+        else:
+            with get_connection(path) as conn:
+                conn.execute(_INSERT)
+
+    def load():
+        if mode == "legacy":
+            conn = _legacy_connection(path)
+            conn.execute(_SELECT).fetchall()
+            conn.close()
+        else:
+            get_connection(path).execute(_SELECT).fetchall()
+
+    def loop(samples, fn):
+        while not stop.is_set():
+            timed(samples, fn)
+        close_connections()
+
+    threads = (
+        [threading.Thread(target=loop, args=(load_ms, load)) for _ in range(readers)]
+        + [threading.Thread(target=loop, args=(save_ms, save)) for _ in range(writers)]
+    )
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return save_ms, load_ms, errors
+
+def _describe(samples):
+    if not samples:
+        return "n=0"
+    ordered = sorted(samples)
+    p95 = ordered[int(len(ordered) * 0.95) - 1] if len(ordered) > 1 else ordered[0]
+    return f"n={len(samples):6d} p50 {statistics.median(samples):7.2f} ms p95 {p95:7.2f} ms"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    for mode in ("legacy", "managed"):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = str(Path(tmp) / "bench.db")
+            _seed(path, args.rows)
+
+            save_ms, load_ms, errors = _run(
+                path, mode, args.readers, args.writers, args.seconds
+            )
+
+        print(f"{mode:8s} save {_describe(save_ms)} | load {_describe(load_ms)} | errors {len(errors)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark full vs. reduced-resolution decoding of uploaded photos.
+
+Compares the previous path (IMREAD_COLOR + resize) with header-probed
+IMREAD_REDUCED_COLOR_* decoding on a folder of images.
+
+Usage:
+    python benchmarks/bench_decode.py path/to/phone_photos [--repeat 3]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.config import MAX_IMAGE_WIDTH, MAX_IMAGE_HEIGHT
+from app.core.preprocess import (
+    read_image_header,
+    select_decode_flag,
+    resize_image_keep_ratio,
+)
+
+def _decode(data, flag):
+    start = time.perf_counter()
+    decoded = cv2.imdecode(np.frombuffer(data, np.uint8), flag)
+    resized = resize_image_keep_ratio(decoded, MAX_IMAGE_WIDTH, MAX_IMAGE_HEIGHT)
+    return time.perf_counter() - start, decoded.nbytes, resized.shape
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("folder", type=Path)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    paths = sorted(
+        p for p in args.folder.iterdir()
+        if p.suffix.lower() in (".jpg", ".jpeg", ".png")
+    )
+    if not paths:
+        sys.exit(f"No images found in {args.folder}")
+
+    rows = []
+
+    for path in paths:
+        data = path.read_bytes()
+        reduced_flag = select_decode_flag(
+            read_image_header(data), MAX_IMAGE_WIDTH, MAX_IMAGE_HEIGHT
+        )
+
+        full = min(_decode(data, cv2.IMREAD_COLOR) for _ in range(args.repeat))
+        reduced = min(_decode(data, reduced_flag) for _ in range(args.repeat))
+
+        rows.append((path.name, full, reduced))
+        print(
+            f"{path.name:40s} full {full[0] * 1000:7.1f} ms {full[1] / 1e6:6.1f} MB | "
+            f"reduced {reduced[0] * 1000:7.1f} ms {reduced[1] / 1e6:6.1f} MB | "
+            f"out {reduced[2][1]}x{reduced[2][0]}"
+        )
+
+    full_ms = sum(r[1][0] for r in rows) * 1000
+    reduced_ms = sum(r[2][0] for r in rows) * 1000
+    full_peak = max(r[1][1] for r in rows) / 1e6
+    reduced_peak = max(r[2][1] for r in rows) / 1e6
+
+    print()
+    print(f"images: {len(rows)}")
+    print(f"total decode+resize: full {full_ms:.0f} ms | reduced {reduced_ms:.0f} ms "
+          f"| speedup x{full_ms / max(reduced_ms, 1e-9):.2f}")
+    print(f"largest decoded frame: full {full_peak:.1f} MB | reduced {reduced_peak:.1f} MB")
+
+if __name__ == "__main__":
+    main()
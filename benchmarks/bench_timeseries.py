@@ -0,0 +1,104 @@
+"""
+Benchmark time bucketing for the trends view: the previous pandas code vs
+the vectorized engine in app.visualization.timeseries.
+
+The previous implementation is reproduced below (melt per mode, weekly
+buckets through a per-row ``.apply``). Each path gets a fresh frame of
+synthetic per-image history and produces the summary and long-format
+frames for every mode. The raw view is also timed through LTTB
+downsampling to the configured point budget.
+
+Usage:
+    python benchmarks/bench_timeseries.py [--rows 100000,1000000] [--repeat 3]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.config import DB_CLASS_MAP
+from app.visualization.timeseries import (
+    ROLLING_WINDOWS,
+    downsample_time_series,
+    prepare_time_series_data,
+)
+
+PERCENT_COLS = [f"{col}_percent" for col in DB_CLASS_MAP]
+
+def _history(rows):
+    rng = np.random.default_rng(0)
+    seconds = rng.integers(0, 2 * 365 * 86400, rows)
+    df = pd.DataFrame(rng.dirichlet(np.ones(5), rows) * 100, columns=PERCENT_COLS)
+    df.insert(0, "datetime", pd.Timestamp("2023-01-01") + pd.to_timedelta(np.sort(seconds), unit="s"))
+    return df
+
+def _legacy_long(df, id_vars):
+    df_long = df.melt(id_vars=id_vars, value_vars=PERCENT_COLS, var_name="Class", value_name="Percentage")
+    df_long["Class"] = df_long["Class"].str.replace("_percent", "").map(DB_CLASS_MAP)
+    return df_long
+
+def _legacy(df_hist, mode):
+    """The pre-engine prepare_time_series_data (Raw, Daily, Weekly only)."""
+    if mode == "Raw (Per Image)":
+        return None, _legacy_long(df_hist, "datetime")
+
+    if mode == "Daily Average":
+        df_hist["date"] = df_hist["datetime"].dt.date
+        key = "date"
+    else:
+        df_hist["week"] = df_hist["datetime"].dt.to_period("W-MON").apply(lambda r: r.start_time)
+        key = "week"
+
+    df_agg = df_hist.groupby(key)[PERCENT_COLS].mean().reset_index()
+    df_agg["samples"] = df_hist.groupby(key).size().values
+    return df_agg, _legacy_long(df_agg, [key, "samples"])
+
+def _raw_downsampled(df_hist, mode):
+    _, df_long = prepare_time_series_data(df_hist, mode)
+    return downsample_time_series(df_long)
+
+def _time(fn, df, mode, repeat):
+    timings = []
+    for _ in range(repeat):
+        frame = df.copy()
+        start = time.perf_counter()
+        fn(frame, mode)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", default="100000,1000000")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    modes = [
+        "Raw (Per Image)", "Hourly Average", "Daily Average",
+        "Weekly Average", "Monthly Average", *ROLLING_WINDOWS,
+    ]
+    legacy_modes = ("Raw (Per Image)", "Daily Average", "Weekly Average")
+
+    print(f"{'rows':>10s}  {'mode':24s} {'previous':>10s} {'engine':>10s} {'speedup':>8s}")
+
+    for rows in (int(r) for r in args.rows.split(",")):
+        df = _history(rows)
+
+        for mode in modes:
+            engine = _time(prepare_time_series_data, df, mode, args.repeat)
+
+            if mode in legacy_modes:
+                previous = _time(_legacy, df, mode, args.repeat)
+                print(f"{rows:>10d}  {mode:24s} {previous:>9.3f}s {engine:>9.3f}s {previous / engine:>7.1f}x")
+            else:
+                print(f"{rows:>10d}  {mode:24s} {'-':>10s} {engine:>9.3f}s {'-':>8s}")
+
+        engine = _time(_raw_downsampled, df, "Raw (Per Image)", args.repeat)
+        print(f"{rows:>10d}  {'Raw, downsampled (LTTB)':24s} {'-':>10s} {engine:>9.3f}s {'-':>8s}")
+
+if __name__ == "__main__":
+    main()
@@ -18,11 +18,7 @@ from app.core.validation import validate_uploaded_files
 # =========================
 # DB
 # =========================
-from app.db.schema import (
-    create_tables,
-    migrate_db,
-    backfill_metadata
-)
+from app.db.migrations import init_db
 
 # =========================
 # UI
@@ -34,7 +30,8 @@ from app.ui import (
     render_data_summary,
     render_history_section,
     render_time_series_section,
-    render_danger_zone
+    render_danger_zone,
+    report_pending_saves
 )
 
 # =========================
@@ -53,11 +50,8 @@ logger.info("========== Application Started ==========")
 # =========================
 # DATABASE INITIALIZATION
 # =========================
-create_tables()
-migrate_db()
-backfill_metadata()
-
-logger.info("Database initialized")
+# Migrations run once per process, not on every rerun
+init_db()
 
 # =========================
 # SESSION STATE
@@ -65,10 +59,13 @@ logger.info("Database initialized")
 if "confirm_action" not in st.session_state:
     st.session_state.confirm_action = None
 
+# Outcome of saves that were still queued on an earlier rerun
+report_pending_saves()
+
 # =========================
 # SIDEBAR & FILE UPLOAD
 # =========================
-mode, visible_classes, conf_thres, uploaded = render_sidebar()
+mode, visible_classes, overlay_mode, conf_thres, uploaded = render_sidebar()
 
 # =========================
 # FILE COUNT (SAFE)
@@ -82,6 +79,7 @@ else:
 
 logger.info(
     f"Sidebar input | mode={mode}, "
+    f"overlay_mode={overlay_mode}, "
     f"files_uploaded={file_count}, "
     f"conf_thres={conf_thres}"
 )
@@ -107,11 +105,15 @@ logger.info("Model loaded successfully")
 # =========================
 if mode == "Single Image" and uploaded:
     logger.info("Running single image analysis")
-    run_single_image_analysis(uploaded, model, conf_thres, visible_classes)
+    run_single_image_analysis(
+        uploaded, model, conf_thres, visible_classes, overlay_mode
+    )
 
 elif mode == "Batch" and uploaded:
     logger.info("Running batch image analysis")
-    run_batch_analysis(uploaded, model, conf_thres, visible_classes)
+    run_batch_analysis(
+        uploaded, model, conf_thres, visible_classes, overlay_mode
+    )
 
 else:
     logger.info("No analysis executed")
@@ -0,0 +1,54 @@
+import numpy as np
+
+from app.batch.artifacts import BatchArtifactStore
+
+# pytest tests/batch/test_artifacts.py -v
+
+def test_artifacts_stay_in_memory_within_budget(tmp_path):
+    """Artifacts below the budget are kept in memory without touching disk."""
+    store = BatchArtifactStore(budget_mb=1, spill_dir=str(tmp_path))
+    array = np.ones((10, 10, 3), dtype=np.uint8)
+
+    store.put("1/image", array)
+
+    assert store.get("1/image") is array
+    assert store.memory_bytes == array.nbytes
+    assert store.disk_bytes == 0
+    assert list(tmp_path.iterdir()) == []
+
+def test_artifacts_spill_to_disk_over_budget(tmp_path):
+    """Once the budget is used, arrays come back as read-only memory maps."""
+    store = BatchArtifactStore(budget_mb=0.001, spill_dir=str(tmp_path))
+    array = np.arange(3000, dtype=np.uint8).reshape(10, 100, 3)
+
+    store.put("1/image", array)
+    loaded = store.get("1/image")
+
+    assert isinstance(loaded, np.memmap)
+    assert not loaded.flags.writeable
+    np.testing.assert_array_equal(loaded, array)
+    assert store.memory_bytes == 0
+    assert store.disk_bytes == array.nbytes
+
+def test_spilled_bytes_round_trip(tmp_path):
+    """Encoded bytes spill to plain files and are read back lazily."""
+    store = BatchArtifactStore(budget_mb=0, spill_dir=str(tmp_path))
+
+    store.put("1/overlay_png", b"\x89PNG data")
+    loader = store.loader("1/overlay_png")
+
+    assert "1/overlay_png" in store
+    assert loader() == b"\x89PNG data"
+
+def test_close_removes_spill_directory(tmp_path):
+    """Closing the store deletes everything it spilled."""
+    store = BatchArtifactStore(budget_mb=0, spill_dir=str(tmp_path))
+    store.put("1/image", np.zeros((4, 4, 3), dtype=np.uint8))
+
+    assert len(list(tmp_path.iterdir())) == 1
+
+    store.close()
+
+    assert list(tmp_path.iterdir()) == []
+    assert len(store) == 0
+    assert store.get("1/image") is None
@@ -0,0 +1,122 @@
+import os
+import zipfile
+import pytest
+
+from app.batch.export import (
+    BackgroundZipExporter,
+    JsonLinesWriter,
+    batch_record,
+    records_to_parquet
+)
+
+# pytest tests/batch/test_export.py -v
+
+def test_exporter_writes_entries_in_background(tmp_path):
+    """Queued entries (bytes or loaders) end up in the finished archive."""
+    exporter = BackgroundZipExporter(spill_dir=str(tmp_path))
+
+    exporter.add("a_overlay.png", b"\x89PNG-a")
+    exporter.add("b_overlay.png", lambda: b"\x89PNG-b")
+    exporter.finish()
+
+    assert exporter.wait(timeout=5)
+    assert exporter.count == 2
+
+    with zipfile.ZipFile(exporter.path) as zf:
+        assert zf.read("a_overlay.png") == b"\x89PNG-a"
+        assert zf.read("b_overlay.png") == b"\x89PNG-b"
+
+def test_exporter_stores_precompressed_and_deflates_text(tmp_path):
+    """PNG entries are STORED; other content is DEFLATED."""
+    exporter = BackgroundZipExporter(spill_dir=str(tmp_path))
+
+    exporter.add("x.png", b"0" * 1000)
+    exporter.add("summary.json", b"{}" * 500)
+    exporter.finish()
+    exporter.wait(timeout=5)
+
+    with zipfile.ZipFile(exporter.path) as zf:
+        assert zf.getinfo("x.png").compress_type == zipfile.ZIP_STORED
+        assert zf.getinfo("summary.json").compress_type == zipfile.ZIP_DEFLATED
+
+def test_exporter_skips_missing_loader_data(tmp_path):
+    """Loaders returning None are skipped instead of failing the archive."""
+    exporter = BackgroundZipExporter(spill_dir=str(tmp_path))
+
+    exporter.add("gone.png", lambda: None)
+    exporter.finish()
+
+    assert exporter.wait(timeout=5)
+    assert exporter.count == 0
+
+def test_exporter_close_deletes_archive(tmp_path):
+    """Closing the exporter removes the temp file and blocks further adds."""
+    exporter = BackgroundZipExporter(spill_dir=str(tmp_path))
+    exporter.add("a.png", b"x")
+    exporter.close()
+
+    assert not os.path.exists(exporter.path)
+    with pytest.raises(RuntimeError):
+        exporter.add("b.png", b"y")
+
+# =========================
+# Tabular exports
+# =========================
+
+def _item(**kwargs):
+    from app.batch.schema import BatchItemResult
+
+    defaults = dict(
+        image="a.jpg",
+        image_rgb=None,
+        overlay=None,
+        percentages={"Metal": 10.0, "Mixed waste": 0.0, "Plastic": 90.0,
+                     "Paper&Cardboard": 0.0, "Wood": 0.0},
+        dominant="Plastic",
+        error=None,
+        image_hash="h1",
+    )
+    defaults.update(kwargs)
+    return BatchItemResult(**defaults)
+
+def test_batch_record_has_one_column_per_class():
+    """Rows are flat, with a percent column per DB class."""
+    record = batch_record(_item(), 0.25, "v1")
+
+    assert record["image_hash"] == "h1"
+    assert record["metal_percent"] == 10.0
+    assert record["plastic_percent"] == 90.0
+    assert record["error"] is None
+
+def test_records_to_parquet_round_trip():
+    """Successful and failed rows share one typed schema."""
+    import pyarrow.parquet as pq
+    import io
+
+    records = [
+        batch_record(_item(), 0.25, "v1"),
+        batch_record(_item(image="bad.jpg", percentages=None, dominant=None,
+                           error="Invalid image", image_hash=None), 0.25, "v1"),
+    ]
+
+    table = pq.read_table(io.BytesIO(records_to_parquet(records)))
+
+    assert table.num_rows == 2
+    assert table.column("wood_percent").to_pylist() == [0.0, None]
+    assert table.column("error").to_pylist() == [None, "Invalid image"]
+
+def test_json_lines_writer_appends_incrementally(tmp_path):
+    """Rows are readable from disk immediately after each write."""
+    import json
+
+    writer = JsonLinesWriter(spill_dir=str(tmp_path))
+    writer.write({"image": "a.jpg"})
+
+    with open(writer.path) as f:
+        assert [json.loads(line) for line in f] == [{"image": "a.jpg"}]
+
+    writer.write({"image": "b.jpg"})
+    assert writer.count == 2
+
+    writer.close()
+    assert not os.path.exists(writer.path)
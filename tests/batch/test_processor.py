@@ -1,7 +1,7 @@
 import numpy as np
 import pytest
 
-from app.batch.processor import run_batch
+from app.batch.processor import run_batch, iter_batch
 
 # pytest tests/batch/test_processor.py -v     
 
@@ -36,14 +36,15 @@ class DummyInference:
 
 def test_run_batch_empty_files():
     """Running batch with no files should return empty result."""
-    result = run_batch(
-        files=[],
-        model=None,
-        conf_thres=0.5,
-        visible_classes=[],
-        max_width=640,
-        max_height=480,
-    )
+    with pytest.deprecated_call():
+        result = run_batch(
+            files=[],
+            model=None,
+            conf_thres=0.5,
+            visible_classes=[],
+            max_width=640,
+            max_height=480,
+        )
 
     assert result.total_images == 0
     assert result.success == 0
@@ -79,22 +80,18 @@ def test_run_batch_single_success(monkeypatch):
         lambda img, masks, classes, visible: img,
     )
 
-    monkeypatch.setattr(
-        "app.batch.processor.cv2.cvtColor",
-        lambda img, code: img,
-    )
-
     # --- run ---
     dummy_file = type("File", (), {"name": "test.jpg"})()
 
-    result = run_batch(
-        files=[dummy_file],
-        model=None,
-        conf_thres=0.5,
-        visible_classes=[],
-        max_width=640,
-        max_height=480,
-    )
+    with pytest.deprecated_call():
+        result = run_batch(
+            files=[dummy_file],
+            model=None,
+            conf_thres=0.5,
+            visible_classes=[],
+            max_width=640,
+            max_height=480,
+        )
 
     assert result.total_images == 1
     assert result.success == 1
@@ -103,3 +100,118 @@ def test_run_batch_single_success(monkeypatch):
     item = result.results[0]
     assert item.error is None
     assert item.dominant == "Plastic"
+
+def _mock_pipeline(monkeypatch):
+    monkeypatch.setattr(
+        "app.batch.processor.prepare_image_from_upload",
+        lambda file, w, h: (np.zeros((2, 2, 3), dtype=np.uint8), None, file.name, None),
+    )
+    monkeypatch.setattr(
+        "app.batch.processor.run_inference",
+        lambda model, img, conf: DummyInference(),
+    )
+    monkeypatch.setattr(
+        "app.batch.processor.create_mask_overlay",
+        lambda img, masks, classes, visible: img,
+    )
+
+def _dummy_files(n):
+    return [type("File", (), {"name": f"img{i}.jpg"})() for i in range(n)]
+
+def test_iter_batch_streams_progress(monkeypatch):
+    """Each yielded result carries cumulative progress and stage timings."""
+    _mock_pipeline(monkeypatch)
+
+    events = list(iter_batch(_dummy_files(3), None, 0.5, [], 640, 480))
+
+    assert [p.completed for _, p in events] == [1, 2, 3]
+    assert all(p.total == 3 for _, p in events)
+    assert events[-1][1].fraction == 1.0
+    assert events[-1][1].eta == 0
+    assert {"prepare", "inference", "postprocess", "overlay"} <= set(events[-1][1].stage_timings)
+
+def test_iter_batch_cancel_stops_cleanly(monkeypatch):
+    """Cancellation is checked before each file and ends the generator."""
+    _mock_pipeline(monkeypatch)
+
+    seen = []
+    for item, _ in iter_batch(
+        _dummy_files(5), None, 0.5, [], 640, 480,
+        should_cancel=lambda: len(seen) >= 2
+    ):
+        seen.append(item)
+
+    assert [item.image for item in seen] == ["img0.jpg", "img1.jpg"]
+
+def test_iter_batch_resume_offsets_progress(monkeypatch):
+    """Resuming continues the numbering and totals of the original batch."""
+    _mock_pipeline(monkeypatch)
+
+    events = list(iter_batch(
+        _dummy_files(2), None, 0.5, [], 640, 480, start_index=4, total=5
+    ))
+
+    assert [p.completed for _, p in events] == [4, 5]
+    assert events[-1][1].total == 5
+    assert events[-1][1].fraction == 1.0
+
+    # Throughput counts only the files processed in this run
+    last = events[-1][1]
+    assert last.processed == 2
+    assert last.throughput == pytest.approx(2 / last.elapsed)
+
+def test_iter_batch_vector_mode_skips_raster_overlay(monkeypatch):
+    """Vector mode draws the overlay in the browser, so no raster overlay is made."""
+    _mock_pipeline(monkeypatch)
+
+    def fail_overlay(img, masks, classes, visible):
+        raise AssertionError("raster overlay should be skipped")
+
+    monkeypatch.setattr("app.batch.processor.create_mask_overlay", fail_overlay)
+
+    item, progress = next(iter_batch(
+        _dummy_files(1), None, 0.5, [], 640, 480, vector_overlay=True
+    ))
+
+    assert item.error is None
+    assert item.overlay is None
+    assert "overlay" not in progress.stage_timings
+
+def test_release_images_drops_arrays(monkeypatch):
+    """Callers can discard arrays after rendering."""
+    _mock_pipeline(monkeypatch)
+
+    item, _ = next(iter_batch(_dummy_files(1), None, 0.5, [], 640, 480))
+    item.release_images()
+
+    assert item.image_rgb is None
+    assert item.overlay is None
+    assert item.percentages is not None
+
+def test_iter_batch_reuses_stored_result(monkeypatch):
+    """A hash found in history skips inference and is marked as reused."""
+    _mock_pipeline(monkeypatch)
+    monkeypatch.setattr(
+        "app.batch.processor.prepare_image_from_upload",
+        lambda file, w, h: (np.zeros((2, 2, 3), dtype=np.uint8), None, file.name, file.name),
+    )
+
+    def fail_inference(model, img, conf):
+        raise AssertionError("inference should be skipped")
+
+    stored = {"Plastic": 70.0, "Metal": 30.0}
+    monkeypatch.setattr("app.batch.processor.run_inference", fail_inference)
+
+    with pytest.deprecated_call():
+        result = run_batch(
+            _dummy_files(1), None, 0.5, [], 640, 480,
+            lookup=lambda image_hash: stored if image_hash == "img0.jpg" else None
+        )
+
+    item = result.results[0]
+    assert item.error is None
+    assert item.from_history and item.saved
+    assert item.percentages == stored
+    assert item.dominant == "Plastic"
+    assert item.image_hash == "img0.jpg"
+    assert "inference" not in item.stage_timings
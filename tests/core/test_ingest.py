@@ -0,0 +1,93 @@
+import io
+import hashlib
+import cv2
+import numpy as np
+import pytest
+
+from app.core.ingest import IngestError, ingest_upload
+
+# pytest tests/core/test_ingest.py -v
+
+class DummyUploadFile:
+    """In-memory upload exposing getvalue(), like Streamlit UploadedFile."""
+
+    def __init__(self, name, data):
+        self.name = name
+        self.size = len(data)
+        self._data = data
+
+    def getvalue(self):
+        return self._data
+
+class StreamUpload:
+    """Stream-only upload (no getvalue) that records how much was read."""
+
+    def __init__(self, name, data):
+        self.name = name
+        self._stream = io.BytesIO(data)
+        self.bytes_read = 0
+
+    def seek(self, pos):
+        self._stream.seek(pos)
+
+    def read(self, size=-1):
+        chunk = self._stream.read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+def _jpeg(h, w):
+    _, buf = cv2.imencode(".jpg", np.zeros((h, w, 3), dtype=np.uint8))
+    return buf.tobytes()
+
+def _png_header(w, h):
+    return (
+        b"\x89PNG\r\n\x1a\n" + b"\x00\x00\x00\x0dIHDR"
+        + w.to_bytes(4, "big") + h.to_bytes(4, "big")
+    )
+
+def test_ingest_reads_header_and_hash():
+    """A valid upload yields its buffer, hash and header dimensions."""
+    data = _jpeg(30, 40)
+
+    upload = ingest_upload(DummyUploadFile("a.jpg", data), chunk_size=16)
+
+    assert upload.header == ("JPEG", 40, 30)
+    assert upload.image_hash == hashlib.sha256(data).hexdigest()
+    assert bytes(upload.buffer) == data
+
+def test_ingest_stream_matches_in_memory():
+    """Chunked stream reads produce the same buffer and hash."""
+    data = _jpeg(30, 40)
+
+    upload = ingest_upload(StreamUpload("a.jpg", data), chunk_size=7)
+
+    assert bytes(upload.buffer) == data
+    assert upload.image_hash == hashlib.sha256(data).hexdigest()
+
+def test_ingest_rejects_non_image_after_first_chunk():
+    """Non-images are rejected without reading the rest of the file."""
+    stream = StreamUpload("doc.pdf", b"%PDF-1.7" + b"0" * 100_000)
+
+    with pytest.raises(IngestError, match="not a JPEG or PNG"):
+        ingest_upload(stream, chunk_size=1024)
+
+    assert stream.bytes_read == 1024
+
+def test_ingest_rejects_decompression_bomb():
+    """A tiny file declaring a huge canvas is rejected from its header."""
+    data = _png_header(50_000, 50_000) + b"\x00" * 32
+
+    with pytest.raises(IngestError, match="too large"):
+        ingest_upload(DummyUploadFile("bomb.png", data), max_pixels=64_000_000)
+
+def test_ingest_rejects_oversized_file():
+    """Byte size is enforced even when the upload does not report a size."""
+    stream = StreamUpload("big.jpg", _jpeg(30, 40) + b"\x00" * 5000)
+
+    with pytest.raises(IngestError, match="exceeds"):
+        ingest_upload(stream, max_bytes=2000, chunk_size=512)
+
+def test_ingest_rejects_truncated_header():
+    """Files with a valid signature but no readable dimensions are rejected."""
+    with pytest.raises(IngestError, match="not a valid"):
+        ingest_upload(DummyUploadFile("cut.jpg", _jpeg(30, 40)[:10]))
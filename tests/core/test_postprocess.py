@@ -1,10 +1,16 @@
 import numpy as np
 import pytest
+import torch
 
 from app.core.postprocess import (
     calculate_pixel_area,
-    calculate_percentage
+    calculate_percentage,
+    extract_detections,
+    simplify_mask_polygons,
+    unletterbox_masks,
+    unletterbox_boxes
 )
+from app.core.preprocess import letterbox
 
 # pytest tests/core/test_postprocess.py -v 
 
@@ -75,3 +81,80 @@ def test_calculate_percentage_sum_close_to_100():
     total_percentage = sum(result.values())
 
     assert abs(total_percentage - 100.0) < 1e-6
+
+def test_extract_detections_per_instance():
+    """Each instance keeps its class, confidence, pixel area and box."""
+    masks = np.zeros((2, 4, 4))
+    masks[0, :2, :2] = 1
+    masks[1, :, 3] = 0.9
+
+    detections = extract_detections(
+        masks,
+        np.array([2, 4]),
+        confidences=np.array([0.8, 0.3]),
+        boxes_xyxy=np.array([[0, 0, 2, 2], [3, 0, 4, 4]])
+    )
+
+    assert detections == [
+        {"class": "Plastic", "confidence": pytest.approx(0.8), "pixel_area": 4, "bbox": [0.0, 0.0, 2.0, 2.0]},
+        {"class": "Wood", "confidence": pytest.approx(0.3), "pixel_area": 4, "bbox": [3.0, 0.0, 4.0, 4.0]},
+    ]
+
+def test_extract_detections_without_boxes():
+    detections = extract_detections(np.ones((1, 2, 2)), np.array([0]))
+
+    assert detections == [{"class": "Metal", "confidence": None, "pixel_area": 4, "bbox": None}]
+
+def test_simplify_mask_polygons_reduces_points():
+    """Dense contours on a straight-edged shape collapse to their corners."""
+    edge = np.linspace(0, 100, 101)
+    square = np.concatenate([
+        np.stack([edge, np.zeros_like(edge)], axis=1),
+        np.stack([np.full_like(edge, 100), edge], axis=1),
+        np.stack([edge[::-1], np.full_like(edge, 100)], axis=1),
+        np.stack([np.zeros_like(edge), edge[::-1]], axis=1),
+    ])
+
+    result = simplify_mask_polygons([square], np.array([2]))
+
+    assert len(result) == 1
+    assert result[0]["class"] == "Plastic"
+    assert 4 <= len(result[0]["points"]) <= 6
+
+def test_simplify_mask_polygons_skips_degenerate():
+    """Contours with fewer than three points are dropped."""
+    result = simplify_mask_polygons(
+        [np.array([[0, 0], [1, 1]], dtype=np.float32)],
+        np.array([0])
+    )
+
+    assert result == []
+
+def test_simplify_mask_polygons_none_input():
+    """Missing polygon data yields no polygons."""
+    assert simplify_mask_polygons(None, np.array([0])) == []
+
+def test_unletterbox_masks_returns_source_frame():
+    """Masks drop the padding and are resized to the source resolution."""
+    _, info = letterbox(np.zeros((720, 1280, 3), dtype=np.uint8), 640)
+
+    masks = torch.zeros((1, 384, 640), dtype=torch.uint8)
+    masks[0, 12:192, :320] = 1  # top-left quarter of the content area
+
+    restored = unletterbox_masks(masks, info)
+
+    assert tuple(restored.shape) == (1, 720, 1280)
+    assert restored.dtype == torch.uint8
+    assert int(restored.sum()) == pytest.approx(360 * 640, rel=0.01)
+    assert restored[0, 0, 0] == 1 and restored[0, -1, -1] == 0
+
+def test_unletterbox_boxes_maps_coordinates():
+    """Box corners are un-padded and un-scaled; other columns are kept."""
+    _, info = letterbox(np.zeros((720, 1280, 3), dtype=np.uint8), 640)
+
+    boxes = torch.tensor([[0.0, 12.0, 320.0, 192.0, 0.9, 2.0]])
+    restored = unletterbox_boxes(boxes, info)
+
+    assert restored[0, :4].tolist() == [0.0, 0.0, 640.0, 360.0]
+    assert restored[0, 4:].tolist() == pytest.approx([0.9, 2.0])
+    assert boxes[0, 1] == 12.0
@@ -1,16 +1,28 @@
+import cv2
 import numpy as np
 import pytest
 
+from app.core.ingest import read_image_header
 from app.core.preprocess import (
     hex_to_rgb,
     sanitize_filename,
     resize_image_keep_ratio,
     compute_image_hash,
     prepare_image_from_upload,
+    select_decode_flag,
+    letterbox,
+    to_model_tensor,
+    prepare_model_input,
 )
 
 # pytest tests/core/test_preprocess.py -v 
 
+# Minimal PNG signature + IHDR declaring a 100x100 image
+PNG_HEADER = (
+    b"\x89PNG\r\n\x1a\n" + b"\x00\x00\x00\x0dIHDR"
+    + (100).to_bytes(4, "big") + (100).to_bytes(4, "big")
+)
+
 class DummyUploadFile:
     """Minimal stand-in for Streamlit UploadedFile."""
 
@@ -86,14 +98,16 @@ def test_prepare_image_from_upload_success(monkeypatch):
         lambda buf, flag: dummy_image,
     )
 
-    file = DummyUploadFile("my image!.jpg", b"fake image bytes")
+    # Uploads must carry a real image header to pass ingest
+    data = PNG_HEADER + b"fake image bytes"
+    file = DummyUploadFile("my image!.jpg", data)
 
     image_bgr, file_bytes, safe_name, image_hash = prepare_image_from_upload(
         file, max_width=200, max_height=200
     )
 
     assert image_bgr is not None
-    assert file_bytes == b"fake image bytes"
+    assert file_bytes == data
     assert safe_name == "my_image_.jpg"
     assert isinstance(image_hash, str)
 
@@ -105,8 +119,96 @@ def test_prepare_image_from_upload_invalid_image(monkeypatch):
         lambda buf, flag: None,
     )
 
-    file = DummyUploadFile("bad.jpg", b"corrupted data")
+    file = DummyUploadFile("bad.jpg", PNG_HEADER + b"corrupted data")
 
     result = prepare_image_from_upload(file, 200, 200)
 
     assert result == (None, None, None, None)
+
+def _encode(ext, h, w):
+    _, buf = cv2.imencode(ext, np.zeros((h, w, 3), dtype=np.uint8))
+    return buf.tobytes()
+
+def test_read_image_header_jpeg_and_png():
+    """Dimensions are read from the header without decoding."""
+    assert read_image_header(_encode(".jpg", 30, 40)) == ("JPEG", 40, 30)
+    assert read_image_header(_encode(".png", 12, 7)) == ("PNG", 7, 12)
+
+def test_read_image_header_unknown_or_truncated():
+    """Non-image or truncated data yields None."""
+    assert read_image_header(b"not an image") is None
+    assert read_image_header(_encode(".jpg", 30, 40)[:6]) is None
+
+def test_select_decode_flag_picks_largest_factor_above_target():
+    """Reduced decode lands at or just above the target size."""
+    assert select_decode_flag(("JPEG", 4000, 3000), 1280, 1280) == cv2.IMREAD_REDUCED_COLOR_2
+    assert select_decode_flag(("JPEG", 6000, 4000), 1280, 1280) == cv2.IMREAD_REDUCED_COLOR_4
+    assert select_decode_flag(("JPEG", 12000, 9000), 1280, 1280) == cv2.IMREAD_REDUCED_COLOR_8
+    assert select_decode_flag(("JPEG", 2000, 1500), 1280, 1280) == cv2.IMREAD_COLOR
+
+def test_select_decode_flag_full_decode_for_png():
+    """Only JPEG supports DCT-domain downscaling."""
+    assert select_decode_flag(("PNG", 8000, 6000), 1280, 1280) == cv2.IMREAD_COLOR
+    assert select_decode_flag(None, 1280, 1280) == cv2.IMREAD_COLOR
+
+def test_prepare_image_from_upload_reduced_decode_size():
+    """Large JPEG uploads still resize to exactly the max size."""
+    file = DummyUploadFile("big.jpg", _encode(".jpg", 3000, 4000))
+
+    image_bgr, _, _, _ = prepare_image_from_upload(file, 1280, 1280)
+
+    assert image_bgr.shape == (960, 1280, 3)
+
+def test_prepare_image_from_upload_rejects_non_image(monkeypatch):
+    """Non-image uploads are rejected before decoding."""
+    from app.core.ingest import IngestError
+
+    def fail_decode(buf, flag):
+        raise AssertionError("decoder must not run")
+
+    monkeypatch.setattr("app.core.preprocess.cv2.imdecode", fail_decode)
+
+    with pytest.raises(IngestError):
+        prepare_image_from_upload(DummyUploadFile("notes.jpg", b"plain text"), 200, 200)
+
+def test_letterbox_rect_padding_to_stride():
+    """Longest side goes to img_size; the short side is padded to a stride multiple."""
+    image = np.zeros((720, 1280, 3), dtype=np.uint8)
+
+    padded, info = letterbox(image, 640, stride=32)
+
+    assert padded.shape == (384, 640, 3)
+    assert info.scale == pytest.approx(0.5)
+    assert info.pad == (0, 12)
+    assert info.content_shape == (360, 640)
+    assert padded[0, 0, 0] == 114
+    assert padded[12, 0, 0] == 0
+
+def test_to_model_tensor_layout_and_dtype():
+    """BGR frames become one contiguous uint8 RGB (N, 3, H, W) tensor."""
+    image = np.zeros((32, 64, 3), dtype=np.uint8)
+    image[..., 0] = 10
+    image[..., 2] = 30
+
+    tensor = to_model_tensor([image, image])
+
+    assert tuple(tensor.shape) == (2, 3, 32, 64)
+    assert str(tensor.dtype) == "torch.uint8"
+    assert tensor.is_contiguous()
+    assert int(tensor[1, 0, 0, 0]) == 30
+    assert int(tensor[1, 2, 0, 0]) == 10
+
+def test_to_model_tensor_rejects_mixed_shapes():
+    """A batch cannot mix frame sizes."""
+    with pytest.raises(ValueError):
+        to_model_tensor([
+            np.zeros((32, 32, 3), dtype=np.uint8),
+            np.zeros((64, 32, 3), dtype=np.uint8),
+        ])
+
+def test_prepare_model_input_single_image():
+    """One image yields a batch of one at the letterboxed size."""
+    tensor, info = prepare_model_input(np.zeros((100, 50, 3), dtype=np.uint8), 64)
+
+    assert tuple(tensor.shape) == (1, 3, 64, 32)
+    assert info.source_shape == (100, 50)
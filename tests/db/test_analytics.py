@@ -0,0 +1,197 @@
+import sqlite3
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from app.db.analytics import (
+    ANALYTICS_FREQS,
+    apply_analytics_policy,
+    get_engine,
+    history_bucket_sums,
+    history_frame,
+    history_totals
+)
+from app.db.connection import close_connections, get_connection
+from app.db.migrations import migrate
+
+# pytest tests/db/test_analytics.py -v
+
+ROWS = [
+    # (datetime, image_hash, plastic_percent, metal_percent)
+    ("2024-01-01 08:00:00", "a", 10.0, 1.0),   # Monday
+    ("2024-01-01 09:30:00", "b", 30.0, None),
+    ("2024-01-07 23:00:00", "c", 50.0, 3.0),   # Sunday, same ISO week
+    ("2024-01-08 00:00:00", "d", 70.0, 4.0),   # next Monday
+    ("2024-02-15 12:00:00", "e", 90.0, 5.0),
+]
+
+@pytest.fixture
+def analytics_db(tmp_path, monkeypatch):
+    path = str(tmp_path / "analytics.db")
+    for module in ("analytics", "database", "rollup", "schema", "migrations", "archive"):
+        monkeypatch.setattr(f"app.db.{module}.DB_PATH", path)
+    monkeypatch.setattr("app.db.analytics.ANALYTICS_DUCKDB_PATH", str(tmp_path / "analytics.duckdb"))
+
+    migrate(get_connection(path))
+    yield path
+    close_connections()
+
+@pytest.fixture
+def duckdb_engine(analytics_db, monkeypatch):
+    pytest.importorskip("duckdb")
+    from app.db.duckdb_mirror import close_mirrors
+
+    monkeypatch.setattr("app.db.analytics.ANALYTICS_ENGINE", "duckdb")
+    apply_analytics_policy()
+    yield analytics_db
+    close_mirrors()
+
+def _insert(path, rows):
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO analysis_history (datetime, image_hash, plastic_percent, metal_percent) "
+        "VALUES (?, ?, ?, ?)",
+        rows
+    )
+    conn.commit()
+    conn.close()
+
+def _run_all():
+    """Every analytics query, in a comparable form."""
+    return {
+        "frame": history_frame(columns=["id", "plastic_percent", "metal_percent"]),
+        "ranged": history_frame(date(2024, 1, 7), date(2024, 1, 8), columns=["id"]),
+        "january": history_frame(date(2024, 1, 1), date(2024, 1, 31)),
+        **{freq: history_bucket_sums(freq) for freq in ANALYTICS_FREQS},
+        "ranged_days": history_bucket_sums("day", date(2024, 1, 7), date(2024, 1, 8)),
+        "totals": pd.DataFrame([history_totals()]),
+    }
+
+def _plastic_total():
+    return history_frame(columns=["plastic_percent"])["plastic_percent"].sum()
+
+def test_sqlite_engine_results(analytics_db):
+    _insert(analytics_db, ROWS)
+
+    frame = history_frame(columns=["plastic_percent", "metal_percent"])
+    assert len(frame) == 5
+    assert frame["datetime"].max() == pd.Timestamp("2024-02-15 12:00:00")
+    assert frame["plastic_percent"].sum() == 250.0
+    # NULL percentages stay missing
+    assert frame["metal_percent"].isna().tolist() == [False, True, False, False, False]
+
+    ranged = history_frame(date(2024, 1, 7), date(2024, 1, 8))
+    assert ranged["image_hash"].tolist() == ["c", "d"]
+    assert pd.api.types.is_datetime64_any_dtype(ranged["datetime"])
+
+def test_sqlite_engine_buckets(analytics_db):
+    _insert(analytics_db, ROWS)
+
+    weekly = history_bucket_sums("week")
+    assert weekly["bucket"].dt.strftime("%Y-%m-%d").tolist() == ["2024-01-01", "2024-01-08", "2024-02-12"]
+    assert weekly["samples"].tolist() == [3, 1, 1]
+    assert weekly["plastic_percent_sum"].tolist() == [90.0, 70.0, 90.0]
+    # NULL percentages are left out of the counts, so means skip them
+    assert weekly["metal_percent_count"].tolist() == [2, 1, 1]
+
+    hourly = history_bucket_sums("hour", date(2024, 1, 1), date(2024, 1, 1))
+    assert hourly["bucket"].dt.strftime("%H:%M").tolist() == ["08:00", "09:00"]
+
+    monthly = history_bucket_sums("month")
+    assert monthly["bucket"].dt.strftime("%Y-%m-%d").tolist() == ["2024-01-01", "2024-02-01"]
+    assert monthly["samples"].tolist() == [4, 1]
+
+    assert history_totals()["total_images"] == 5
+    assert history_totals()["latest"] == "2024-02-15 12:00:00"
+
+def test_empty_history_buckets(analytics_db):
+    for freq in ANALYTICS_FREQS:
+        assert history_bucket_sums(freq).empty
+
+    assert history_totals()["total_images"] == 0
+
+def test_invalid_arguments_raise(analytics_db, monkeypatch):
+    with pytest.raises(ValueError):
+        history_frame(columns=["image; DROP TABLE analysis_history"])
+
+    with pytest.raises(ValueError):
+        history_bucket_sums("fortnight")
+
+    monkeypatch.setattr("app.db.analytics.ANALYTICS_ENGINE", "spark")
+    with pytest.raises(ValueError):
+        get_engine()
+
+def test_duckdb_falls_back_without_package(monkeypatch):
+    monkeypatch.setattr("app.db.analytics.ANALYTICS_ENGINE", "duckdb")
+    monkeypatch.setattr("app.db.analytics.importlib.util.find_spec", lambda name: None)
+
+    assert get_engine() == "sqlite"
+
+def test_sqlite_engine_has_no_change_log(analytics_db):
+    apply_analytics_policy()
+
+    _insert(analytics_db, ROWS)
+    names = {row[0] for row in get_connection(analytics_db).execute("SELECT name FROM sqlite_master")}
+
+    assert "history_changes" not in names
+
+def test_duckdb_engine_matches_sqlite(duckdb_engine, monkeypatch):
+    _insert(duckdb_engine, ROWS)
+
+    duck = _run_all()
+    monkeypatch.setattr("app.db.analytics.ANALYTICS_ENGINE", "sqlite")
+    lite = _run_all()
+
+    for key, expected in lite.items():
+        pd.testing.assert_frame_equal(
+            duck[key].reset_index(drop=True), expected, check_dtype=False, obj=key
+        )
+
+def test_duckdb_engine_matches_sqlite_when_empty(duckdb_engine, monkeypatch):
+    duck = _run_all()
+    monkeypatch.setattr("app.db.analytics.ANALYTICS_ENGINE", "sqlite")
+    lite = _run_all()
+
+    for key, expected in lite.items():
+        pd.testing.assert_frame_equal(
+            duck[key].reset_index(drop=True), expected, check_dtype=False, obj=key
+        )
+
+def test_duckdb_mirror_follows_inserts_updates_and_deletes(duckdb_engine):
+    from app.db.analytics import _mirror
+
+    _insert(duckdb_engine, ROWS)
+    assert len(history_frame()) == 5
+    assert _mirror().sync() == "current"
+
+    conn = sqlite3.connect(duckdb_engine)
+    conn.execute("UPDATE analysis_history SET plastic_percent = 0 WHERE image_hash = 'e'")
+    conn.execute("DELETE FROM analysis_history WHERE image_hash IN ('a', 'b')")
+    conn.commit()
+    conn.close()
+
+    assert _mirror().sync() == "incremental"
+    assert len(history_frame()) == 3
+    assert _plastic_total() == 120.0
+
+    # Applied entries are pruned from the log
+    assert get_connection(duckdb_engine).execute(
+        "SELECT COUNT(*) FROM history_changes"
+    ).fetchone()[0] == 0
+
+def test_duckdb_mirror_reloads_after_change_log_reset(duckdb_engine, monkeypatch):
+    """A recreated change log (engine toggled off and on) forces a full reload."""
+    from app.db.analytics import _mirror
+
+    _insert(duckdb_engine, ROWS[:2])
+    history_frame()
+
+    monkeypatch.setattr("app.db.analytics.ANALYTICS_ENGINE", "sqlite")
+    apply_analytics_policy()
+    _insert(duckdb_engine, ROWS[2:])
+    monkeypatch.setattr("app.db.analytics.ANALYTICS_ENGINE", "duckdb")
+    apply_analytics_policy()
+
+    assert _mirror().sync() == "full"
+    assert len(history_frame()) == 5
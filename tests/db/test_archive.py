@@ -0,0 +1,266 @@
+import sqlite3
+from datetime import date, datetime
+
+import pandas as pd
+import pytest
+
+from app.db import archive
+from app.db.analytics import apply_analytics_policy, history_bucket_sums, history_frame, history_totals
+from app.db.archive import (
+    apply_retention_policy,
+    archive_history,
+    read_archived_detections
+)
+from app.db.connection import close_connections, get_connection
+from app.db.database import (
+    clear_history,
+    count_history,
+    get_history_bounds,
+    load_history_page,
+    load_history_range,
+    undo_last_save
+)
+from app.db.migrations import migrate
+from app.db.rollup import load_rollup, load_history_summary, rebuild_rollups
+from app.db.schema import apply_dedup_policy
+
+# pytest tests/db/test_archive.py -v
+
+ROWS = [
+    # (datetime, image_hash, plastic_percent, metal_percent)
+    ("2024-01-05 10:00:00", "a", 10.0, 1.0),
+    ("2024-01-05 12:00:00", "b", 20.0, None),
+    ("2024-01-20 08:00:00", "c", 30.0, 3.0),
+    ("2024-02-10 09:00:00", "d", 40.0, 4.0),
+    ("2024-02-25 09:00:00", "e", 50.0, 5.0),   # after the cutoff: stays hot
+    ("2024-03-15 18:00:00", "f", 60.0, 6.0),
+]
+
+# Cutoff 2024-02-19: a-d are archived
+NOW = datetime(2024, 3, 20)
+AGE_DAYS = 30
+
+@pytest.fixture
+def archive_db(tmp_path, monkeypatch):
+    path = str(tmp_path / "archive.db")
+    for module in ("archive", "analytics", "database", "detections", "rollup", "schema", "migrations"):
+        monkeypatch.setattr(f"app.db.{module}.DB_PATH", path)
+    monkeypatch.setattr("app.db.archive.ARCHIVE_DIR", tmp_path / "archive")
+
+    migrate(get_connection(path))
+    apply_dedup_policy()
+
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO analysis_history (datetime, image, image_hash, source, model_version, "
+        "plastic_percent, metal_percent) VALUES (?, ?, ?, 'upload', 'v1', ?, ?)",
+        [(ts, f"{h}.jpg", h, plastic, metal) for ts, h, plastic, metal in ROWS]
+    )
+    conn.executemany(
+        "INSERT INTO analysis_detections (analysis_id, class, confidence, pixel_area) "
+        "SELECT id, 'plastic', 0.9, ? FROM analysis_history WHERE image_hash = ?",
+        [(100, "a"), (200, "a"), (300, "e")]
+    )
+    conn.commit()
+    conn.close()
+
+    yield path
+    close_connections()
+
+def _hot_hashes(path):
+    return [
+        row[0] for row in get_connection(path).execute(
+            "SELECT image_hash FROM analysis_history ORDER BY datetime"
+        )
+    ]
+
+def _parquet_files(tmp_path):
+    return sorted(p.relative_to(tmp_path / "archive").as_posix()
+                  for p in (tmp_path / "archive").rglob("*.parquet"))
+
+def test_archive_moves_old_records_to_monthly_partitions(archive_db, tmp_path):
+    result = archive_history(AGE_DAYS, now=NOW)
+
+    assert result["rows"] == 4
+    assert result["detections"] == 2
+    assert result["months"] == ["2024-01", "2024-02"]
+    assert _hot_hashes(archive_db) == ["e", "f"]
+
+    files = _parquet_files(tmp_path)
+    assert [f.rsplit("/", 1)[0] for f in files] == [
+        "detections/month=2024-01", "history/month=2024-01", "history/month=2024-02",
+    ]
+
+    # Detections of archived analyses moved with them
+    hot_detections = get_connection(archive_db).execute(
+        "SELECT COUNT(*) FROM analysis_detections"
+    ).fetchone()[0]
+    assert hot_detections == 1
+    archived = read_archived_detections(get_connection(archive_db), "2024-01-01", "2024-02-01")
+    assert archived["pixel_area"].tolist() == [100, 200]
+
+    # Nothing left to archive
+    assert archive_history(AGE_DAYS, now=NOW)["rows"] == 0
+
+def test_history_reads_span_hot_and_archived_records(archive_db):
+    archive_history(AGE_DAYS, now=NOW)
+
+    assert get_history_bounds() == ("2024-01-05 10:00:00", "2024-03-15 18:00:00")
+    assert count_history(date(2024, 1, 1), date(2024, 3, 31)) == 6
+    assert count_history(date(2024, 1, 5), date(2024, 1, 5)) == 2
+    assert count_history(date(2024, 2, 1), date(2024, 2, 28)) == 2
+
+    export = load_history_range(date(2024, 1, 1), date(2024, 3, 31), columns=["image_hash"])
+    assert export["image_hash"].tolist() == list("abcdef")
+
+    # Keyset pages cross from the archive into the hot table
+    pages, after = [], None
+    while True:
+        page = load_history_page(date(2024, 1, 1), date(2024, 3, 31), ["image_hash"], after=after, limit=4)
+        if page.empty:
+            break
+        pages.append(page["image_hash"].tolist())
+        after = (page["datetime"].iloc[-1], int(page["id"].iloc[-1]))
+    assert pages == [list("abcd"), list("ef")]
+
+    frame = history_frame(date(2024, 1, 20), date(2024, 2, 25), columns=["image_hash", "metal_percent"])
+    assert frame["image_hash"].tolist() == ["c", "d", "e"]
+    assert frame["metal_percent"].tolist() == [3.0, 4.0, 5.0]
+
+def test_reads_open_only_overlapping_partitions(archive_db, tmp_path):
+    archive_history(AGE_DAYS, now=NOW)
+
+    # Remove January's partition: ranges that do not reach it still work
+    for path in (tmp_path / "archive" / "history").glob("month=2024-01/*.parquet"):
+        path.unlink()
+
+    assert count_history(date(2024, 2, 1), date(2024, 3, 31)) == 3
+    assert load_history_range(date(2024, 2, 1), date(2024, 3, 31))["image_hash"].tolist() == ["d", "e", "f"]
+    assert history_frame(date(2024, 3, 1), date(2024, 3, 31))["image_hash"].tolist() == ["f"]
+
+def test_archived_records_stay_in_rollups(archive_db):
+    daily = load_rollup("daily")
+    weekly = load_rollup("weekly")
+
+    archive_history(AGE_DAYS, now=NOW)
+
+    for period, before in (("daily", daily), ("weekly", weekly)):
+        after = load_rollup(period)
+        assert after["samples"].tolist() == before["samples"].tolist()
+        assert after["plastic_percent"].tolist() == pytest.approx(before["plastic_percent"].tolist())
+
+    # A rebuild from the hot table adds the archive back in
+    rebuild_rollups()
+    rebuilt = load_rollup("daily")
+    assert rebuilt["samples"].tolist() == daily["samples"].tolist()
+    assert rebuilt["metal_percent"].tolist() == pytest.approx(daily["metal_percent"].tolist())
+
+def test_failed_archive_keeps_records_hot(archive_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(archive, "DELETE_ARCHIVED_ROWS", "DELETE FROM no_such_table")
+
+    with pytest.raises(sqlite3.OperationalError):
+        archive_history(AGE_DAYS, now=NOW)
+
+    assert _hot_hashes(archive_db) == list("abcdef")
+    assert _parquet_files(tmp_path) == []
+    assert get_connection(archive_db).execute("SELECT COUNT(*) FROM history_archive").fetchone()[0] == 0
+    assert load_rollup("daily")["samples"].sum() == 6
+
+def test_retention_policy_is_off_by_default(archive_db, monkeypatch):
+    assert apply_retention_policy() is None
+    assert len(_hot_hashes(archive_db)) == 6
+
+    monkeypatch.setattr(archive, "ARCHIVE_AFTER_DAYS", 0)
+    assert apply_retention_policy()["rows"] == 6
+    assert _hot_hashes(archive_db) == []
+    assert count_history(date(2024, 1, 1), date(2024, 12, 31)) == 6
+
+def test_summary_latest_falls_back_to_archive(archive_db):
+    archive_history(0, now=NOW)
+
+    summary = load_history_summary()
+    assert summary["total_images"] == 6
+    assert summary["latest"] == "2024-03-15 18:00:00"
+
+@pytest.mark.parametrize("engine", ["sqlite", "duckdb"])
+def test_aggregates_span_hot_and_archived_records(archive_db, tmp_path, monkeypatch, request, engine):
+    if engine == "duckdb":
+        pytest.importorskip("duckdb")
+        from app.db.duckdb_mirror import close_mirrors
+
+        monkeypatch.setattr("app.db.analytics.ANALYTICS_ENGINE", "duckdb")
+        monkeypatch.setattr("app.db.analytics.ANALYTICS_DUCKDB_PATH", str(tmp_path / "archive.duckdb"))
+        apply_analytics_policy()
+        request.addfinalizer(close_mirrors)
+
+    archive_history(AGE_DAYS, now=NOW)
+
+    monthly = history_bucket_sums("month")
+    assert monthly["bucket"].dt.strftime("%Y-%m").tolist() == ["2024-01", "2024-02", "2024-03"]
+    # February holds an archived (d) and a hot (e) record
+    assert monthly["samples"].tolist() == [3, 2, 1]
+    assert monthly["plastic_percent_sum"].tolist() == [60.0, 90.0, 60.0]
+    assert monthly["metal_percent_count"].tolist() == [2, 2, 1]
+
+    totals = history_totals()
+    assert totals["total_images"] == 6
+    assert totals["latest"] == "2024-03-15 18:00:00"
+    assert totals["class_sums"]["plastic"] == 210.0
+
+def test_clear_history_removes_archived_records(archive_db, tmp_path):
+    archive_history(AGE_DAYS, now=NOW)
+    assert _parquet_files(tmp_path)
+
+    clear_history()
+
+    assert count_history(date(2024, 1, 1), date(2024, 12, 31)) == 0
+    assert get_history_bounds() == (None, None)
+    assert _parquet_files(tmp_path) == []
+    assert get_connection(archive_db).execute("SELECT COUNT(*) FROM history_archive").fetchone()[0] == 0
+
+    summary = history_totals()
+    assert summary["total_images"] == 0
+    assert summary["latest"] is None
+
+    assert load_rollup("daily").empty
+    assert load_rollup("weekly").empty
+    assert history_bucket_sums("month").empty
+    assert history_frame().empty
+
+    # A rebuild finds nothing to merge back
+    rebuild_rollups()
+    assert load_rollup("daily").empty
+
+def test_undo_removes_newest_archived_record(archive_db, tmp_path):
+    archive_history(0, now=NOW)
+    daily = load_rollup("daily").set_index("date")
+
+    undo_last_save()
+
+    assert count_history(date(2024, 1, 1), date(2024, 12, 31)) == 5
+    assert get_history_bounds()[1] == "2024-02-25 09:00:00"
+    assert load_rollup("daily")["samples"].sum() == 5
+    assert pd.Timestamp("2024-03-15") in daily.index
+    assert pd.Timestamp("2024-03-15") not in load_rollup("daily")["date"].tolist()
+
+    # March's file is gone; the others are untouched
+    assert not any("month=2024-03" in f for f in _parquet_files(tmp_path))
+    assert history_totals()["class_sums"]["plastic"] == 150.0
+
+    # The rollups still match a rebuild from the rewritten archive
+    before = load_rollup("weekly")
+    rebuild_rollups()
+    pd.testing.assert_frame_equal(load_rollup("weekly"), before)
+
+    # e's detection goes with it; February keeps d in a rewritten file
+    undo_last_save()
+    assert read_archived_detections(get_connection(archive_db), "2024-02-01", "2024-03-01").empty
+    assert load_history_range(date(2024, 2, 1), date(2024, 2, 29), ["image_hash"])["image_hash"].tolist() == ["d"]
+
+def test_undo_prefers_the_newest_hot_record(archive_db):
+    archive_history(AGE_DAYS, now=NOW)
+
+    undo_last_save()
+
+    assert _hot_hashes(archive_db) == ["e"]
+    assert count_history(date(2024, 1, 1), date(2024, 12, 31)) == 5
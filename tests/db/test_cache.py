@@ -0,0 +1,117 @@
+import os
+import sqlite3
+from datetime import date
+
+import pytest
+
+from app.db import cache
+from app.db.cache import cached_read, clear_history_cache, history_cache_stats, history_version
+from app.db.connection import close_connections, get_connection
+from app.db.database import save_to_db, count_history, load_history_page
+from app.db.migrations import migrate
+from app.db.rollup import load_rollup, load_history_summary
+from app.db.schema import apply_dedup_policy
+from app.db.writer import HistoryWriter
+
+# pytest tests/db/test_cache.py -v
+
+PERCENTAGES = {
+    "Metal": 10.0,
+    "Mixed waste": 20.0,
+    "Paper&Cardboard": 30.0,
+    "Plastic": 25.0,
+    "Wood": 15.0,
+}
+
+TODAY = date.today()
+
+@pytest.fixture
+def cache_db(tmp_path, monkeypatch):
+    path = str(tmp_path / "cache.db")
+    for module in ("database", "detections", "rollup", "schema", "migrations", "writer", "archive"):
+        monkeypatch.setattr(f"app.db.{module}.DB_PATH", path)
+
+    migrate(get_connection(path))
+    apply_dedup_policy()
+    clear_history_cache()
+    yield path
+    clear_history_cache()
+    close_connections()
+
+def test_unchanged_database_is_served_without_queries(cache_db):
+    save_to_db("a.jpg", "hash_a", 0.5, PERCENTAGES)
+
+    first = cached_read(load_history_summary)
+
+    statements = []
+    get_connection(cache_db).set_trace_callback(statements.append)
+    try:
+        second = cached_read(load_history_summary)
+    finally:
+        get_connection(cache_db).set_trace_callback(None)
+
+    assert second == first
+    assert statements == []
+    assert history_cache_stats()["hits"] == 1
+
+def test_commits_from_any_connection_invalidate(cache_db):
+    assert cached_read(count_history, TODAY, TODAY) == 0
+
+    # Same thread, app connection
+    save_to_db("a.jpg", "hash_a", 0.5, PERCENTAGES)
+    assert cached_read(count_history, TODAY, TODAY) == 1
+
+    # Another connection (e.g. another process)
+    other = sqlite3.connect(cache_db)
+    other.execute(
+        "INSERT INTO analysis_history (datetime, image) VALUES (?, 'b.jpg')",
+        (f"{TODAY.isoformat()} 12:00:00",)
+    )
+    other.commit()
+    other.close()
+    assert cached_read(count_history, TODAY, TODAY) == 2
+
+    # The background writer thread
+    writer = HistoryWriter(batch_wait_ms=0)
+    writer.submit("c.jpg", "hash_c", 0.5, PERCENTAGES).result(timeout=10)
+    writer.close()
+    assert cached_read(count_history, TODAY, TODAY) == 3
+
+    assert history_cache_stats() == {"entries": 1, "hits": 0, "misses": 4}
+
+def test_arguments_are_part_of_the_key(cache_db):
+    save_to_db("a.jpg", "hash_a", 0.5, PERCENTAGES)
+
+    daily = cached_read(load_rollup, "daily")
+    weekly = cached_read(load_rollup, "weekly")
+    page = cached_read(load_history_page, TODAY, TODAY, columns=["image"], limit=5)
+
+    assert "date" in daily.columns and "week" in weekly.columns
+    assert page["image"].tolist() == ["a.jpg"]
+    assert history_cache_stats()["entries"] == 3
+
+def test_results_are_copies(cache_db):
+    save_to_db("a.jpg", "hash_a", 0.5, PERCENTAGES)
+
+    df = cached_read(load_rollup, "daily")
+    df["samples"] = 0
+
+    assert cached_read(load_rollup, "daily")["samples"].tolist() == [1]
+
+def test_least_recently_used_entries_are_evicted(cache_db, monkeypatch):
+    monkeypatch.setattr(cache, "HISTORY_CACHE_ENTRIES", 2)
+
+    cached_read(load_rollup, "daily")
+    cached_read(load_rollup, "weekly")
+    cached_read(load_rollup, "daily")
+    cached_read(load_history_summary)
+
+    assert history_cache_stats()["entries"] == 2
+    cached_read(load_rollup, "daily")
+    assert history_cache_stats()["hits"] == 2
+
+def test_missing_database_is_not_created(tmp_path):
+    path = str(tmp_path / "missing.db")
+
+    assert history_version(path) is None
+    assert not os.path.exists(path)
@@ -0,0 +1,84 @@
+import gc
+import os
+import sqlite3
+import threading
+import pytest
+
+from app.db.connection import get_connection, close_connections
+
+# pytest tests/db/test_connection.py -v
+
+@pytest.fixture
+def db_path(tmp_path):
+    yield str(tmp_path / "test.db")
+    close_connections()
+
+def test_get_connection_applies_pragmas(db_path):
+    """Connections run in WAL mode with relaxed fsync and a busy timeout."""
+    conn = get_connection(db_path)
+
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] > 0
+    assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+
+def test_get_connection_is_reused_per_thread(db_path):
+    """The same thread gets the same connection; other threads get their own."""
+    first = get_connection(db_path)
+    seen = []
+
+    def worker():
+        seen.append(get_connection(db_path))
+        close_connections()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+
+    assert get_connection(db_path) is first
+    assert seen[0] is not first
+
+def test_connections_close_when_thread_exits(db_path):
+    """A thread's connections are closed once it finishes, without close_connections."""
+    seen = []
+
+    def worker():
+        seen.append(get_connection(db_path))
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+    gc.collect()
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        seen[0].execute("SELECT 1")
+
+def test_get_connection_reopens_replaced_file(db_path):
+    """Deleting the database file yields a fresh connection on the next call."""
+    first = get_connection(db_path)
+    first.execute("CREATE TABLE t (x INTEGER)")
+    first.commit()
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+    second = get_connection(db_path)
+
+    assert second is not first
+    assert second.execute(
+        "SELECT name FROM sqlite_master WHERE name = 't'"
+    ).fetchone() is None
+
+def test_connection_context_rolls_back_on_error(db_path):
+    """Errors inside ``with get_connection()`` roll back and keep the connection open."""
+    with get_connection(db_path) as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+
+    with pytest.raises(sqlite3.IntegrityError):
+        with get_connection(db_path) as conn:
+            conn.execute("INSERT INTO t VALUES (1)")
+            raise sqlite3.IntegrityError("boom")
+
+    count = get_connection(db_path).execute("SELECT COUNT(*) FROM t").fetchone()[0]
+    assert count == 0
@@ -2,8 +2,20 @@ import sqlite3
 import tempfile
 import os
 import pytest
+from datetime import date
 
-from app.db.database import save_to_db
+from app.db.database import (
+    save_to_db,
+    save_batch_to_db,
+    load_batch,
+    delete_batch,
+    find_result_by_hash,
+    undo_last_save,
+    get_history_bounds,
+    count_history,
+    load_history_page,
+    load_history_range
+)
 
 # pytest tests/db/test_database_contract.py -v 
 
@@ -14,6 +26,8 @@ def temp_db(monkeypatch):
 
     # patch DB_PATH
     monkeypatch.setattr("app.db.database.DB_PATH", path)
+    monkeypatch.setattr("app.db.archive.DB_PATH", path)
+    monkeypatch.setattr("app.db.database.HISTORY_DEDUP", True)
 
     # create schema
     conn = sqlite3.connect(path)
@@ -32,10 +46,17 @@ def temp_db(monkeypatch):
             mixed_waste_percent REAL,
             paper_cardboard_percent REAL,
             plastic_percent REAL,
-            wood_percent REAL
+            wood_percent REAL,
+            batch_id TEXT
         )
     """)
 
+    cursor.execute("""
+        CREATE UNIQUE INDEX idx_history_unique_result
+        ON analysis_history (image_hash, model_version, confidence)
+        WHERE image_hash IS NOT NULL
+    """)
+
     conn.commit()
     conn.close()
 
@@ -117,3 +138,193 @@ def test_save_to_db_does_not_mutate_percentages(temp_db):
     )
 
     assert percentages == original
+
+def _percentages(value):
+    return {
+        "Metal": value,
+        "Mixed waste": value,
+        "Paper&Cardboard": value,
+        "Plastic": value,
+        "Wood": value,
+    }
+
+def test_save_batch_to_db_writes_all_rows_with_batch_id(temp_db):
+    entries = [(f"img_{i}.jpg", f"hash_{i}", _percentages(20.0)) for i in range(1000)]
+
+    result = save_batch_to_db(entries, conf=0.4)
+
+    assert result.rows == 1000
+    assert result.rows_per_second > 0
+
+    conn = sqlite3.connect(temp_db)
+    rows = conn.execute(
+        "SELECT COUNT(*), COUNT(DISTINCT batch_id), MIN(batch_id) FROM analysis_history"
+    ).fetchone()
+    conn.close()
+
+    assert rows == (1000, 1, result.batch_id)
+
+def test_load_and_delete_batch_only_touch_that_batch(temp_db):
+    save_to_db("single.jpg", "s", 0.5, _percentages(20.0))
+    first = save_batch_to_db(
+        [(f"a{i}.jpg", f"a{i}", _percentages(20.0)) for i in range(3)], conf=0.5
+    )
+    second = save_batch_to_db(
+        [(f"b{i}.jpg", f"b{i}", _percentages(20.0)) for i in range(2)], conf=0.5
+    )
+
+    assert len(load_batch(first.batch_id)) == 3
+    assert delete_batch(first.batch_id) == 3
+    assert load_batch(first.batch_id).empty
+
+    conn = sqlite3.connect(temp_db)
+    remaining = conn.execute("SELECT COUNT(*) FROM analysis_history").fetchone()[0]
+    conn.close()
+
+    assert remaining == 1 + second.rows
+
+def test_save_batch_to_db_writes_nothing_on_bad_entry(temp_db):
+    entries = [
+        ("ok.jpg", "ok", _percentages(20.0)),
+        ("bad.jpg", "bad", {"Metal": 1.0}),
+    ]
+
+    with pytest.raises(KeyError):
+        save_batch_to_db(entries, conf=0.5)
+
+    conn = sqlite3.connect(temp_db)
+    count = conn.execute("SELECT COUNT(*) FROM analysis_history").fetchone()[0]
+    conn.close()
+
+    assert count == 0
+
+def _row_count(path):
+    conn = sqlite3.connect(path)
+    count = conn.execute("SELECT COUNT(*) FROM analysis_history").fetchone()[0]
+    conn.close()
+    return count
+
+def test_save_to_db_upserts_same_image_and_settings(temp_db):
+    save_to_db("first.jpg", "same", 0.5, _percentages(20.0))
+    save_to_db("second.jpg", "same", 0.5, _percentages(10.0))
+    save_to_db("other_conf.jpg", "same", 0.25, _percentages(20.0))
+
+    conn = sqlite3.connect(temp_db)
+    rows = conn.execute(
+        "SELECT image, metal_percent FROM analysis_history WHERE confidence = 0.5"
+    ).fetchall()
+    conn.close()
+
+    assert rows == [("second.jpg", 10.0)]
+    assert _row_count(temp_db) == 2
+
+def test_save_batch_to_db_upserts_duplicates(temp_db):
+    save_to_db("single.jpg", "dup", 0.5, _percentages(20.0))
+    save_batch_to_db(
+        [("batch.jpg", "dup", _percentages(20.0)), ("new.jpg", "new", _percentages(20.0))],
+        conf=0.5
+    )
+
+    assert _row_count(temp_db) == 2
+
+def test_save_to_db_keeps_duplicates_when_policy_disabled(temp_db, monkeypatch):
+    monkeypatch.setattr("app.db.database.HISTORY_DEDUP", False)
+
+    conn = sqlite3.connect(temp_db)
+    conn.execute("DROP INDEX idx_history_unique_result")
+    conn.commit()
+    conn.close()
+
+    save_to_db("a.jpg", "same", 0.5, _percentages(20.0))
+    save_to_db("a.jpg", "same", 0.5, _percentages(20.0))
+
+    assert _row_count(temp_db) == 2
+
+def test_find_result_by_hash_returns_display_percentages(temp_db):
+    percentages = {
+        "Metal": 1.0,
+        "Mixed waste": 2.0,
+        "Paper&Cardboard": 3.0,
+        "Plastic": 4.0,
+        "Wood": 5.0,
+    }
+    save_to_db("img.png", "abc", 0.5, percentages)
+
+    assert find_result_by_hash("abc", 0.5) == percentages
+    assert find_result_by_hash("abc", 0.25) is None
+    assert find_result_by_hash("missing", 0.5) is None
+    assert find_result_by_hash(None, 0.5) is None
+
+def test_undo_last_save_removes_refreshed_record(temp_db):
+    conn = sqlite3.connect(temp_db)
+    conn.execute(
+        "INSERT INTO analysis_history (datetime, image, image_hash, model_version, confidence) "
+        "VALUES ('2020-01-01 00:00:00', 'old.jpg', 'old', 'v', 0.5)"
+    )
+    conn.commit()
+    conn.close()
+
+    save_to_db("newer.jpg", "newer", 0.5, _percentages(20.0))
+
+    undo_last_save()
+
+    conn = sqlite3.connect(temp_db)
+    images = [row[0] for row in conn.execute("SELECT image FROM analysis_history")]
+    conn.close()
+
+    assert images == ["old.jpg"]
+
+def _seed_history(path, timestamps):
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO analysis_history (datetime, image, plastic_percent) VALUES (?, ?, 1.0)",
+        [(ts, f"img_{i}.jpg") for i, ts in enumerate(timestamps)]
+    )
+    conn.commit()
+    conn.close()
+
+def test_history_bounds_and_count(temp_db):
+    assert get_history_bounds() == (None, None)
+
+    _seed_history(temp_db, [
+        "2024-01-01 08:00:00", "2024-01-02 23:59:59", "2024-01-03 00:00:00",
+    ])
+
+    assert get_history_bounds() == ("2024-01-01 08:00:00", "2024-01-03 00:00:00")
+    assert count_history(date(2024, 1, 1), date(2024, 1, 2)) == 2
+    assert count_history(date(2024, 1, 3), date(2024, 1, 3)) == 1
+
+def test_load_history_page_keyset_walks_all_rows_once(temp_db):
+    # Several rows share a timestamp, so the id tie-breaker matters
+    timestamps = [f"2024-01-{d:02d} 12:00:00" for d in range(1, 11) for _ in range(3)]
+    _seed_history(temp_db, timestamps)
+
+    seen, after = [], None
+    while True:
+        page = load_history_page(
+            date(2024, 1, 1), date(2024, 1, 10),
+            columns=["image"], after=after, limit=7
+        )
+        if page.empty:
+            break
+        seen.extend(page["id"].tolist())
+        after = (page["datetime"].iloc[-1], int(page["id"].iloc[-1]))
+
+    assert seen == list(range(1, 31))
+
+def test_load_history_page_projects_columns(temp_db):
+    _seed_history(temp_db, ["2024-01-01 00:00:00"])
+
+    page = load_history_page(date(2024, 1, 1), date(2024, 1, 1), columns=["image"])
+
+    assert list(page.columns) == ["id", "datetime", "image"]
+
+    with pytest.raises(ValueError):
+        load_history_page(date(2024, 1, 1), date(2024, 1, 1), columns=["image; DROP TABLE x"])
+
+def test_load_history_range_filters_dates(temp_db):
+    _seed_history(temp_db, ["2024-01-01 00:00:00", "2024-01-05 00:00:00", "2024-02-01 00:00:00"])
+
+    df = load_history_range(date(2024, 1, 1), date(2024, 1, 31), columns=["image"])
+
+    assert df["image"].tolist() == ["img_0.jpg", "img_1.jpg"]
@@ -0,0 +1,121 @@
+import pytest
+
+from app.db.connection import close_connections, get_connection
+from app.db.database import save_to_db, save_batch_to_db, undo_last_save, delete_batch, clear_history
+from app.db.detections import (
+    load_detections,
+    detection_class_stats,
+    detection_counts,
+    detection_areas
+)
+from app.db.migrations import migrate
+from app.db.schema import apply_dedup_policy
+
+# pytest tests/db/test_detections.py -v
+
+PERCENTAGES = {
+    "Metal": 10.0,
+    "Mixed waste": 20.0,
+    "Paper&Cardboard": 30.0,
+    "Plastic": 25.0,
+    "Wood": 15.0,
+}
+
+def _detection(name, confidence, area, bbox=(0.0, 0.0, 10.0, 10.0)):
+    return {"class": name, "confidence": confidence, "pixel_area": area, "bbox": list(bbox)}
+
+@pytest.fixture
+def detections_db(tmp_path, monkeypatch):
+    path = str(tmp_path / "detections.db")
+    for module in ("database", "detections", "rollup", "schema", "migrations", "archive"):
+        monkeypatch.setattr(f"app.db.{module}.DB_PATH", path)
+    for module in ("schema", "database"):
+        monkeypatch.setattr(f"app.db.{module}.HISTORY_DEDUP", True)
+
+    migrate(get_connection(path))
+    apply_dedup_policy()
+    yield path
+    close_connections()
+
+def _analysis_id(path, image):
+    return get_connection(path).execute(
+        "SELECT id FROM analysis_history WHERE image = ?", (image,)
+    ).fetchone()[0]
+
+def _detection_rows(path):
+    return get_connection(path).execute("SELECT COUNT(*) FROM analysis_detections").fetchone()[0]
+
+def test_save_to_db_stores_detections(detections_db):
+    save_to_db("a.jpg", "hash_a", 0.5, PERCENTAGES, detections=[
+        _detection("Plastic", 0.9, 120, (1, 2, 3, 4)),
+        _detection("Paper&Cardboard", 0.6, 80),
+    ])
+
+    df = load_detections(_analysis_id(detections_db, "a.jpg"))
+
+    assert df["class"].tolist() == ["plastic", "paper_cardboard"]
+    assert df["pixel_area"].tolist() == [120, 80]
+    assert df.loc[0, ["x1", "y1", "x2", "y2"]].tolist() == [1.0, 2.0, 3.0, 4.0]
+
+def test_upsert_replaces_detections(detections_db):
+    """Re-saving an image keeps one analysis and only its latest detections."""
+    save_to_db("a.jpg", "hash_a", 0.5, PERCENTAGES, detections=[_detection("Metal", 0.9, 10)] * 3)
+    save_to_db("a.jpg", "hash_a", 0.5, PERCENTAGES, detections=[_detection("Wood", 0.7, 50)])
+
+    df = load_detections(_analysis_id(detections_db, "a.jpg"))
+
+    assert df["class"].tolist() == ["wood"]
+    assert _detection_rows(detections_db) == 1
+
+def test_save_without_detections_keeps_stored_ones(detections_db):
+    save_to_db("a.jpg", "hash_a", 0.5, PERCENTAGES, detections=[_detection("Metal", 0.9, 10)])
+    save_to_db("a.jpg", "hash_a", 0.5, PERCENTAGES)
+
+    assert _detection_rows(detections_db) == 1
+
+def test_batch_save_stores_detections_per_entry(detections_db):
+    result = save_batch_to_db([
+        ("a.jpg", "hash_a", PERCENTAGES, [_detection("Metal", 0.9, 10), _detection("Metal", 0.8, 20)]),
+        ("b.jpg", "hash_b", PERCENTAGES, [_detection("Wood", 0.7, 30)]),
+        ("c.jpg", "hash_c", PERCENTAGES),
+    ], conf=0.5)
+
+    assert result.rows == 3
+    assert len(load_detections(_analysis_id(detections_db, "a.jpg"))) == 2
+    assert len(load_detections(_analysis_id(detections_db, "b.jpg"))) == 1
+    assert load_detections(_analysis_id(detections_db, "c.jpg")).empty
+
+    delete_batch(result.batch_id)
+    assert _detection_rows(detections_db) == 0
+
+def test_deletes_cascade_to_detections(detections_db):
+    save_to_db("a.jpg", "hash_a", 0.5, PERCENTAGES, detections=[_detection("Metal", 0.9, 10)])
+    save_to_db("b.jpg", "hash_b", 0.5, PERCENTAGES, detections=[_detection("Wood", 0.9, 10)] * 2)
+
+    undo_last_save()
+    assert _detection_rows(detections_db) == 1
+
+    clear_history()
+    assert _detection_rows(detections_db) == 0
+
+def test_detection_query_helpers(detections_db):
+    save_to_db("a.jpg", "hash_a", 0.5, PERCENTAGES, detections=[
+        _detection("Plastic", 0.9, 100),
+        _detection("Plastic", 0.5, 300),
+        _detection("Metal", 0.8, 50),
+    ])
+    save_to_db("b.jpg", "hash_b", 0.5, PERCENTAGES, detections=[_detection("Plastic", 0.7, 200)])
+
+    stats = detection_class_stats("2000-01-01", "2100-01-01").set_index("class")
+    assert stats.loc["plastic", "detections"] == 3
+    assert stats.loc["plastic", "images"] == 2
+    assert stats.loc["plastic", "mean_pixel_area"] == pytest.approx(200.0)
+    assert stats.loc["plastic", "mean_confidence"] == pytest.approx(0.7)
+    assert stats.loc["metal", "max_pixel_area"] == 50
+
+    counts = detection_counts("2000-01-01", "2100-01-01")
+    a_counts = counts[counts["image"] == "a.jpg"].set_index("class")["objects"].to_dict()
+    assert a_counts == {"metal": 1, "plastic": 2}
+
+    assert sorted(detection_areas("plastic", min_confidence=0.6).tolist()) == [100, 200]
+    assert detection_class_stats("1990-01-01", "1990-01-02").empty
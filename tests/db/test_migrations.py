@@ -0,0 +1,101 @@
+import sqlite3
+import pytest
+
+from app.db import migrations
+from app.db.connection import close_connections, get_connection
+from app.db.migrations import SCHEMA_VERSION, migrate, init_db, get_schema_version
+
+# pytest tests/db/test_migrations.py -v
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "migrations.db")
+    for module in ("migrations", "schema", "database", "rollup", "archive"):
+        monkeypatch.setattr(f"app.db.{module}.DB_PATH", path)
+    monkeypatch.setattr(migrations, "_initialized", set())
+    yield path
+    close_connections()
+
+def _tables(path):
+    conn = sqlite3.connect(path)
+    names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+    conn.close()
+    return names
+
+def test_migrate_fresh_database_to_latest(db_path):
+    conn = get_connection(db_path)
+
+    assert migrate(conn) == list(range(1, SCHEMA_VERSION + 1))
+    assert get_schema_version(conn) == SCHEMA_VERSION
+    assert {"analysis_history", "history_rollup_daily", "idx_history_datetime"} <= _tables(db_path)
+
+    # Nothing left to apply
+    assert migrate(conn) == []
+
+def test_migrate_legacy_database_adds_columns_and_backfills_once(db_path, monkeypatch):
+    """An unversioned pre-metadata database is upgraded; the backfill is one-off."""
+    monkeypatch.setattr("app.db.migrations.IMAGE_SOURCE", "upload")
+    monkeypatch.setattr("app.db.migrations.MODEL_VERSION", "v1")
+
+    legacy = sqlite3.connect(db_path)
+    legacy.execute("""
+        CREATE TABLE analysis_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            datetime TEXT, image TEXT, confidence REAL,
+            metal_percent REAL, mixed_waste_percent REAL,
+            paper_cardboard_percent REAL, plastic_percent REAL, wood_percent REAL
+        )
+    """)
+    legacy.execute(
+        "INSERT INTO analysis_history (datetime, image, plastic_percent) "
+        "VALUES ('2024-03-04 08:00:00', 'old.jpg', 40.0)"
+    )
+    legacy.commit()
+    legacy.close()
+
+    conn = get_connection(db_path)
+    migrate(conn)
+
+    row = conn.execute(
+        "SELECT source, model_version, image_hash, batch_id FROM analysis_history"
+    ).fetchone()
+    assert row == ("upload", "v1", None, None)
+    assert conn.execute("SELECT samples FROM history_rollup_daily").fetchall() == [(1,)]
+
+    # Rows written later with missing metadata are not rewritten by a rerun
+    with conn:
+        conn.execute("INSERT INTO analysis_history (datetime, image) VALUES ('2024-03-05', 'new.jpg')")
+    migrate(conn)
+
+    assert conn.execute(
+        "SELECT source FROM analysis_history WHERE image = 'new.jpg'"
+    ).fetchone() == (None,)
+
+def test_failed_migration_rolls_back_and_keeps_version(db_path, monkeypatch):
+    def broken(conn):
+        conn.execute("CREATE TABLE half_done (x)")
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(
+        migrations, "MIGRATIONS",
+        migrations.MIGRATIONS + [(SCHEMA_VERSION + 1, "broken", broken)]
+    )
+    conn = get_connection(db_path)
+
+    with pytest.raises(RuntimeError):
+        migrate(conn)
+
+    assert get_schema_version(conn) == SCHEMA_VERSION
+    assert "half_done" not in _tables(db_path)
+
+def test_init_db_runs_once_per_process(db_path, monkeypatch):
+    calls = []
+    real_migrate = migrations.migrate
+    monkeypatch.setattr(migrations, "migrate", lambda conn: calls.append(1) or real_migrate(conn))
+
+    assert init_db() is True
+    assert init_db() is False
+    assert init_db() is False
+
+    assert calls == [1]
+    assert get_schema_version(get_connection(db_path)) == SCHEMA_VERSION
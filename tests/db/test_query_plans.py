@@ -0,0 +1,222 @@
+import sqlite3
+import pytest
+
+from app.db import queries
+from app.db.connection import close_connections
+from app.db.connection import get_connection
+from app.db.detections import install_detections
+from app.db.rollup import create_rollups
+from app.db.schema import create_tables, migrate_db, create_indexes, apply_dedup_policy
+
+# pytest tests/db/test_query_plans.py -v
+
+SYNTHETIC_ROWS = 50_000
+
+# (name, sql, params) for every read/targeted-write statement the app issues
+QUERIES = [
+    ("select_history", queries.SELECT_HISTORY, ()),
+    ("select_last_saved_id", queries.SELECT_LAST_SAVED_ID, ()),
+    ("select_result_by_hash", queries.SELECT_RESULT_BY_HASH, ("hash_42", "v0", 0.5)),
+    ("delete_duplicate_results", queries.DELETE_DUPLICATE_RESULTS, ()),
+    ("delete_by_id", queries.DELETE_BY_ID, (1,)),
+    ("count_history", queries.COUNT_HISTORY, ()),
+    ("select_batch", queries.SELECT_BATCH, ("batch_7",)),
+    ("delete_batch", queries.DELETE_BATCH, ("batch_7",)),
+    ("backfill_metadata", queries.BACKFILL_METADATA, ("upload", "v1")),
+    ("history_bounds", queries.SELECT_HISTORY_BOUNDS, ()),
+    ("count_history_range", queries.COUNT_HISTORY_RANGE, ("2024-01-01", "2024-02-01")),
+    (
+        "history_page",
+        queries.SELECT_HISTORY_PAGE.format(columns="id, datetime, image, plastic_percent"),
+        ("2024-03-05", "2024-06-01", "2024-03-05 10:00:00", 123, 20),
+    ),
+    (
+        "history_range",
+        queries.SELECT_HISTORY_RANGE.format(columns="*"),
+        ("2024-01-01", "2024-02-01"),
+    ),
+    *[
+        (
+            f"history_buckets_{freq}",
+            queries.SELECT_HISTORY_BUCKETS.format(bucket=bucket.format(ts="datetime")),
+            ("2024-01-01", "2024-07-01"),
+        )
+        for freq, bucket in queries.ANALYTICS_BUCKETS.items()
+    ],
+    (
+        "rollup_daily",
+        queries.select_rollup("daily"),
+        {"model_version": None, "source": None},
+    ),
+    (
+        "rollup_weekly",
+        queries.select_rollup("weekly"),
+        {"model_version": "v1", "source": "upload"},
+    ),
+    ("history_summary", queries.SELECT_HISTORY_SUMMARY, ()),
+    ("detections_for", queries.SELECT_DETECTIONS_FOR, (42,)),
+    ("delete_detections_for", queries.DELETE_DETECTIONS_FOR, (42,)),
+    (
+        "detection_class_stats",
+        queries.SELECT_DETECTION_CLASS_STATS,
+        ("2024-01-01", "2024-02-01"),
+    ),
+    (
+        "detection_counts",
+        queries.SELECT_DETECTION_COUNTS,
+        ("2024-01-01", "2024-02-01"),
+    ),
+    ("detection_areas", queries.SELECT_DETECTION_AREAS, ("plastic", 0.5)),
+    ("changed_ids", queries.SELECT_CHANGED_IDS, (10, 20)),
+    ("changed_rows", queries.SELECT_CHANGED_ROWS.format(columns="*"), (10, 20)),
+    ("prune_change_log", queries.PRUNE_CHANGE_LOG, (20,)),
+    ("archive_months", queries.SELECT_ARCHIVE_MONTHS, ("2024-03-01",)),
+    ("archive_rows", queries.SELECT_ARCHIVE_ROWS.format(columns="*"), ("2024-01-01", "2024-02-01")),
+    (
+        "archive_detections",
+        queries.SELECT_ARCHIVE_DETECTIONS.format(columns="d.*"),
+        ("2024-01-01", "2024-02-01"),
+    ),
+    ("delete_archived_rows", queries.DELETE_ARCHIVED_ROWS, ("2024-01-01", "2024-02-01")),
+    *[
+        (f"rollup_merge_{period}", queries.rollup_merge(period), ("2024-01-01", "2024-02-01"))
+        for period in queries.ROLLUP_PERIODS
+    ],
+]
+
+# Index-shape checks: hand-written filters the app does not issue itself,
+# kept to show each index in HISTORY_INDEXES still serves its filter shape
+INDEX_SHAPES = [
+    (
+        "date_range",
+        "SELECT * FROM analysis_history WHERE datetime BETWEEN ? AND ? ORDER BY datetime",
+        ("2024-01-01", "2024-01-31"),
+    ),
+    (
+        "hash_lookup",
+        "SELECT * FROM analysis_history WHERE image_hash = ?",
+        ("hash_42",),
+    ),
+    (
+        "model_version_range",
+        "SELECT * FROM analysis_history WHERE model_version = ? AND datetime >= ? ORDER BY datetime",
+        ("v1", "2024-01-01"),
+    ),
+    (
+        "source_range",
+        "SELECT * FROM analysis_history WHERE source = ? AND datetime >= ? ORDER BY datetime",
+        ("upload", "2024-01-01"),
+    ),
+]
+
+@pytest.fixture(scope="module")
+def synthetic_db(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("plans") / "history.db")
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr("app.db.schema.DB_PATH", path)
+        mp.setattr("app.db.rollup.DB_PATH", path)
+        # Plans are checked with deduplication on, so its unique index is covered
+        mp.setattr("app.db.schema.HISTORY_DEDUP", True)
+        create_tables()
+        migrate_db()
+
+        conn = sqlite3.connect(path)
+        conn.executemany(
+            """
+            INSERT INTO analysis_history (
+                datetime, image, image_hash, source, model_version, confidence, batch_id
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            [
+                (
+                    f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d} {i % 24:02d}:00:00",
+                    f"img_{i}.jpg",
+                    f"hash_{i}",
+                    "upload" if i % 5 else "camera",
+                    f"v{i % 3}",
+                    0.5,
+                    f"batch_{i // 100}",
+                )
+                for i in range(SYNTHETIC_ROWS)
+            ],
+        )
+        conn.commit()
+        conn.close()
+
+        create_indexes()
+        apply_dedup_policy()
+        create_rollups()
+
+        with get_connection(path) as conn:
+            install_detections(conn)
+            for statement in queries.CHANGE_LOG_SCHEMA:
+                conn.execute(statement)
+            conn.executemany(
+                "INSERT INTO analysis_detections (analysis_id, class, confidence, pixel_area) "
+                "VALUES (?, ?, ?, ?)",
+                [
+                    (i // 3 + 1, ("metal", "plastic", "wood")[i % 3], (i % 10) / 10, i % 500)
+                    for i in range(SYNTHETIC_ROWS * 3)
+                ],
+            )
+            conn.execute("ANALYZE")
+
+        close_connections()
+
+    conn = sqlite3.connect(path)
+    yield conn
+    conn.close()
+
+# Large tables (and their query aliases) that must never be scanned without an index
+SCANNED_TABLES = [
+    ["SCAN", table]
+    for table in ("analysis_history", "analysis_detections", "history_changes", "h", "d")
+]
+
+def _plan(conn, sql, params):
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+def _full_scan_steps(plan):
+    return [
+        step for step in plan
+        if (step.split()[:2] in SCANNED_TABLES and "INDEX" not in step)
+        or "TEMP B-TREE FOR ORDER BY" in step
+    ]
+
+@pytest.mark.parametrize("name,sql,params", QUERIES, ids=[q[0] for q in QUERIES])
+def test_query_does_not_full_scan(synthetic_db, name, sql, params):
+    """Each query is served by an index (or the rowid), never a table scan or sort."""
+    plan = _plan(synthetic_db, sql, params)
+
+    assert plan, f"{name}: empty plan"
+    assert _full_scan_steps(plan) == [], f"{name}: {plan}"
+
+@pytest.mark.parametrize("name,sql,params", INDEX_SHAPES, ids=[q[0] for q in INDEX_SHAPES])
+def test_index_shape_is_served(synthetic_db, name, sql, params):
+    """Each indexed filter shape is answered from its index, without a scan or sort."""
+    plan = _plan(synthetic_db, sql, params)
+
+    assert plan, f"{name}: empty plan"
+    assert _full_scan_steps(plan) == [], f"{name}: {plan}"
+
+def test_create_indexes_is_idempotent(tmp_path, monkeypatch):
+    """Running the index migration twice keeps one copy of each index."""
+    path = str(tmp_path / "idempotent.db")
+    monkeypatch.setattr("app.db.schema.DB_PATH", path)
+
+    create_tables()
+    create_indexes()
+    create_indexes()
+
+    conn = sqlite3.connect(path)
+    names = {
+        row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'analysis_history'"
+        )
+    }
+    conn.close()
+    close_connections()
+
+    assert set(queries.HISTORY_INDEXES) <= names
@@ -0,0 +1,186 @@
+import random
+import sqlite3
+import pytest
+
+from app.db.connection import close_connections
+from app.db.database import save_to_db, undo_last_save, clear_history
+from app.db.rollup import create_rollups, rebuild_rollups, load_rollup, load_history_summary
+from app.db.schema import create_tables, migrate_db, apply_dedup_policy
+
+# pytest tests/db/test_rollup.py -v
+
+PERCENTAGES = {
+    "Metal": 10.0,
+    "Mixed waste": 20.0,
+    "Paper&Cardboard": 30.0,
+    "Plastic": 25.0,
+    "Wood": 15.0,
+}
+
+@pytest.fixture
+def rollup_db(tmp_path, monkeypatch):
+    path = str(tmp_path / "rollup.db")
+    for module in ("schema", "database", "rollup", "archive"):
+        monkeypatch.setattr(f"app.db.{module}.DB_PATH", path)
+    for module in ("schema", "database"):
+        monkeypatch.setattr(f"app.db.{module}.HISTORY_DEDUP", True)
+
+    create_tables()
+    migrate_db()
+    apply_dedup_policy()
+    create_rollups()
+    yield path
+    close_connections()
+
+def _insert(path, rows):
+    """rows: (datetime, model_version, source, plastic_percent)"""
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO analysis_history (datetime, model_version, source, plastic_percent) "
+        "VALUES (?, ?, ?, ?)",
+        rows
+    )
+    conn.commit()
+    conn.close()
+
+def _table(path, table):
+    conn = sqlite3.connect(path)
+    rows = conn.execute(f"SELECT * FROM {table} ORDER BY 1, 2, 3").fetchall()
+    conn.close()
+    return rows
+
+def test_insert_and_delete_update_daily_rollup(rollup_db):
+    """Means and counts follow inserts; a bucket disappears with its last row."""
+    _insert(rollup_db, [
+        ("2024-03-04 08:00:00", "v1", "upload", 10.0),
+        ("2024-03-04 18:00:00", "v1", "upload", 30.0),
+        ("2024-03-05 09:00:00", "v1", "upload", 50.0),
+    ])
+
+    daily = load_rollup("daily")
+    assert daily["date"].dt.strftime("%Y-%m-%d").tolist() == ["2024-03-04", "2024-03-05"]
+    assert daily["plastic_percent"].tolist() == [20.0, 50.0]
+    assert daily["samples"].tolist() == [2, 1]
+
+    conn = sqlite3.connect(rollup_db)
+    conn.execute("DELETE FROM analysis_history WHERE datetime LIKE '2024-03-05%'")
+    conn.commit()
+    conn.close()
+
+    assert load_rollup("daily")["samples"].tolist() == [2]
+
+def test_weekly_rollup_uses_iso_monday(rollup_db):
+    """Sunday belongs to the week starting the previous Monday."""
+    _insert(rollup_db, [
+        ("2024-01-01 00:00:00", "v1", "upload", 10.0),  # Monday
+        ("2024-01-07 23:59:59", "v1", "upload", 20.0),  # Sunday
+        ("2024-01-08 00:00:00", "v1", "upload", 30.0),  # next Monday
+    ])
+
+    weekly = load_rollup("weekly")
+
+    assert weekly["week"].dt.strftime("%Y-%m-%d").tolist() == ["2024-01-01", "2024-01-08"]
+    assert weekly["samples"].tolist() == [2, 1]
+    assert weekly["plastic_percent"].tolist() == [15.0, 30.0]
+
+def test_rollup_filters_by_model_version_and_source(rollup_db):
+    _insert(rollup_db, [
+        ("2024-03-04 08:00:00", "v1", "upload", 10.0),
+        ("2024-03-04 09:00:00", "v2", "upload", 30.0),
+        ("2024-03-04 10:00:00", "v2", "camera", 50.0),
+    ])
+
+    assert load_rollup("daily")["samples"].tolist() == [3]
+    assert load_rollup("daily", model_version="v2")["plastic_percent"].tolist() == [40.0]
+    assert load_rollup("daily", model_version="v2", source="camera")["samples"].tolist() == [1]
+    assert load_rollup("daily", source="missing").empty
+
+def test_save_upsert_undo_and_clear_keep_rollup_in_sync(rollup_db):
+    """Upserts move a record instead of adding one; undo and clear subtract it."""
+    save_to_db("a.jpg", "hash_a", 0.5, PERCENTAGES)
+    save_to_db("a.jpg", "hash_a", 0.5, {**PERCENTAGES, "Plastic": 45.0})
+
+    daily = load_rollup("daily")
+    assert daily["samples"].tolist() == [1]
+    assert daily["plastic_percent"].tolist() == [45.0]
+
+    save_to_db("b.jpg", "hash_b", 0.5, PERCENTAGES)
+    assert load_rollup("daily")["samples"].tolist() == [2]
+
+    undo_last_save()
+    assert load_rollup("daily")["samples"].tolist() == [1]
+
+    clear_history()
+    assert load_rollup("daily").empty
+    assert load_rollup("weekly").empty
+
+def test_trigger_maintained_rollup_matches_rebuild(rollup_db):
+    """Random inserts, updates and deletes end in the same state as a rebuild."""
+    rng = random.Random(7)
+    _insert(rollup_db, [
+        (
+            f"2024-{rng.randint(1, 3):02d}-{rng.randint(1, 28):02d} {rng.randint(0, 23):02d}:00:00",
+            rng.choice(["v1", "v2", None]),
+            rng.choice(["upload", "camera", None]),
+            rng.choice([rng.uniform(0, 100), None]),
+        )
+        for _ in range(500)
+    ])
+
+    conn = sqlite3.connect(rollup_db)
+    conn.execute("DELETE FROM analysis_history WHERE id % 7 = 0")
+    conn.execute(
+        "UPDATE analysis_history SET datetime = '2024-04-01 12:00:00', source = 'camera' "
+        "WHERE id % 11 = 0"
+    )
+    conn.commit()
+    conn.close()
+
+    incremental = {
+        table: _table(rollup_db, table)
+        for table in ("history_rollup_daily", "history_rollup_weekly")
+    }
+
+    rebuild_rollups()
+
+    for table, rows in incremental.items():
+        rebuilt = _table(rollup_db, table)
+        assert [row[:4] for row in rows] == [row[:4] for row in rebuilt]
+        for row, expected in zip(rows, rebuilt):
+            assert row[4:] == pytest.approx(expected[4:])
+
+def test_create_rollups_backfills_existing_history(tmp_path, monkeypatch):
+    """Rollups added to a database that already has history start out populated."""
+    path = str(tmp_path / "existing.db")
+    for module in ("schema", "rollup"):
+        monkeypatch.setattr(f"app.db.{module}.DB_PATH", path)
+
+    create_tables()
+    _insert(path, [("2024-03-04 08:00:00", "v1", "upload", 10.0)] * 3)
+
+    create_rollups()
+    create_rollups()
+
+    assert load_rollup("daily")["samples"].tolist() == [3]
+    close_connections()
+
+def test_history_summary_matches_full_scan(rollup_db):
+    """Totals from the rollup equal those computed over every row."""
+    assert load_history_summary()["total_images"] == 0
+    assert load_history_summary()["latest"] is None
+
+    _insert(rollup_db, [
+        ("2024-03-04 08:00:00", "v1", "upload", 10.0),
+        ("2024-03-09 18:30:00", "v2", "camera", 30.0),
+        ("2024-02-01 09:00:00", "v1", "upload", None),
+    ])
+
+    summary = load_history_summary()
+
+    assert summary["total_images"] == 3
+    assert summary["latest"] == "2024-03-09 18:30:00"
+    assert summary["class_sums"]["plastic"] == 40.0
+    assert summary["class_sums"]["metal"] == 0.0
+    assert list(summary["class_sums"]) == [
+        "metal", "mixed_waste", "paper_cardboard", "plastic", "wood"
+    ]
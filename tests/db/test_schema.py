@@ -0,0 +1,73 @@
+import sqlite3
+import pytest
+
+from app.db.connection import close_connections
+from app.db.schema import create_tables, apply_dedup_policy, remove_duplicate_results
+
+# pytest tests/db/test_schema.py -v
+
+@pytest.fixture
+def schema_db(tmp_path, monkeypatch):
+    path = str(tmp_path / "schema.db")
+    monkeypatch.setattr("app.db.schema.DB_PATH", path)
+    monkeypatch.setattr("app.db.schema.HISTORY_DEDUP", True)
+    create_tables()
+    yield path
+    close_connections()
+
+def _insert(path, rows):
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO analysis_history (image, image_hash, model_version, confidence) "
+        "VALUES (?, ?, ?, ?)",
+        rows
+    )
+    conn.commit()
+    conn.close()
+
+DUPLICATED = [
+    ("old.jpg", "h", "v1", 0.5),
+    ("new.jpg", "h", "v1", 0.5),
+    ("other_conf.jpg", "h", "v1", 0.25),
+    ("legacy1.jpg", None, "v1", 0.5),
+    ("legacy2.jpg", None, "v1", 0.5),
+]
+
+def _images(path):
+    conn = sqlite3.connect(path)
+    images = sorted(row[0] for row in conn.execute("SELECT image FROM analysis_history"))
+    conn.close()
+    return images
+
+def test_dedup_is_off_by_default():
+    from app.core import config
+    assert config.HISTORY_DEDUP is False
+
+def test_apply_dedup_policy_never_deletes_existing_rows(schema_db):
+    """With duplicates present the policy is not enforced and every row is kept."""
+    _insert(schema_db, DUPLICATED)
+
+    assert apply_dedup_policy() is False
+    assert len(_images(schema_db)) == len(DUPLICATED)
+
+    # No unique index: saves keep inserting
+    _insert(schema_db, [("again.jpg", "h", "v1", 0.5)])
+
+def test_remove_duplicate_results_keeps_newest_per_key(schema_db):
+    """Duplicates collapse to the newest row; hashless legacy rows are untouched."""
+    _insert(schema_db, DUPLICATED)
+
+    assert remove_duplicate_results() == 1
+    assert _images(schema_db) == ["legacy1.jpg", "legacy2.jpg", "new.jpg", "other_conf.jpg"]
+    assert apply_dedup_policy() is True
+
+    with pytest.raises(sqlite3.IntegrityError):
+        _insert(schema_db, [("again.jpg", "h", "v1", 0.5)])
+
+def test_apply_dedup_policy_disabled_drops_unique_index(schema_db, monkeypatch):
+    """Turning the policy off allows duplicates again."""
+    apply_dedup_policy()
+    monkeypatch.setattr("app.db.schema.HISTORY_DEDUP", False)
+    apply_dedup_policy()
+
+    _insert(schema_db, [("a.jpg", "h", "v1", 0.5), ("b.jpg", "h", "v1", 0.5)])
@@ -0,0 +1,142 @@
+import sqlite3
+import threading
+
+import pytest
+
+from app.db import writer
+from app.db.connection import close_connections, get_connection
+from app.db.database import BatchSaveResult
+from app.db.detections import load_detections
+from app.db.migrations import migrate
+from app.db.schema import apply_dedup_policy
+from app.db.writer import HistoryWriter, queue_save
+
+# pytest tests/db/test_writer.py -v
+
+PERCENTAGES = {
+    "Metal": 10.0,
+    "Mixed waste": 20.0,
+    "Paper&Cardboard": 30.0,
+    "Plastic": 25.0,
+    "Wood": 15.0,
+}
+
+@pytest.fixture
+def writer_db(tmp_path, monkeypatch):
+    path = str(tmp_path / "writer.db")
+    for module in ("database", "detections", "rollup", "schema", "migrations", "writer", "archive"):
+        monkeypatch.setattr(f"app.db.{module}.DB_PATH", path)
+
+    migrate(get_connection(path))
+    apply_dedup_policy()
+    yield path
+    close_connections()
+
+@pytest.fixture
+def history_writer(writer_db):
+    instance = HistoryWriter(batch_wait_ms=300)
+    yield instance
+    instance.close()
+
+def _images(path):
+    return [
+        row[0] for row in get_connection(path).execute(
+            "SELECT image FROM analysis_history ORDER BY id"
+        )
+    ]
+
+def test_saves_are_grouped_into_few_transactions(writer_db, history_writer):
+    futures = [
+        history_writer.submit(f"{i}.jpg", f"hash_{i}", 0.5, PERCENTAGES) for i in range(50)
+    ]
+
+    for future in futures:
+        assert future.result(timeout=10) is None
+
+    stats = history_writer.stats()
+    assert stats.committed == 50
+    assert stats.failed == 0
+    assert stats.queue_depth == 0
+    assert 1 <= stats.transactions <= 2
+    assert stats.max_commit_ms >= stats.last_commit_ms > 0
+    assert _images(writer_db) == [f"{i}.jpg" for i in range(50)]
+
+def test_failed_save_does_not_fail_its_group(writer_db, history_writer):
+    good = history_writer.submit("a.jpg", "hash_a", 0.5, PERCENTAGES, detections=[
+        {"class": "Plastic", "confidence": 0.9, "pixel_area": 10, "bbox": [0, 0, 1, 1]},
+    ])
+    bad = history_writer.submit("b.jpg", "hash_b", 0.5, PERCENTAGES, detections=[{"class": "Plastic"}])
+    also_good = history_writer.submit("c.jpg", "hash_c", 0.5, PERCENTAGES)
+
+    assert good.result(timeout=10) is None
+    assert also_good.result(timeout=10) is None
+    with pytest.raises(KeyError):
+        bad.result(timeout=10)
+
+    assert _images(writer_db) == ["a.jpg", "c.jpg"]
+    analysis_id = get_connection(writer_db).execute(
+        "SELECT id FROM analysis_history WHERE image = 'a.jpg'"
+    ).fetchone()[0]
+    assert len(load_detections(analysis_id)) == 1
+
+    stats = history_writer.stats()
+    assert (stats.committed, stats.failed) == (2, 1)
+
+def test_batch_jobs_keep_submission_order(writer_db, history_writer):
+    first = history_writer.submit("a.jpg", "hash_a", 0.5, PERCENTAGES)
+    batch = history_writer.submit_batch(
+        [("b.jpg", "hash_b", PERCENTAGES), ("c.jpg", "hash_c", PERCENTAGES)], conf=0.5
+    )
+    last = history_writer.submit("d.jpg", "hash_d", 0.5, PERCENTAGES)
+
+    result = batch.result(timeout=10)
+    last.result(timeout=10)
+    first.result(timeout=10)
+
+    assert isinstance(result, BatchSaveResult)
+    assert result.rows == 2
+    assert _images(writer_db) == ["a.jpg", "b.jpg", "c.jpg", "d.jpg"]
+
+def test_first_batch_job_uses_write_synchronous(writer_db, history_writer):
+    """A batch that is the writer's first job already commits at WRITE_SYNCHRONOUS."""
+    sync = history_writer._put(writer._Request(
+        job=lambda: get_connection(writer_db).execute("PRAGMA synchronous").fetchone()[0]
+    ))
+
+    # 2 = FULL
+    assert sync.result(timeout=10) == 2
+
+def test_close_commits_queued_saves(writer_db):
+    instance = HistoryWriter(batch_wait_ms=300)
+    futures = [instance.submit(f"{i}.jpg", f"hash_{i}", 0.5, PERCENTAGES) for i in range(5)]
+
+    instance.close()
+
+    assert all(future.done() for future in futures)
+    assert len(_images(writer_db)) == 5
+    with pytest.raises(RuntimeError):
+        instance.submit("late.jpg", "hash_late", 0.5, PERCENTAGES)
+
+def test_flush_waits_for_pending_saves(writer_db, history_writer):
+    # Hold the database write lock so the writer has to wait
+    blocker = sqlite3.connect(writer_db, check_same_thread=False)
+    blocker.execute("BEGIN IMMEDIATE")
+
+    future = history_writer.submit("a.jpg", "hash_a", 0.5, PERCENTAGES)
+    assert history_writer.flush(timeout=0.5) is False
+    assert not future.done()
+
+    threading.Timer(0.2, blocker.commit).start()
+    assert history_writer.flush(timeout=10) is True
+    assert future.result() is None
+    assert _images(writer_db) == ["a.jpg"]
+    blocker.close()
+
+def test_queue_save_runs_inline_without_write_behind(writer_db, monkeypatch):
+    monkeypatch.setattr(writer, "WRITE_BEHIND", False)
+
+    future = queue_save("a.jpg", "hash_a", 0.5, PERCENTAGES)
+
+    assert future.done()
+    assert writer.writer_stats() is None
+    assert _images(writer_db) == ["a.jpg"]
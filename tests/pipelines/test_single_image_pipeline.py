@@ -68,11 +68,6 @@ def test_single_image_pipeline_success(monkeypatch):
         lambda img, m, c, v, **kwargs: img
     )
 
-    monkeypatch.setattr(
-        "app.pipelines.single_image.cv2.cvtColor",
-        lambda img, code: img,
-    )
-
     result = run_single_image_pipeline(
         DummyFile(),
         model=None,
@@ -87,3 +82,33 @@ def test_single_image_pipeline_success(monkeypatch):
     assert result.dominant == "Plastic"
     assert result.percentages == {"Plastic": 100.0}
     assert result.overlay is not None
+    assert result.detections == [
+        {"class": "Metal", "confidence": None, "pixel_area": 4, "bbox": None}
+    ]
+
+def test_single_image_pipeline_feeds_bgr_and_keeps_rgb_view(monkeypatch):
+    """The model gets the decoded BGR frame; the result holds an RGB view of it."""
+    image_bgr = np.zeros((2, 2, 3), dtype=np.uint8)
+    image_bgr[..., 0] = 255  # blue in BGR
+    seen = {}
+
+    def fake_inference(m, img, c):
+        seen["image"] = img
+        return DummyInference()
+
+    monkeypatch.setattr(
+        "app.pipelines.single_image.prepare_image_from_upload",
+        lambda f, w, h: (image_bgr, b"x", "image.jpg", "hash123"),
+    )
+    monkeypatch.setattr("app.pipelines.single_image.run_inference", fake_inference)
+
+    result = run_single_image_pipeline(
+        DummyFile(),
+        model=None,
+        conf_thres=0.5,
+        visible_classes=[],
+    )
+
+    assert seen["image"] is image_bgr
+    assert np.shares_memory(result.image_rgb, image_bgr)
+    assert result.image_rgb[0, 0].tolist() == [0, 0, 255]
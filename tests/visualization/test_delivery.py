@@ -0,0 +1,60 @@
+import cv2
+import numpy as np
+import pytest
+
+from app.visualization.delivery import (
+    image_digest,
+    encode_display_image,
+)
+
+# pytest tests/visualization/test_delivery.py -v
+
+def _random_image(h, w, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 256, size=(h, w, 3), dtype=np.uint8)
+
+def test_image_digest_depends_on_content():
+    """Identical arrays share a digest, different pixels do not."""
+    img = _random_image(20, 30)
+
+    assert image_digest(img) == image_digest(img.copy())
+    assert image_digest(img) != image_digest(_random_image(20, 30, seed=1))
+
+def test_image_digest_channel_reversed_view():
+    """RGB views of a BGR frame are hashed without copying and differ from the frame."""
+    bgr = _random_image(20, 30)
+
+    assert image_digest(bgr[..., ::-1]) == image_digest(bgr.copy()[..., ::-1])
+    assert image_digest(bgr[..., ::-1]) != image_digest(bgr)
+
+def test_encode_display_image_downsizes_to_width():
+    """Large images are shrunk to the display width and keep aspect ratio."""
+    img = _random_image(400, 800)
+
+    encoded = encode_display_image(img, max_width=200, fmt="JPEG")
+    decoded = cv2.imdecode(np.frombuffer(encoded, np.uint8), cv2.IMREAD_COLOR)
+
+    assert encoded[:2] == b"\xff\xd8"
+    assert decoded.shape[:2] == (100, 200)
+
+def test_encode_display_image_does_not_upscale():
+    """Images narrower than the display width keep their size."""
+    img = _random_image(40, 60)
+
+    encoded = encode_display_image(img, max_width=200, fmt="WEBP")
+    decoded = cv2.imdecode(np.frombuffer(encoded, np.uint8), cv2.IMREAD_COLOR)
+
+    assert decoded.shape[:2] == (40, 60)
+
+def test_encode_display_image_is_cached_by_content():
+    """Encoding the same pixels twice returns the cached bytes object."""
+    img = _random_image(50, 50, seed=2)
+
+    first = encode_display_image(img, max_width=100)
+    second = encode_display_image(img.copy(), max_width=100)
+
+    assert first is second
+
+def test_encode_display_image_rejects_unknown_format():
+    with pytest.raises(ValueError):
+        encode_display_image(_random_image(10, 10), fmt="BMP")
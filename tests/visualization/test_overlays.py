@@ -0,0 +1,50 @@
+import json
+import numpy as np
+
+from app.visualization.overlays import create_vector_overlay
+
+# pytest tests/visualization/test_overlays.py -v
+
+def _circle(cx, cy, r, n=24):
+    t = np.linspace(0, 2 * np.pi, n, endpoint=False)
+    return np.stack([cx + r * np.cos(t), cy + r * np.sin(t)], axis=1).astype(int).tolist()
+
+def test_vector_overlay_one_trace_per_class():
+    """Polygons are grouped into one trace per class."""
+    image = np.zeros((200, 300, 3), dtype=np.uint8)
+    polygons = [
+        {"class": "Metal", "points": _circle(50, 50, 20)},
+        {"class": "Metal", "points": _circle(150, 50, 20)},
+        {"class": "Wood", "points": _circle(100, 150, 30)},
+    ]
+
+    fig = create_vector_overlay(image, polygons, visible_classes=["Metal", "Wood"])
+
+    assert [t.name for t in fig.data] == ["Metal", "Wood"]
+    assert len(fig.layout.images) == 1
+
+def test_vector_overlay_hidden_classes_start_legendonly():
+    """Classes not selected are sent but hidden until toggled in the legend."""
+    image = np.zeros((100, 100, 3), dtype=np.uint8)
+    polygons = [
+        {"class": "Metal", "points": _circle(50, 50, 20)},
+        {"class": "Plastic", "points": _circle(50, 50, 10)},
+    ]
+
+    fig = create_vector_overlay(image, polygons, visible_classes=["Plastic"])
+    visibility = {t.name: t.visible for t in fig.data}
+
+    assert visibility == {"Metal": "legendonly", "Plastic": True}
+
+def test_vector_overlay_payload_is_small():
+    """Fifty detections serialize to a few KB of shapes."""
+    image = np.zeros((64, 64, 3), dtype=np.uint8)
+    polygons = [
+        {"class": "Metal", "points": _circle(10 + i, 10 + i, 8)}
+        for i in range(50)
+    ]
+
+    fig = create_vector_overlay(image, polygons, visible_classes=["Metal"])
+    shapes_json = json.dumps([t.to_plotly_json() for t in fig.data], default=str)
+
+    assert len(shapes_json) < 20_000
@@ -0,0 +1,171 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.visualization.timeseries import (
+    ROLLING_WINDOWS,
+    bucket_means,
+    bucket_time_series,
+    downsample_time_series,
+    lttb,
+    rolling_time_series,
+    prepare_time_series_data,
+    to_long,
+    create_time_series_chart
+)
+
+# pytest tests/visualization/test_timeseries.py -v
+
+@pytest.fixture
+def df_hist():
+    return pd.DataFrame({
+        "datetime": pd.to_datetime([
+            "2024-01-01 08:10:00",   # Monday
+            "2024-01-01 09:30:00",
+            "2024-01-07 23:00:00",   # Sunday, same ISO week
+            "2024-01-08 00:00:00",   # next Monday
+            "2024-02-15 12:00:00",
+        ]),
+        "plastic_percent": [10.0, 30.0, 50.0, 70.0, 90.0],
+        "metal_percent": [1.0, np.nan, 3.0, 4.0, 5.0],
+    })
+
+def _dates(series, fmt="%Y-%m-%d"):
+    return series.dt.strftime(fmt).tolist()
+
+def test_bucket_windows(df_hist):
+    hourly = bucket_time_series(df_hist, "hourly")
+    assert _dates(hourly["hour"], "%m-%d %H:%M")[:2] == ["01-01 08:00", "01-01 09:00"]
+
+    daily = bucket_time_series(df_hist, "daily")
+    assert _dates(daily["date"]) == ["2024-01-01", "2024-01-07", "2024-01-08", "2024-02-15"]
+    assert daily["samples"].tolist() == [2, 1, 1, 1]
+    # Missing percentages are left out of the mean
+    assert daily["metal_percent"].tolist() == [1.0, 3.0, 4.0, 5.0]
+
+    weekly = bucket_time_series(df_hist, "weekly")
+    assert _dates(weekly["week"]) == ["2024-01-01", "2024-01-08", "2024-02-12"]
+    assert weekly["samples"].tolist() == [3, 1, 1]
+    assert weekly["plastic_percent"].tolist() == [30.0, 70.0, 90.0]
+
+    monthly = bucket_time_series(df_hist, "monthly")
+    assert _dates(monthly["month"]) == ["2024-01-01", "2024-02-01"]
+    assert monthly["samples"].tolist() == [4, 1]
+
+    with pytest.raises(ValueError):
+        bucket_time_series(df_hist, "fortnightly")
+
+def test_weekly_buckets_match_a_reference_resample():
+    rng = np.random.default_rng(0)
+    stamps = pd.Timestamp("2023-01-01") + pd.to_timedelta(rng.integers(0, 400 * 86400, 5000), unit="s")
+    df = pd.DataFrame({"datetime": stamps, "plastic_percent": rng.random(5000) * 100})
+
+    weekly = bucket_time_series(df, "weekly").set_index("week")["plastic_percent"]
+    expected = (
+        df.set_index("datetime")["plastic_percent"]
+        .resample("W-MON", label="left", closed="left").mean()
+        .dropna()
+    )
+
+    pd.testing.assert_series_equal(weekly, expected, check_names=False, check_freq=False, check_index_type=False)
+
+def test_rolling_window_weighs_every_record(df_hist):
+    rolling = rolling_time_series(df_hist, 7)
+    by_day = rolling.set_index(rolling["date"].dt.strftime("%Y-%m-%d"))
+
+    # Jan 7 window holds Jan 1 (2 records) and Jan 7
+    assert by_day.loc["2024-01-07", "samples"] == 3
+    assert by_day.loc["2024-01-07", "plastic_percent"] == pytest.approx(30.0)
+    # Jan 8 window (Jan 2-8) no longer holds Jan 1
+    assert by_day.loc["2024-01-08", "plastic_percent"] == pytest.approx(60.0)
+    assert by_day.loc["2024-01-08", "metal_percent"] == pytest.approx(3.5)
+    # Days with nothing in their window are omitted
+    assert "2024-01-20" not in by_day.index
+    assert "2024-02-15" in by_day.index
+
+def test_bucket_means_match_bucket_time_series(df_hist):
+    """Engine-side sums (app.db.analytics) give the same means as pandas."""
+    grouped = df_hist.drop(columns="datetime").groupby(df_hist["datetime"].dt.floor("D").rename("bucket"))
+    df_sums = pd.concat(
+        [grouped.sum(min_count=1).add_suffix("_sum"), grouped.count().add_suffix("_count")], axis=1
+    )
+    df_sums["samples"] = grouped.size()
+
+    means = bucket_means(df_sums.reset_index(), "daily")
+    expected = bucket_time_series(df_hist, "daily")
+
+    assert means.columns.tolist() == expected.columns.tolist()
+    pd.testing.assert_frame_equal(means, expected, check_dtype=False)
+
+def test_to_long_matches_melt(df_hist):
+    df_agg = bucket_time_series(df_hist, "daily")
+
+    long = to_long(df_agg, "date")
+    melted = df_agg.melt(
+        id_vars=["date", "samples"],
+        value_vars=["plastic_percent", "metal_percent"],
+        var_name="Class",
+        value_name="Percentage"
+    )
+
+    assert long["Class"].astype(str).tolist() == (["Plastic"] * 4 + ["Metal"] * 4)
+    assert long["Percentage"].tolist() == melted["Percentage"].tolist()
+    assert long["samples"].tolist() == melted["samples"].tolist()
+    assert long["date"].tolist() == melted["date"].tolist()
+
+def test_prepare_does_not_modify_input(df_hist):
+    before = df_hist.copy()
+
+    for mode in ["Raw (Per Image)", "Hourly Average", "Daily Average",
+                 "Weekly Average", "Monthly Average", *ROLLING_WINDOWS]:
+        df_agg, df_long = prepare_time_series_data(df_hist, mode)
+        assert not df_long.empty, mode
+        assert (df_agg is None) == (mode == "Raw (Per Image)")
+
+        fig = create_time_series_chart(df_long, "All", mode)
+        assert len(fig.data) == 2
+
+    pd.testing.assert_frame_equal(df_hist, before)
+    assert prepare_time_series_data(df_hist, "Yearly Average") == (None, None)
+
+def test_lttb_keeps_ends_and_extremes():
+    x = np.arange(10_000)
+    y = np.sin(x / 500.0)
+    y[6_543] = 25.0  # single-image spike
+
+    kept = lttb(x, y, 200)
+
+    assert len(kept) == 200
+    assert kept[0] == 0 and kept[-1] == 9_999
+    assert np.all(np.diff(kept) > 0)
+    assert 6_543 in kept
+
+    # Short series are returned as is
+    assert lttb(x[:50], y[:50], 200).tolist() == list(range(50))
+    with pytest.raises(ValueError):
+        lttb(x, y, 2)
+
+def test_downsample_bounds_each_class_and_follows_zoom():
+    rng = np.random.default_rng(0)
+    stamps = pd.Timestamp("2024-01-01") + pd.to_timedelta(np.sort(rng.integers(0, 90 * 86400, 20_000)), unit="s")
+    df = pd.DataFrame({
+        "datetime": stamps,
+        "plastic_percent": rng.random(20_000) * 100,
+        "metal_percent": rng.random(20_000) * 100,
+    })
+    df.loc[5, "metal_percent"] = np.nan
+    _, df_long = prepare_time_series_data(df, "Raw (Per Image)")
+
+    plot = downsample_time_series(df_long, 300)
+    assert plot.groupby("Class", observed=True).size().tolist() == [300, 300]
+    assert plot["Percentage"].notna().all()
+    # Range ends are kept for every class
+    assert plot.groupby("Class", observed=True)["datetime"].max().eq(stamps.max()).all()
+
+    # A one-day zoom is sampled from that day's records only
+    start, end = pd.Timestamp("2024-02-01"), pd.Timestamp("2024-02-02")
+    in_day = int(df["datetime"].between(start, end).sum())
+    zoomed = downsample_time_series(df_long, 300, start, end)
+
+    assert zoomed["datetime"].between(start, end).all()
+    assert len(zoomed) == 2 * min(in_day, 300)